@@ -0,0 +1,116 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from PriceCache import align_index
+
+# On-disk store of bar histories too large to hold as DataFrames, e.g. years of 1-minute bars for hundreds of
+# tickers. Each ticker/interval pair is one file of fixed-width records (int64 timestamp, float32 OHLC, int64
+# volume: 32 bytes a bar instead of about 48 for a float64 DataFrame), sorted by time and only ever appended to.
+# Files are memory-mapped, so a range query returns a view of the file's pages without reading the rest:
+# store.range("MSFT", "1m", start, end)["close"] can go straight into the indicator and backtest functions.
+# Range boundaries are found by binary search of a sparse in-memory index of every index_step-th timestamp and
+# then of one index_step block of the file, so a lookup only touches a few pages however long the history is.
+
+BAR_DTYPE = np.dtype([('time', '<i8'), ('open', '<f4'), ('high', '<f4'), ('low', '<f4'), ('close', '<f4'),
+                      ('volume', '<i8')])
+FIELDS = {'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'}
+
+DEFAULT_BAR_DIR = os.environ.get("PM_BAR_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bar_store"))
+
+
+# bar records of an OHLCV DataFrame, with timestamps as nanoseconds since the epoch aligned as in get_panel:
+# UTC for intraday bars (so bars stored across a daylight saving change stay in order), dates for daily bars
+def to_records(frame, interval):
+    records = np.empty(len(frame), dtype=BAR_DTYPE)
+    records['time'] = np.asarray(align_index(frame.index, interval), dtype='M8[ns]').view(np.int64)
+    for column, field in FIELDS.items():
+        if column not in frame:
+            records[field] = 0
+        elif field == 'volume':     # some providers leave volume missing on quiet bars
+            records[field] = np.nan_to_num(frame[column].to_numpy())
+        else:
+            records[field] = frame[column].to_numpy()
+    return records
+
+
+# OHLCV DataFrame of bar records (a copy)
+def to_frame(records):
+    return pd.DataFrame({column: records[field] for column, field in FIELDS.items()},
+                        index=pd.DatetimeIndex(records['time'].astype('M8[ns]')))
+
+
+class BarStore:
+
+    def __init__(self, directory=DEFAULT_BAR_DIR, index_step=4096):
+        self.directory = directory
+        self.index_step = index_step
+        self._open = {}     # (tick, interval) -> (memory-mapped records, sparse timestamp index)
+        self._lock = threading.Lock()
+
+    def path(self, tick, interval):
+        return os.path.join(self.directory, interval, f"{tick}.bars")
+
+    # all the bars of a ticker (a read-only memory map), with the sparse index of its timestamps
+    def _mapped(self, tick, interval):
+        key = (tick, interval)
+        if key not in self._open:
+            path = self.path(tick, interval)
+            n_bars = os.path.getsize(path)//BAR_DTYPE.itemsize if os.path.exists(path) else 0
+            if n_bars:
+                bars = np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(n_bars,))
+            else:
+                bars = np.empty(0, dtype=BAR_DTYPE)
+            self._open[key] = (bars, np.array(bars['time'][::self.index_step]))
+        return self._open[key]
+
+    def bars(self, tick, interval):
+        return self._mapped(tick, interval)[0]
+
+    # position of the first bar at or after a time (as nanoseconds)
+    def _search(self, tick, interval, time):
+        bars, index = self._mapped(tick, interval)
+        block = max(int(np.searchsorted(index, time, side='left')) - 1, 0)
+        lo = block*self.index_step
+        return lo + int(np.searchsorted(np.array(bars['time'][lo:lo + self.index_step + 1]), time, side='left'))
+
+    # bars with start <= time < end (either can be None for an open range, and naive times are UTC for
+    # intraday bars), as a view of the file
+    def range(self, tick, interval, start=None, end=None):
+        bars = self.bars(tick, interval)
+        first = 0 if start is None else self._search(tick, interval, pd.Timestamp(start).value)
+        last = len(bars) if end is None else self._search(tick, interval, pd.Timestamp(end).value)
+        return bars[first:last]
+
+    # time of the last bar stored, or None
+    def last_time(self, tick, interval):
+        bars = self.bars(tick, interval)
+        return pd.Timestamp(int(bars['time'][-1])) if len(bars) else None
+
+    # add the bars of an OHLCV DataFrame after the last one stored, returning how many were added
+    def append(self, tick, interval, frame):
+        records = to_records(frame, interval)
+        records = records[np.argsort(records['time'], kind='stable')]
+        with self._lock:
+            last = self.last_time(tick, interval)
+            if last is not None:
+                records = records[records['time'] > last.value]
+            if len(records):
+                os.makedirs(os.path.dirname(self.path(tick, interval)), exist_ok=True)
+                with open(self.path(tick, interval), 'ab') as file:
+                    file.write(records.tobytes())
+                self._open.pop((tick, interval), None)     # remapped with the new length on next use
+        return len(records)
+
+    # download bars from a provider (by default the one behind StockGetFunctions' market data, skipping the
+    # price cache so the bars aren't kept twice) into the store, starting after the last bar stored
+    def ingest(self, tick, interval, start, end, fetch=None):
+        if fetch is None:
+            from StockGetFunctions import uncached_fetch
+            fetch = uncached_fetch()
+        last = self.last_time(tick, interval)
+        if last is not None:
+            start = max(pd.Timestamp(start), last + pd.Timedelta(1))
+        if pd.Timestamp(start) >= pd.Timestamp(end):
+            return 0
+        return self.append(tick, interval, fetch(tick, start, end, interval))
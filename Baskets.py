@@ -0,0 +1,133 @@
+import json
+import numpy as np
+import pandas as pd
+
+# Custom indices (baskets) of listed tickers, defined in a JSON file of
+#   {name: {"constituents": {ticker: weight, ...}, "divisor": d, "rebalance": [dates], "currency": "USD"}}
+# With a divisor, weights are units of each constituent and the basket is worth sum(units*price)/divisor
+# (a price-weighted index like DCX10). Without one, weights are fractions of value and the basket starts at
+# "base" (100 by default) on the first day all its constituents are priced. On each rebalance date the holdings
+# are reset to the weights, scaled so the basket's level doesn't jump.
+# Between rebalances every basket holds fixed units, so all baskets are computed together as one prices x units
+# matrix product per stretch of days between rebalances. BasketEngine keeps the current units, so new bars are
+# added with update() without going over the earlier history again, and save()/load() carry that state between
+# runs.
+
+
+class Basket:
+
+    def __init__(self, name, constituents, divisor=None, rebalance=(), currency="USD", base=100.0):
+        self.name = name
+        self.constituents = list(constituents)
+        self.weights = np.array([constituents[ticker] for ticker in self.constituents], dtype=float)
+        self.divisor = divisor
+        self.rebalance = pd.DatetimeIndex(sorted(pd.to_datetime(list(rebalance))))
+        self.currency = currency
+        self.base = base
+
+
+# baskets defined in a JSON file
+def read_baskets(path):
+    with open(path) as file:
+        config = json.load(file)
+    return [Basket(name, **spec) for name, spec in config.items()]
+
+
+class BasketEngine:
+
+    # tickers are the columns of the price arrays that will be passed to update()
+    def __init__(self, baskets, tickers):
+        self.baskets = list(baskets)
+        self.names = [basket.name for basket in self.baskets]
+        columns = {ticker: k for k, ticker in enumerate(tickers)}
+        missing = {ticker for basket in self.baskets for ticker in basket.constituents} - set(columns)
+        if missing:
+            raise KeyError(f"basket constituents not in the price panel: {sorted(missing)}")
+        # only the columns of constituents take part in the matrix products
+        universe = list(dict.fromkeys(ticker for basket in self.baskets for ticker in basket.constituents))
+        self.columns = np.array([columns[ticker] for ticker in universe], dtype=np.int64)
+        position = {ticker: k for k, ticker in enumerate(universe)}
+        self.rows = [np.array([position[ticker] for ticker in basket.constituents], dtype=np.int64)
+                     for basket in self.baskets]
+
+        self.units = np.zeros((len(universe), len(self.baskets)))    # units of each constituent per basket
+        self.started = np.zeros(len(self.baskets), dtype=bool)
+        self.pending = np.zeros(len(self.baskets), dtype=np.int64)   # next rebalance date of each basket
+        for j, basket in enumerate(self.baskets):
+            if basket.divisor is not None:
+                self.units[self.rows[j], j] = basket.weights/basket.divisor
+                self.started[j] = True
+        self.dates = pd.DatetimeIndex([])
+        self.values = np.empty((0, len(self.baskets)))
+
+    # reset basket j to its weights at the given constituent prices, keeping its level (or starting it at base)
+    def _reweight(self, j, prices):
+        basket = self.baskets[j]
+        rows = self.rows[j]
+        price = prices[rows]
+        if not np.all(np.isfinite(price) & (price > 0)):
+            return
+        level = price @ self.units[rows, j] if self.started[j] else basket.base
+        if basket.divisor is None:
+            self.units[rows, j] = basket.weights/basket.weights.sum()*level/price
+        else:
+            self.units[rows, j] = basket.weights*level/(price @ basket.weights)
+        self.started[j] = True
+
+    # add bars after the last date seen: dates and a dates x tickers price array.
+    # returns the baskets' values on those dates (dates x baskets), NaN where a constituent has no price
+    def update(self, dates, prices):
+        dates = pd.DatetimeIndex(dates)
+        if len(self.dates) and len(dates) and dates[0] <= self.dates[-1]:
+            raise ValueError(f"bars must follow the last update on {self.dates[-1].date()}")
+        prices = np.asarray(prices, dtype=float)[:, self.columns]
+        finite = np.isfinite(prices)
+
+        # days on which some basket starts or rebalances split the bars into stretches of fixed units
+        events = {}
+        for j, basket in enumerate(self.baskets):
+            if not self.started[j]:
+                complete = np.flatnonzero(finite[:, self.rows[j]].all(axis=1))
+                if len(complete):
+                    events.setdefault(complete[0], []).append(j)
+            rows = dates.searchsorted(basket.rebalance[self.pending[j]:])
+            rows = rows[rows < len(dates)]
+            self.pending[j] += len(rows)
+            for row in rows:
+                events.setdefault(row, []).append(j)
+
+        values = np.empty((len(dates), len(self.baskets)))
+        bounds = sorted(set(events) | {0, len(dates)})
+        filled = np.where(finite, prices, 0.0)
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            for j in events.get(a, []):
+                self._reweight(j, prices[a])
+            values[a:b] = filled[a:b] @ self.units
+            values[a:b][~finite[a:b] @ (self.units != 0)] = np.nan
+            values[a:b, ~self.started] = np.nan
+
+        self.dates = self.dates.append(dates)
+        self.values = np.concatenate((self.values, values))
+        return values
+
+    # full history of basket values as a DataFrame
+    def frame(self):
+        return pd.DataFrame(self.values, index=self.dates, columns=self.names)
+
+    def save(self, path):
+        np.savez(path, names=np.array(self.names), dates=np.asarray(self.dates, dtype='M8[ns]'), values=self.values,
+                 units=self.units, started=self.started, pending=self.pending)
+
+    # engine for the same baskets and tickers, carrying on from a saved state
+    @classmethod
+    def load(cls, path, baskets, tickers):
+        engine = cls(baskets, tickers)
+        with np.load(path) as state:
+            if list(state['names']) != engine.names or state['units'].shape != engine.units.shape:
+                raise ValueError(f"{path} was saved for different baskets")
+            engine.dates = pd.DatetimeIndex(state['dates'])
+            engine.values = state['values']
+            engine.units = state['units']
+            engine.started = state['started']
+            engine.pending = state['pending']
+        return engine
@@ -0,0 +1,475 @@
+# Offline benchmarks for the data and computation layers, timing each fast path against the original loop it
+# replaced (tests/baseline.py) or a reference implementation (tests/helpers.py). Results are checked against
+# those by the tests (python -m pytest tests), not here. Run the whole file, or pass benchmark names:
+#   python Benchmarks.py panel indicators
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import StockGetFunctions
+from StockGetFunctions import get_panel
+from DataProviders import SyntheticProvider
+import TopStockInfo
+import SimpleMeanReversion
+import MultiMeanReversion
+import ParameterSweep
+import WalkForward
+import Ledger
+from PricePanel import PricePanel
+import Currency
+from Baskets import Basket, BasketEngine
+import Metrics
+import PlotStockInfo
+import BlockStats
+from BarStore import BarStore
+import RiskReward
+from tests.baseline import (reference_sma, reference_ema, reference_volatility, reference_stochastic,
+                            reference_mean_reversion, reference_multi_mean_reversion, reference_block_std)
+from tests.helpers import (LatencyFetch, reference_ledger, reference_wide_portfolio, reference_conversion,
+                           reference_basket, reference_metrics, reference_lttb)
+
+
+# time a function call, returning (result, seconds)
+def timed(function, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+# serial per-ticker loop (as in Portfolio Info.py) vs concurrent get_panel against the same fake latency, then
+# two panels of the same tickers requested at the same time
+def bench_panel(n_tickers=22, latency=0.05):
+    tickers = [f"T{i}" for i in range(n_tickers)]
+    start, end = "2020-01-01", "2021-01-01"
+
+    fetch = LatencyFetch(latency)
+    _, t_serial = timed(lambda: pd.DataFrame({tick: fetch(tick, start, end, "1d")["Close"] for tick in tickers}))
+
+    fetch = LatencyFetch(latency, fail_every=7)
+    _, t_panel = timed(get_panel, tickers + tickers[:5], "Close", start, end, fetch=fetch, backoff=0.01)
+
+    shared = LatencyFetch(latency)
+
+    def twice():
+        with ThreadPoolExecutor(2) as pool:
+            panels = [pool.submit(get_panel, tickers, "Close", start, end, max_workers=n_tickers, fetch=shared)
+                      for _ in range(2)]
+            return [panel.result() for panel in panels]
+    _, t_twice = timed(twice)
+    print(f"panel: {n_tickers} tickers at {latency}s latency: serial {t_serial:.2f}s, "
+          f"get_panel {t_panel:.2f}s ({t_serial/t_panel:.1f}x) with {fetch.calls} fetch calls incl. retries, "
+          f"two at once {t_twice:.2f}s with {shared.calls} fetch calls")
+
+
+# vectorized indicators against the original loops, on a long synthetic hourly history
+def bench_indicators(interval="1h", years=5, k=26):
+    close_hist = SyntheticProvider(years=years).history("SYN00000", interval=interval)["Close"]
+    close = close_hist.to_numpy()
+    cases = [("SMA", reference_sma, (k,), TopStockInfo.simple_moving_average),
+             ("EMA", reference_ema, (k, 2), TopStockInfo.exp_moving_average),
+             ("volatility", reference_volatility, (k,), TopStockInfo.moving_volatility)]
+    for name, reference, args, vectorized in cases:
+        _, t_loop = timed(reference, close, *args)
+        _, t_vec = timed(vectorized, close_hist, *args)
+        print(f"{name}: {len(close)} bars, loop {t_loop:.3f}s, vectorized {t_vec:.4f}s ({t_loop/t_vec:.0f}x)")
+
+
+# linear-time rolling extrema stochastic oscillator against slicing every bar, on minute closes
+def bench_stochastic(years=1):
+    close = SyntheticProvider(years=years).history("SYN00000", interval="1m")["Close"]
+    _, t_loop = timed(reference_stochastic, close.to_numpy())
+    _, t_vec = timed(TopStockInfo.stochastic_oscillator, close, 14)
+    print(f"stochastic: {len(close)} minute bars, loop {t_loop:.2f}s, vectorized {t_vec:.3f}s "
+          f"({t_loop/t_vec:.0f}x)")
+
+
+# every indicator over a whole dates x tickers universe at once, with staggered listing dates and gaps
+def bench_panel_indicators(n_tickers=5000, years=1):
+    prices = SyntheticProvider(n_tickers=n_tickers, years=years).close_panel().to_numpy(copy=True)
+    rng = np.random.default_rng(0)
+    listed = rng.integers(0, len(prices)//2, n_tickers)
+    prices[np.arange(len(prices))[:, None] < listed[None, :]] = np.nan
+    prices[rng.integers(0, len(prices), n_tickers), rng.integers(0, n_tickers, n_tickers)] = np.nan
+
+    cases = [("SMA", TopStockInfo.simple_moving_average, (30,)), ("EMA", TopStockInfo.exp_moving_average, (26, 2)),
+             ("MACD", TopStockInfo.MA_converge_diverge, ()), ("volatility", TopStockInfo.moving_volatility, (20,)),
+             ("stochastic", TopStockInfo.stochastic_oscillator, (14,))]
+    total = 0.0
+    for name, indicator, args in cases:
+        _, seconds = timed(indicator, prices, *args)
+        total += seconds
+        print(f"panel {name}: {prices.shape[0]} dates x {n_tickers} tickers in {seconds:.3f}s")
+    print(f"panel indicators: all five in {total:.3f}s")
+
+
+# batched frontier evaluation against the per-weighting loop, on synthetic deltas
+def bench_frontier(n_assets=5, resolution=100, loop_sample=20000):
+    StockGetFunctions.set_provider(SyntheticProvider(n_tickers=n_assets, years=6,
+                                                     origin=pd.Timestamp.today().normalize() - pd.DateOffset(years=5)))
+    ticks = SyntheticProvider(n_tickers=n_assets).tickers
+    RiskReward.resolution_scale = 1/resolution
+    portfolio = {i: RiskReward.Stock(tick, RiskReward.getMean(tick), RiskReward.getsDev(tick), 0)
+                 for i, tick in enumerate(ticks)}
+
+    # per-weighting loop over a sample of the grid
+    t0 = time.perf_counter()
+    for weighting in islice(RiskReward.weights(n_assets, resolution), loop_sample):
+        for i in range(n_assets):
+            portfolio[i].weight = weighting[i]
+        RiskReward.portfolio_risk(portfolio, "5y")
+        RiskReward.portfolio_return(portfolio)
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    n_portfolios = sum(len(wt) for wt, risk, ret in RiskReward.frontier_chunks(ticks, "5y", resolution))
+    t_batch = time.perf_counter() - t0
+    print(f"frontier: {n_portfolios} portfolios of {n_assets} assets, batched {t_batch:.2f}s, "
+          f"loop would take ~{t_loop/loop_sample*n_portfolios:.0f}s")
+
+
+# critical line frontier against the brute-force grid on a few assets, then timed on large universes
+def bench_cla(grid_assets=4, resolution=50, universes=(200, 500), risk_free=6.5/252):
+    StockGetFunctions.set_provider(SyntheticProvider(n_tickers=max(universes), years=6,
+                                                     origin=pd.Timestamp.today().normalize() - pd.DateOffset(years=5)))
+    ticks = SyntheticProvider(n_tickers=max(universes)).tickers
+
+    cla, t_cla = timed(RiskReward.efficient_frontier, ticks[:grid_assets], "5y")
+    _, min_risk, _ = cla.min_variance()
+    _, sharpe_risk, sharpe_ret = cla.max_sharpe(risk_free)
+    t0 = time.perf_counter()
+    grid_risk, grid_sharpe = np.inf, -np.inf
+    for wt, risk, ret in RiskReward.frontier_chunks(ticks[:grid_assets], "5y", resolution):
+        grid_risk = min(grid_risk, risk.min())
+        grid_sharpe = max(grid_sharpe, ((ret - risk_free)/risk).max())
+    t_grid = time.perf_counter() - t0
+    print(f"cla: {grid_assets} assets, grid at 1/{resolution} {t_grid:.2f}s (min risk {grid_risk:.5f}, best Sharpe "
+          f"{grid_sharpe:.5f}), critical line {t_cla:.4f}s (min risk {min_risk:.5f}, max Sharpe "
+          f"{(sharpe_ret - risk_free)/sharpe_risk:.5f})")
+
+    for n_assets in universes:
+        RiskReward.get_portfolio_matrices(ticks[:n_assets], "5y")     # download outside the timing
+        cla, t_cla = timed(RiskReward.efficient_frontier, ticks[:n_assets], "5y")
+        (_, risk, ret), t_points = timed(cla.frontier, 50)
+        print(f"cla: {n_assets} assets, {len(cla.turning_points)} turning points in {t_cla:.2f}s, "
+              f"50 frontier points in {t_points:.3f}s")
+
+
+# Monte Carlo sampler in one process and across a process pool
+def bench_monte_carlo(n_assets=10, n_samples=10**7):
+    StockGetFunctions.set_provider(SyntheticProvider(n_tickers=n_assets, years=6,
+                                                     origin=pd.Timestamp.today().normalize() - pd.DateOffset(years=5)))
+    ticks = SyntheticProvider(n_tickers=n_assets).tickers
+    RiskReward.get_portfolio_matrices(ticks, "5y")
+
+    _, t_serial = timed(RiskReward.sample_frontier, ticks, "5y", n_samples, max_workers=1)
+    pooled, t_pooled = timed(RiskReward.sample_frontier, ticks, "5y", n_samples)
+    print(f"monte carlo: {n_samples} portfolios of {n_assets} assets, one process {t_serial:.2f}s, "
+          f"process pool {t_pooled:.2f}s, {len(pooled.risk)} efficient portfolios kept")
+
+
+# batched mean reversion backtest of a grid of configurations against the original loop run per configuration
+def bench_mean_reversion(years=8, loop_sample=20):
+    close = SyntheticProvider(years=years).history("SYN00000")["Close"].to_numpy()
+    ma_short, ma_long, amt = np.meshgrid(np.arange(3, 21), np.arange(20, 121, 5), [5.0, 10.0, 20.0, 50.0])
+    ma_short, ma_long, amt = ma_short.ravel(), ma_long.ravel(), amt.ravel()
+
+    _, t_batch = timed(SimpleMeanReversion.mean_reversion_backtest, close, ma_short, ma_long, amt)
+    t0 = time.perf_counter()
+    for j in np.random.default_rng(0).integers(0, len(amt), loop_sample):
+        reference_mean_reversion(close, ma_short[j], ma_long[j], amt[j])
+    t_loop = (time.perf_counter() - t0)/loop_sample*len(amt)
+    print(f"mean reversion: {len(amt)} configurations over {len(close)} days, batched {t_batch:.2f}s, "
+          f"loop would take ~{t_loop:.0f}s")
+
+
+# process-pool parameter sweep of MultiMeanReversion against the original loop run per configuration
+def bench_sweep(n_tickers=3, years=5, loop_sample=10):
+    prices = SyntheticProvider(n_tickers=n_tickers, years=years).close_panel().to_numpy()
+    grid = (range(10, 101, 5), range(3, 31), [0.01, 0.02, 0.05, 0.1, 0.2])
+    results, t_sweep = timed(ParameterSweep.sweep, prices, *grid)
+
+    t0 = time.perf_counter()
+    for j in np.random.default_rng(0).integers(0, len(results), loop_sample):
+        config = results.iloc[j]
+        reference_multi_mean_reversion(prices, int(config['ma_long_interval']), int(config['ma_short_interval']),
+                                       config['trade_factor'])
+    t_loop = (time.perf_counter() - t0)/loop_sample*len(results)
+    print(f"sweep: {len(results)} configurations of {n_tickers} tickers over {len(prices)} days in {t_sweep:.2f}s, "
+          f"loop would take ~{t_loop:.0f}s")
+
+
+# MultiMeanReversion engine over a whole universe with staggered listing dates
+def bench_universe(n_tickers=3000, years=20):
+    prices = SyntheticProvider(n_tickers=n_tickers, years=years).close_panel().to_numpy(copy=True)
+    listed = np.random.default_rng(0).integers(0, len(prices)//2, n_tickers)
+    prices[np.arange(len(prices))[:, None] < listed[None, :]] = np.nan
+
+    _, seconds = timed(lambda: MultiMeanReversion.mean_reversion_backtest(
+        prices, MultiMeanReversion.ma_panel(prices, 30), MultiMeanReversion.ma_panel(prices, 7), 0.05))
+    print(f"universe: {n_tickers} tickers over {len(prices)} days in {seconds:.2f}s")
+
+
+# walk-forward optimization of both strategies
+def bench_walk_forward(n_tickers=3, years=12, in_sample=504, out_of_sample=126):
+    prices = SyntheticProvider(n_tickers=n_tickers, years=years).close_panel()
+    for name in WalkForward.STRATEGIES:
+        (folds, equity), seconds = timed(WalkForward.walk_forward, name, prices, WalkForward.grids[name],
+                                         in_sample, out_of_sample)
+        print(f"walk forward: {name}, {len(folds)} folds in {seconds:.2f}s, out-of-sample return "
+              f"{equity.iloc[-1]*100:.1f}%")
+
+
+# ledger holdings and capital for a large random ledger, against the original per-trade updates of every
+# following row on a sample of the trades
+def bench_ledger(n_events=200000, n_tickers=500, years=20, loop_sample=500):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2000-01-03", periods=252*years)
+    tickers = [f"T{k}" for k in range(n_tickers)]
+    prices = 100*np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), n_tickers)), axis=0))
+    event_dates = dates[rng.integers(0, len(dates), n_events)] - pd.to_timedelta(rng.integers(0, 3, n_events), 'D')
+    actions = rng.choice(['buy', 'sell', 'drip'], n_events, p=[0.7, 0.2, 0.1])
+    event_tickers = rng.choice(tickers, n_events)
+    shares = rng.exponential(10, n_events)
+
+    def build():
+        events = Ledger.ledger_events(event_dates, event_tickers, actions, shares)
+        return Ledger.ledger_positions(events, dates, tickers, prices)
+    _, seconds = timed(build)
+
+    sample = Ledger.ledger_events(event_dates[:loop_sample], event_tickers[:loop_sample], actions[:loop_sample],
+                                  shares[:loop_sample])
+    _, t_loop = timed(reference_ledger, sample, dates, tickers, prices)
+    print(f"ledger: {n_events} trades of {n_tickers} tickers over {len(dates)} days in {seconds:.3f}s, "
+          f"row-by-row updates would take ~{t_loop/loop_sample*n_events:.0f}s")
+
+
+# Portfolio Info valuation on a price panel against the original wide DataFrame built one column per ticker
+# and field (and copied for the R1000 normalisation)
+def bench_price_panel(n_tickers=500, years=10):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2010-01-01", periods=252*years)
+    tickers = [f"T{k}.JO" if k % 2 else f"T{k}" for k in range(n_tickers)]
+    prices = 100*np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), n_tickers)), axis=0))
+    usd_zar = 15 + np.cumsum(rng.normal(0, 0.05, len(dates)))
+    shares = np.cumsum(rng.exponential(1, (len(dates), n_tickers))*(rng.random((len(dates), n_tickers)) < 0.01), 0)
+
+    def panel():
+        panel = PricePanel(dates, tickers, fields=('price', 'shares', 'zar'))
+        panel['price'] = prices
+        panel['shares'] = shares
+        rand_cents = np.array(["JO" in ticker for ticker in tickers])
+        panel['zar'] = panel['price']*np.where(rand_cents[None, :], 1/100, usd_zar[:, None])
+        return panel, (panel['shares']*panel['zar']).sum(axis=1)
+
+    with warnings.catch_warnings():     # pandas warns about exactly this fragmentation
+        warnings.simplefilter('ignore', pd.errors.PerformanceWarning)
+        (data, adj_returns), t_wide = timed(reference_wide_portfolio, dates, tickers, prices, shares, usd_zar)
+    (price_panel, _), t_panel = timed(panel)
+    wide_bytes = data.memory_usage().sum() + adj_returns.memory_usage().sum()
+    print(f"price panel: {n_tickers} tickers over {len(dates)} days, wide DataFrame {t_wide:.2f}s and "
+          f"{wide_bytes/1e6:.0f}MB, panel {t_panel:.3f}s and {price_panel.values.nbytes/1e6:.0f}MB")
+
+
+# per-ticker conversion into ZAR (as in Portfolio Info.py) vs the broadcast PanelConverter, then switching
+# the base currency back and forth
+def bench_currency(n_tickers=500, years=10, latency=0.05):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2010-01-01", periods=252*years)
+    suffixes = ["", ".JO", ".L", ".DE", ".T"]
+    tickers = [f"T{k}{suffixes[k % len(suffixes)]}" for k in range(n_tickers)]
+    prices = 100*np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), n_tickers)), axis=0))
+    fetch = LatencyFetch(latency)
+    rates = Currency.FXRates(fetch=fetch)
+    per_usd = rates.per_usd(["ZAR", "GBP", "EUR", "JPY"], dates)
+
+    converter = Currency.PanelConverter(prices, dates, tickers, rates)
+    _, t_loop = timed(reference_conversion, prices, tickers, per_usd, "ZAR")
+    _, t_first = timed(converter.convert, "ZAR")
+    _, t_gbp = timed(converter.convert, "GBP")
+    _, t_again = timed(converter.convert, "ZAR")
+    print(f"currency: {n_tickers} tickers over {len(dates)} days in 5 currencies, per-ticker loop {t_loop:.3f}s, "
+          f"broadcast {t_first:.3f}s, new base {t_gbp:.3f}s, memoized {t_again*1e6:.0f}us, "
+          f"{fetch.calls} FX fetches")
+
+
+# 50 baskets over a 500-ticker universe: day-by-day reference vs the engine over the full history, then adding
+# one new bar to an engine restored from disk
+def bench_baskets(n_baskets=50, n_tickers=500, years=20, size=20):
+    provider = SyntheticProvider(n_tickers=n_tickers, years=years)
+    tickers = provider.tickers
+    close = provider.close_panel(tickers)
+    dates = close.index
+    prices = close.to_numpy().copy()
+    prices[:252, :10] = np.nan      # a few tickers listed a year late
+    rng = np.random.default_rng(0)
+    month_ends = pd.date_range(dates[0], dates[-1], freq='ME')
+    baskets = []
+    for j in range(n_baskets):
+        constituents = {tickers[k]: float(w) for k, w in zip(rng.choice(n_tickers, size, replace=False),
+                                                              rng.uniform(0.5, 2, size))}
+        rebalance = month_ends[::[1, 3, 12][j % 3]]
+        divisor = 1000.0 if j % 2 else None
+        baskets.append(Basket(f"B{j}", constituents, divisor=divisor, rebalance=rebalance))
+
+    columns = {ticker: k for k, ticker in enumerate(tickers)}
+    _, t_loop = timed(lambda: [reference_basket(dates, prices[:, [columns[ticker] for ticker in basket.constituents]],
+                                                basket) for basket in baskets])
+    _, t_full = timed(BasketEngine(baskets, tickers).update, dates, prices)
+
+    engine = BasketEngine(baskets, tickers)
+    engine.update(dates[:-1], prices[:-1])
+    with tempfile.TemporaryDirectory() as directory:
+        state = os.path.join(directory, "baskets.npz")
+        engine.save(state)
+        engine = BasketEngine.load(state, baskets, tickers)
+    _, t_bar = timed(engine.update, dates[-1:], prices[-1:])
+    print(f"baskets: {n_baskets} baskets of {size} over {len(dates)} days, day-by-day {t_loop:.2f}s, "
+          f"engine {t_full:.3f}s, one new bar {t_bar*1e3:.2f}ms")
+
+
+# metrics of 100k equity curves (e.g. a large sweep) vs a per-curve pandas loop, and rolling metrics
+def bench_metrics(n_curves=100000, n_days=252, loop_sample=200, window=63, risk_free=0.065):
+    rng = np.random.default_rng(0)
+    equity = 10000*np.exp(np.cumsum(rng.normal(0.0003, 0.01, (n_days, n_curves)), axis=0))
+    traded = rng.exponential(100, (n_days, n_curves))
+
+    _, t_loop = timed(lambda: [reference_metrics(equity[:, k], traded[:, k], risk_free) for k in range(loop_sample)])
+    table, t_metrics = timed(Metrics.metrics, equity, traded, risk_free)
+    _, t_rank = timed(lambda: table.nlargest(10, 'sharpe'))
+    _, t_rolling = timed(Metrics.rolling_metrics, equity[:, :1000], window, traded[:, :1000], risk_free)
+    print(f"metrics: {n_curves} curves of {n_days} days, pandas loop {t_loop/loop_sample*n_curves:.0f}s "
+          f"(extrapolated), vectorized {t_metrics:.2f}s, top 10 by Sharpe {t_rank*1e3:.1f}ms, "
+          f"rolling {window}-day metrics of 1000 curves {t_rolling:.2f}s")
+
+
+# LTTB buckets against the point-by-point loop, then rendering a chart of every point vs an LTTB-downsampled
+# one as the history grows (minute bars)
+def bench_render(lengths=(10**4, 10**5, 10**6), points=2000):
+    PlotStockInfo._init_renderer()
+    rng = np.random.default_rng(0)
+    x = np.arange(10**5, dtype=float)
+    y = np.cumsum(rng.normal(0, 1, len(x)))
+    _, t_loop = timed(reference_lttb, x.tolist(), y.tolist(), points)
+    _, t_lttb = timed(PlotStockInfo.lttb, x, y, points)
+    print(f"render: LTTB of {len(x)} points to {points}, loop {t_loop:.2f}s, vectorized {t_lttb:.3f}s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for n in lengths:
+            dates = pd.date_range("2020-01-01", periods=n, freq='min')
+            series = pd.Series(100 + np.cumsum(rng.normal(0, 0.05, n)), index=dates)
+            times, sizes = [], []
+            for max_points in (0, points):
+                def render():
+                    x, y, is_dates = PlotStockInfo.chart_points(series, max_points)
+                    return PlotStockInfo._render_task(os.path.join(directory, f"{n}_{max_points}.svg"), "bench",
+                                                      "Date", "Close", x, y, is_dates)
+                path, seconds = timed(render)
+                times.append(seconds)
+                sizes.append(os.path.getsize(path)/1e3)
+            print(f"render: {n} points to SVG, every point {times[0]:.2f}s ({sizes[0]:.0f}kB), "
+                  f"LTTB to {points} points {times[1]:.2f}s ({sizes[1]:.0f}kB)")
+
+
+# one download per (metric, ticker) pair (as PlotStockInfo used to) vs the metric registry, which downloads each
+# ticker once and shares intermediates, with 8 metrics of 20 tickers against the same fake latency
+def bench_metric_graph(n_tickers=20, latency=0.05):
+    tickers = [f"T{i}" for i in range(n_tickers)]
+    metrics_list = list(PlotStockInfo.METRICS)
+    start, end = "2015-01-01", "2020-01-01"
+    derived = {'DailyReturn%': lambda history: PlotStockInfo.get_return_percent(history['Open'], history['Close']),
+               'WeekVolatility': lambda history: PlotStockInfo.get_week_volatility(history['Close']),
+               'MonthVolatility': lambda history: PlotStockInfo.get_month_volatility(history['Close'])}
+
+    def per_pair():
+        fetch = LatencyFetch(latency)
+        data = {}
+        for metric in metrics_list:
+            for tick in tickers:
+                history = fetch(tick, start, end, "1d")
+                data[metric, tick] = derived[metric](history) if metric in derived else history[metric]
+        return fetch.calls
+
+    calls, t_pairs = timed(per_pair)
+    fetch = LatencyFetch(latency)
+    _, t_graph = timed(PlotStockInfo.evaluate_metrics, metrics_list, tickers, start, end, fetch=fetch)
+    print(f"metric graph: {len(metrics_list)} metrics of {n_tickers} tickers, per pair {t_pairs:.2f}s with {calls} "
+          f"downloads, registry {t_graph:.2f}s with {fetch.calls} downloads")
+
+
+# weekly and monthly volatility of a panel: per-ticker loops vs block statistics over the whole panel, for fixed
+# 7-row blocks (strided view) and calendar weeks and months, timing std alone and every statistic at once
+# against pandas groupby (one call per statistic) on a panel with missing values
+def bench_block_stats(n_tickers=500, years=20, loop_sample=20):
+    close = SyntheticProvider(n_tickers=n_tickers, years=years).close_panel()
+    values = close.to_numpy()
+
+    _, t_loop = timed(lambda: [reference_block_std(values[:, k], 7) for k in range(loop_sample)])
+    _, t_stride = timed(BlockStats.stride_stats, values, 7)
+
+    gaps = close.mask(np.random.default_rng(0).random(close.shape) < 0.2)
+    stats = [stat for stat in BlockStats.STATS if stat != 'range']
+    times = {}
+    for freq in ('W', 'M'):
+        _, times[freq + ' std groupby'] = timed(lambda: gaps.groupby(gaps.index.to_period(freq)).std())
+        _, times[freq + ' std'] = timed(BlockStats.block_stats, gaps, freq=freq)
+
+        def grouped():
+            groups = gaps.groupby(gaps.index.to_period(freq))
+            return {stat: getattr(groups, stat)() for stat in stats}
+        _, times[freq + ' all groupby'] = timed(grouped)
+        _, times[freq + ' all'] = timed(BlockStats.block_stats, gaps, freq=freq, stats=stats)
+
+    print(f"block stats: std of {n_tickers} tickers over {len(close)} days, 7-row blocks: per-block loop "
+          f"{t_loop/loop_sample*n_tickers:.1f}s (extrapolated), strided {t_stride:.3f}s")
+    for freq, name in (('W', 'weeks'), ('M', 'months')):
+        print(f"  calendar {name} with 20% missing: std {times[freq + ' std']:.3f}s (pandas groupby "
+              f"{times[freq + ' std groupby']:.3f}s), all {len(stats)} statistics {times[freq + ' all']:.3f}s "
+              f"(groupby {times[freq + ' all groupby']:.3f}s)")
+
+
+# years of 1-minute bars on disk: ingesting, then one-day range queries against .loc on in-memory DataFrames
+def bench_bar_store(n_tickers=10, years=5, n_queries=2000):
+    provider = SyntheticProvider(n_tickers=n_tickers, years=years)
+    tickers = provider.tickers
+    frames = {tick: provider.history(tick, interval="1m")[['Open', 'High', 'Low', 'Close', 'Volume']]
+              for tick in tickers}
+    frame_bytes = sum(frame.memory_usage().sum() for frame in frames.values())
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = BarStore(directory)
+        _, t_ingest = timed(lambda: [store.ingest(tick, "1m", "2000-01-01", "2030-01-01",
+                                                  fetch=lambda *args: frames[args[0]]) for tick in tickers])
+        file_bytes = sum(os.path.getsize(store.path(tick, "1m")) for tick in tickers)
+
+        rng = np.random.default_rng(0)
+        days = pd.DatetimeIndex(frames[tickers[0]].index.normalize().unique())
+        queries = [(tickers[k], days[d], days[d] + pd.Timedelta(days=1))
+                   for k, d in zip(rng.integers(0, n_tickers, n_queries), rng.integers(0, len(days), n_queries))]
+        _, t_loc = timed(lambda: [frames[tick].loc[start:end - pd.Timedelta(1), 'Close'].to_numpy()
+                                  for tick, start, end in queries])
+        _, t_store = timed(lambda: [store.range(tick, "1m", start, end)['close'] for tick, start, end in queries])
+        del store
+    print(f"bar store: {n_tickers} tickers x {len(days)} days of 1-minute bars, {file_bytes/1e6:.0f}MB on disk vs "
+          f"{frame_bytes/1e6:.0f}MB of DataFrames, ingest {t_ingest:.2f}s, {n_queries} one-day ranges: "
+          f"DataFrame .loc {t_loc*1e6/n_queries:.0f}us, memory map {t_store*1e6/n_queries:.0f}us each")
+
+
+BENCHMARKS = {'panel': bench_panel, 'indicators': bench_indicators, 'stochastic': bench_stochastic,
+              'panel_indicators': bench_panel_indicators, 'frontier': bench_frontier, 'cla': bench_cla,
+              'monte_carlo': bench_monte_carlo, 'mean_reversion': bench_mean_reversion,
+              'sweep': bench_sweep, 'universe': bench_universe,
+              'walk_forward': bench_walk_forward, 'ledger': bench_ledger,
+              'price_panel': bench_price_panel, 'currency': bench_currency,
+              'baskets': bench_baskets, 'metrics': bench_metrics,
+              'render': bench_render, 'metric_graph': bench_metric_graph,
+              'block_stats': bench_block_stats, 'bar_store': bench_bar_store}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -0,0 +1,98 @@
+import warnings
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Statistics of blocks of bars: calendar periods (weeks, months, quarters, years, or the periods of a custom
+# exchange calendar) of a dated history, or fixed numbers of rows. Every column of a dates x tickers panel is
+# done at once. Calendar blocks are labelled by period and reduced with pandas groupby, whose grouped reductions
+# beat a numpy reduceat per statistic on these panels (see bench_block_stats in Benchmarks.py); fixed blocks
+# are reduced over a strided view of the rows. Missing values are left out of the blocks they fall in, and
+# first and last are the first and last values present.
+
+STATS = ['count', 'sum', 'mean', 'std', 'var', 'min', 'max', 'range', 'first', 'last']
+
+
+# period label of every row of a sorted date index: calendar periods of a pandas frequency ('W', 'M', 'Q', 'Y',
+# ...) or, given a calendar of period start dates, the periods between them
+def block_codes(index, freq='W', calendar=None):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:    # periods in the exchange's local time
+        index = index.tz_localize(None)
+    if not index.is_monotonic_increasing:
+        raise ValueError("block statistics need a sorted date index")
+    if calendar is not None:
+        return pd.DatetimeIndex(calendar).sort_values().searchsorted(index, side='right')
+    return index.to_period(freq).asi8
+
+
+# first row of each block of a sorted date index (see block_codes)
+def block_starts(index, freq='W', calendar=None):
+    codes = block_codes(index, freq, calendar)
+    return np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+
+# statistics of each calendar block of a Series or dates x tickers DataFrame (or an array with its date index).
+# returns {stat: Series or DataFrame indexed by the first date of each block}
+def block_stats(values, index=None, freq='W', stats=('std',), calendar=None, ddof=1):
+    columns = values.columns if isinstance(values, pd.DataFrame) else None
+    if index is None:
+        index = values.index
+    index = pd.DatetimeIndex(index)
+    unknown = set(stats) - set(STATS)
+    if unknown:
+        raise ValueError(f"unknown statistics {sorted(unknown)}, choose from {STATS}")
+    array = np.asarray(values, dtype=float)
+    codes = block_codes(index, freq, calendar) if len(index) else np.empty(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(index) else codes
+    # without copying, so each date's row stays contiguous, the layout pandas' grouped reductions are fastest on
+    groups = pd.DataFrame(array[:, None] if array.ndim == 1 else array, copy=False).groupby(codes)
+
+    reduced = {}
+    for stat in stats:
+        if stat == 'range':
+            block = groups.max() - groups.min()
+        elif stat in ('std', 'var'):
+            block = getattr(groups, stat)(ddof=ddof)
+        else:
+            block = getattr(groups, stat)()
+        reduced[stat] = block.to_numpy(dtype=float if stat != 'count' else np.int64)
+    if array.ndim == 1:
+        return {stat: pd.Series(block[:, 0], index=index[starts]) for stat, block in reduced.items()}
+    return {stat: pd.DataFrame(block, index=index[starts], columns=columns) for stat, block in reduced.items()}
+
+
+# statistics of consecutive blocks of a fixed number of rows (blocks x columns arrays, or blocks for 1-D input),
+# computed on a strided view of the rows so nothing is copied; rows after the last whole block are left out
+def stride_stats(values, block, stats=('std',), ddof=1):
+    values = np.asarray(values, dtype=float)
+    n_blocks = len(values)//block
+    windows = sliding_window_view(values[:n_blocks*block], block, axis=0)[::block]   # blocks x columns x block
+    result = {}
+    with warnings.catch_warnings():     # blocks without any values give NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for stat in stats:
+            if stat == 'count':
+                result[stat] = np.isfinite(windows).sum(axis=-1)
+            elif stat == 'sum':
+                result[stat] = np.nansum(windows, axis=-1)
+            elif stat == 'mean':
+                result[stat] = np.nanmean(windows, axis=-1)
+            elif stat == 'var':
+                result[stat] = np.nanvar(windows, axis=-1, ddof=ddof)
+            elif stat == 'std':
+                result[stat] = np.nanstd(windows, axis=-1, ddof=ddof)
+            elif stat == 'min':
+                result[stat] = np.nanmin(windows, axis=-1)
+            elif stat == 'max':
+                result[stat] = np.nanmax(windows, axis=-1)
+            elif stat == 'range':
+                result[stat] = np.nanmax(windows, axis=-1) - np.nanmin(windows, axis=-1)
+            elif stat in ('first', 'last'):
+                finite = np.isfinite(windows)
+                position = finite.argmax(axis=-1) if stat == 'first' else block - 1 - finite[..., ::-1].argmax(axis=-1)
+                value = np.take_along_axis(windows, position[..., None], axis=-1)[..., 0]
+                result[stat] = np.where(finite.any(axis=-1), value, np.nan)
+            else:
+                raise ValueError(f"unknown statistic {stat}, choose from {STATS}")
+    return result
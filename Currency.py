@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from StockGetFunctions import get_panel
+
+# Currency conversion for price panels. Each ticker has a quote currency and unit (e.g. JSE listings are quoted
+# in ZAR cents), FX histories are fetched once as rates per USD (Yahoo's "<currency>=X" series, which go through
+# the price cache) and kept in memory, and any pair is crossed through USD:
+#   price in base = price * unit * (base per USD)/(quote currency per USD)
+# A whole dates x tickers panel is converted with one broadcast multiplication.
+
+# quote currency and unit of tickers by exchange suffix (checked in order), and for tickers without a suffix
+SUFFIXES = [('.JO', 'ZAR', 0.01), ('.L', 'GBP', 0.01), ('.TO', 'CAD', 1.0), ('.AX', 'AUD', 1.0),
+            ('.DE', 'EUR', 1.0), ('.PA', 'EUR', 1.0), ('.AS', 'EUR', 1.0), ('.MI', 'EUR', 1.0),
+            ('.SW', 'CHF', 1.0), ('.T', 'JPY', 1.0), ('.HK', 'HKD', 1.0),
+            ('-USD', 'USD', 1.0), ('-EUR', 'EUR', 1.0), ('-GBP', 'GBP', 1.0)]
+DEFAULT_CURRENCY = ('USD', 1.0)
+
+# tickers whose currency the suffix rules get wrong, or that aren't listed (e.g. custom baskets)
+registry = {}
+
+
+# record the quote currency and unit of a ticker
+def register(ticker, currency, unit=1.0):
+    registry[ticker] = (currency, unit)
+
+
+# (quote currency, unit) of a ticker
+def ticker_currency(ticker):
+    if ticker in registry:
+        return registry[ticker]
+    for suffix, currency, unit in SUFFIXES:
+        if ticker.endswith(suffix):
+            return currency, unit
+    return DEFAULT_CURRENCY
+
+
+# FX histories as units of each currency per USD, fetched once per currency and date range
+class FXRates:
+
+    def __init__(self, fetch=None):
+        self.fetch = fetch      # passed on to get_panel (its default is the module's cached market data)
+        self.rates = {}         # rate series by currency, covering at least [start, end)
+        self.spans = {}         # (start, end) fetched for each currency
+
+    # forget the fetched rates, so they are fetched again (e.g. after the provider revised them)
+    def clear(self):
+        self.rates.clear()
+        self.spans.clear()
+
+    # dates x currencies DataFrame of rates per USD on the given dates (the last rate on or before each date)
+    def per_usd(self, currencies, dates):
+        dates = pd.DatetimeIndex(dates)
+        start, end = dates[0].normalize(), dates[-1].normalize() + pd.Timedelta(days=1)
+        missing = [currency for currency in set(currencies) - {'USD'}
+                   if currency not in self.spans or self.spans[currency][0] > start or self.spans[currency][1] < end]
+        if missing:
+            # a few days early so there is a rate to carry forward onto the first date
+            fetched = get_panel([f"{currency}=X" for currency in missing], "Close", start - pd.Timedelta(days=7),
+                                end, fetch=self.fetch)
+            for currency in missing:
+                self.rates[currency] = fetched[f"{currency}=X"].dropna()
+                self.spans[currency] = (start, end)
+
+        table = pd.DataFrame(index=dates)
+        for currency in currencies:
+            if currency == 'USD':
+                table[currency] = 1.0
+            else:
+                rate = self.rates[currency]
+                table[currency] = rate.reindex(rate.index.union(dates)).ffill().bfill().reindex(dates).to_numpy()
+        return table
+
+
+# shared FX rates, so each FX history is fetched once per session
+fx_rates = FXRates()
+
+
+# converts one price panel into any base currency. Conversion factors and converted panels are memoized per
+# base currency, so switching the reporting currency back and forth reuses earlier results.
+class PanelConverter:
+
+    def __init__(self, prices, dates, tickers, rates=None):
+        self.prices = np.asarray(prices, dtype=float)
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = list(tickers)
+        self.rates = fx_rates if rates is None else rates
+        quotes = [ticker_currency(ticker) for ticker in self.tickers]
+        self.units = np.array([unit for _, unit in quotes])
+        self.currencies = sorted({currency for currency, _ in quotes})
+        self.currency_index = np.array([self.currencies.index(currency) for currency, _ in quotes])
+        self.factors = {}
+        self.converted = {}
+
+    # dates x tickers factors that convert quoted prices into the base currency
+    def factor(self, base):
+        if base not in self.factors:
+            per_usd = self.rates.per_usd(self.currencies + [base], self.dates)
+            quote_per_usd = per_usd[self.currencies].to_numpy()
+            base_per_usd = per_usd[base].to_numpy()
+            self.factors[base] = self.units[None, :] * base_per_usd[:, None] / quote_per_usd[:, self.currency_index]
+        return self.factors[base]
+
+    # prices in the base currency (dates x tickers)
+    def convert(self, base):
+        if base not in self.converted:
+            self.converted[base] = self.prices * self.factor(base)
+        return self.converted[base]
@@ -0,0 +1,182 @@
+import os
+import zlib
+import numpy as np
+import pandas as pd
+from PriceCache import period_to_range, naive_index
+
+# Market data providers. Every provider returns OHLCV histories in the same layout as yfinance's
+# Ticker.history (DatetimeIndex; Open, High, Low, Close, Volume, Dividends, Stock Splits columns),
+# so StockGetFunctions can run against live data, a recorded replay store or a synthetic market.
+# Providers are callable as fetch(tick, start, end, interval) so they can back a PriceCache or get_panel.
+
+
+class DataProvider:
+    name = "provider"
+
+    # OHLCV history of a ticker between start (inclusive) and end (exclusive), or over a yfinance period
+    def history(self, tick, start=None, end=None, interval="1d", period=None):
+        if period is not None:
+            start, end = period_to_range(period)
+        return self.get_history(tick, pd.Timestamp(start if start is not None else "1900-01-01"),
+                                pd.Timestamp(end if end is not None else pd.Timestamp.today().normalize()
+                                             + pd.Timedelta(days=1)), interval)
+
+    # implemented by each provider: history between two timestamps
+    def get_history(self, tick, start, end, interval):
+        raise NotImplementedError
+
+    def __call__(self, tick, start, end, interval):
+        return self.history(tick, start, end, interval)
+
+
+# live data from Yahoo Finance
+class YahooProvider(DataProvider):
+    name = "yahoo"
+
+    def get_history(self, tick, start, end, interval):
+        import yfinance as yf
+        return yf.Ticker(tick).history(start=start.to_pydatetime(), end=end.to_pydatetime(), interval=interval)
+
+
+# replays histories recorded as <tick>_<interval>.csv or .parquet files in a directory
+class ReplayProvider(DataProvider):
+    name = "replay"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.frames = {}    # files already read, by (tick, interval)
+
+    def _path(self, tick, interval, extension):
+        return os.path.join(self.directory, f"{tick}_{interval}.{extension}")
+
+    def _read(self, tick, interval):
+        if (tick, interval) not in self.frames:
+            if os.path.exists(self._path(tick, interval, "parquet")):
+                frame = pd.read_parquet(self._path(tick, interval, "parquet"))
+            elif os.path.exists(self._path(tick, interval, "csv")):
+                frame = pd.read_csv(self._path(tick, interval, "csv"), index_col=0)
+                frame.index = self._read_index(frame.index, tick, interval)
+            else:
+                raise FileNotFoundError(f"no recorded history for {tick} ({interval}) in {self.directory}")
+            self.frames[(tick, interval)] = frame.sort_index()
+        return self.frames[(tick, interval)]
+
+    # timestamps of a CSV recording. CSV only keeps each timestamp's UTC offset, so the timezone is saved
+    # beside it (<tick>_<interval>.tz) and the timestamps are converted back to it: daily bars of an exchange
+    # with daylight saving then keep their local dates.
+    def _read_index(self, index, tick, interval):
+        if os.path.exists(self._path(tick, interval, "tz")):
+            with open(self._path(tick, interval, "tz")) as file:
+                return pd.to_datetime(index, format="ISO8601", utc=True).tz_convert(file.read().strip())
+        try:
+            return pd.to_datetime(index, format="ISO8601")
+        except ValueError:  # mixed utc offsets (e.g. across daylight saving) in a recording without its timezone
+            if interval[-1] in "dko":   # local dates for daily bars, as in align_index
+                return pd.to_datetime(index.str.replace(r"[+-]\d\d:?\d\d$", "", regex=True), format="ISO8601")
+            return pd.to_datetime(index, format="ISO8601", utc=True)
+
+    def get_history(self, tick, start, end, interval):
+        frame = self._read(tick, interval)
+        index = naive_index(frame.index)
+        return frame[(index >= start) & (index < end)]
+
+    # record a history (e.g. from YahooProvider) so it can be replayed offline
+    def save(self, tick, frame, interval="1d", file_format="csv"):
+        os.makedirs(self.directory, exist_ok=True)
+        if file_format == "parquet":
+            frame.to_parquet(self._path(tick, interval, "parquet"))
+        else:
+            frame.to_csv(self._path(tick, interval, "csv"))
+            timezone = getattr(frame.index, "tz", None)
+            if timezone is not None:
+                with open(self._path(tick, interval, "tz"), "w") as file:
+                    file.write(str(timezone))
+            elif os.path.exists(self._path(tick, interval, "tz")):
+                os.remove(self._path(tick, interval, "tz"))
+        self.frames.pop((tick, interval), None)
+
+
+# seeded synthetic market: geometric Brownian motion with Poisson jumps. Each ticker's path depends only on
+# (seed, ticker), and is generated over a fixed calendar starting at `origin`, so any date range of any
+# ticker is reproducible and consistent between requests.
+class SyntheticProvider(DataProvider):
+    name = "synthetic"
+
+    # bar frequency and bars per year for each supported interval
+    FREQUENCIES = {'1m': ('min', 252*390), '5m': ('5min', 252*78), '15m': ('15min', 252*26),
+                   '1h': ('h', 252*7), '1d': ('B', 252), '1wk': ('W-FRI', 52), '1mo': ('BME', 12)}
+
+    def __init__(self, n_tickers=100, years=20, seed=0, origin="2000-01-03", drift=0.07, volatility=0.25,
+                 jump_rate=2.0, jump_mean=-0.02, jump_std=0.06, start_price=100.0):
+        self.n_tickers = n_tickers
+        self.years = years
+        self.seed = seed
+        self.origin = pd.Timestamp(origin)
+        self.drift = drift              # annual drift
+        self.volatility = volatility    # annual volatility
+        self.jump_rate = jump_rate      # expected jumps per year
+        self.jump_mean = jump_mean      # mean log jump size
+        self.jump_std = jump_std        # std of log jump size
+        self.start_price = start_price
+
+    @property
+    def tickers(self):
+        return [f"SYN{i:05d}" for i in range(self.n_tickers)]
+
+    def _rng(self, tick):
+        return np.random.default_rng([self.seed, zlib.crc32(tick.encode())])
+
+    def _dates(self, interval):
+        freq, bars_per_year = self.FREQUENCIES[interval]
+        end = self.origin + pd.DateOffset(years=self.years)
+        if freq in ('min', '5min', '15min', 'h'):   # intraday bars during a 09:30-16:00 session
+            days = pd.bdate_range(self.origin, end, inclusive='left')
+            offsets = pd.timedelta_range("9h30min", "15h59min", freq=freq)
+            return pd.DatetimeIndex((days.values[:, None] + offsets.values[None, :]).ravel())
+        return pd.date_range(self.origin, end, freq=freq, inclusive='left')
+
+    # log returns of a GBM with Poisson jumps for n bars
+    def _log_returns(self, rng, n, bars_per_year):
+        dt = 1.0/bars_per_year
+        diffusion = (self.drift - 0.5*self.volatility**2)*dt + self.volatility*np.sqrt(dt)*rng.standard_normal(n)
+        n_jumps = rng.poisson(self.jump_rate*dt, n)
+        jumps = n_jumps*self.jump_mean + np.sqrt(n_jumps)*self.jump_std*rng.standard_normal(n)
+        return diffusion + jumps
+
+    # full OHLCV history of a ticker over the provider's calendar (regenerated on request, which is cheaper
+    # than holding thousands of long histories in memory)
+    def _generate(self, tick, interval):
+        rng = self._rng(tick)
+        dates = self._dates(interval)
+        n = len(dates)
+        bars_per_year = self.FREQUENCIES[interval][1]
+        close = self.start_price*np.exp(np.cumsum(self._log_returns(rng, n, bars_per_year)))
+        bar_vol = self.volatility/np.sqrt(bars_per_year)
+        open_ = np.empty(n)
+        open_[0] = self.start_price
+        open_[1:] = close[:-1]*np.exp(0.25*bar_vol*rng.standard_normal(n - 1))
+        high = np.maximum(open_, close)*np.exp(0.5*bar_vol*np.abs(rng.standard_normal(n)))
+        low = np.minimum(open_, close)*np.exp(-0.5*bar_vol*np.abs(rng.standard_normal(n)))
+        volume = rng.lognormal(13, 0.5, n).astype(np.int64)
+        return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume,
+                             'Dividends': 0.0, 'Stock Splits': 0.0}, index=dates)
+
+    def get_history(self, tick, start, end, interval):
+        frame = self._generate(tick, interval)
+        return frame[(frame.index >= start) & (frame.index < end)]
+
+    # close prices of many tickers as one dates x tickers DataFrame, without building OHLCV frames per ticker
+    def close_panel(self, tickers=None, start=None, end=None, interval="1d"):
+        tickers = self.tickers if tickers is None else tickers
+        dates = self._dates(interval)
+        bars_per_year = self.FREQUENCIES[interval][1]
+        close = np.empty((len(dates), len(tickers)))
+        for j, tick in enumerate(tickers):
+            close[:, j] = self.start_price*np.exp(np.cumsum(self._log_returns(self._rng(tick), len(dates),
+                                                                              bars_per_year)))
+        mask = np.ones(len(dates), dtype=bool)
+        if start is not None:
+            mask &= dates >= pd.Timestamp(start)
+        if end is not None:
+            mask &= dates < pd.Timestamp(end)
+        return pd.DataFrame(close[mask], index=dates[mask], columns=tickers)
@@ -0,0 +1,75 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Transaction ledger for Portfolio Info.py. Trades are records of (date, ticker, action, shares) in a CSV file
+# with those columns or a JSON list of objects with those keys. Actions are "buy" and "sell", and "drip" for
+# dividends reinvested into shares (which add shares but no new capital).
+# The ledger is held as one date-sorted event array, and holdings and capital invested over a date index are
+# built with a scatter-add of the events onto their days followed by a cumulative sum, in O(events + days).
+
+EVENT_DTYPE = np.dtype([('date', 'M8[D]'), ('ticker', object), ('shares', 'f8'), ('capital', 'bool')])
+
+# sign of the share change and whether capital changes hands, per action
+ACTIONS = {'buy': (1.0, True), 'sell': (-1.0, True), 'drip': (1.0, False)}
+
+
+# event array of the records in a CSV or JSON ledger file, sorted by date
+def read_ledger(path):
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path) as file:
+            records = pd.DataFrame(json.load(file))
+    else:
+        records = pd.read_csv(path, skipinitialspace=True)
+    return ledger_events(records['date'], records['ticker'], records['action'], records['shares'])
+
+
+# event array from columns of dates, tickers, actions and (unsigned) share counts
+def ledger_events(dates, tickers, actions, shares):
+    # string clean-up and lookups are done once per distinct action and ticker
+    action_codes, action_names = pd.factorize(np.asarray(actions))
+    action_names = [str(action).strip().lower() for action in action_names]
+    unknown = set(action_names) - set(ACTIONS)
+    if unknown:
+        raise ValueError(f"unknown ledger actions: {sorted(unknown)}")
+    sign = np.array([ACTIONS[action][0] for action in action_names])[action_codes]
+    capital = np.array([ACTIONS[action][1] for action in action_names], dtype=bool)[action_codes]
+    ticker_codes, ticker_names = pd.factorize(np.asarray(tickers))
+    ticker_names = np.array([str(tick).strip() for tick in ticker_names], dtype=object)
+
+    events = np.empty(len(action_codes), dtype=EVENT_DTYPE)
+    events['date'] = np.asarray(pd.to_datetime(dates), dtype='M8[D]')
+    events['ticker'] = ticker_names[ticker_codes]
+    events['shares'] = sign*np.asarray(shares, dtype=float)
+    events['capital'] = capital
+    return events[np.argsort(events['date'], kind='stable')]
+
+
+# shares held and cumulative capital invested on every day of a date index, for the given tickers.
+# prices is a days x tickers matrix of prices in the currency capital is counted in; a trade is valued at its
+# ticker's price on the day it takes effect, which is its date or the next day in the index. Trades after the
+# last day are ignored, and trades before the first day take effect on it.
+# returns (days x tickers holdings, capital invested per day)
+def ledger_positions(events, dates, tickers, prices):
+    prices = np.asarray(prices, dtype=float)
+    n_days, n_tickers = prices.shape
+    columns = {ticker: k for k, ticker in enumerate(tickers)}
+    day = np.searchsorted(np.asarray(dates, dtype='M8[D]'), events['date'])
+    events = events[day < n_days]
+    day = day[day < n_days]
+    ticker_index, names = pd.factorize(events['ticker'])
+    missing = set(names) - set(columns)
+    if missing:
+        raise KeyError(f"ledger tickers not in the portfolio: {sorted(missing)}")
+    column = np.array([columns[name] for name in names], dtype=np.int64)[ticker_index]
+
+    # scatter-add the share changes onto (day, ticker) cells, then accumulate over days
+    holdings = np.bincount(day*n_tickers + column, weights=events['shares'],
+                           minlength=n_days*n_tickers).reshape(n_days, n_tickers)
+    np.cumsum(holdings, axis=0, out=holdings)
+    # capital invested (or withdrawn by sales) at the price on the day of each trade
+    value = np.where(events['capital'], events['shares']*prices[day, column], 0.0)
+    capital = np.cumsum(np.bincount(day, weights=value, minlength=n_days))
+
+    return holdings, capital
@@ -0,0 +1,150 @@
+from collections import deque
+import math
+
+# Online versions of the TopStockInfo indicators for tick-by-tick use (live feeds or replays).
+# Each object takes one new price at a time through update(price), which returns the current value in O(1)
+# amortized time. Values follow the batch functions exactly: after the price at index i is given, `value`
+# equals the batch indicator at index i (NaN during the warm-up), so both use only prices before the latest.
+
+nan = float('nan')
+
+
+# moving average of the MA_interval prices before the latest one (see simple_moving_average)
+class RunningSMA:
+
+    def __init__(self, MA_interval):
+        self.MA_interval = MA_interval
+        self.window = deque()
+        self.total = 0.0
+        self.updates = 0
+        self.value = nan
+
+    def update(self, price):
+        k = self.MA_interval
+        self.value = self.total/k if len(self.window) == k else nan
+
+        self.window.append(price)
+        self.total += price
+        if len(self.window) > k:
+            self.total -= self.window.popleft()
+        self.updates += 1
+        if self.updates % k == 0:   # re-sum the window now and then so rounding errors can't build up
+            self.total = math.fsum(self.window)
+
+        return self.value
+
+
+# exponential moving average seeded with the SMA (see exp_moving_average)
+class RunningEMA:
+
+    def __init__(self, MA_interval, smoothing_factor=2):
+        self.MA_interval = MA_interval
+        self.f = smoothing_factor/(1 + MA_interval)     # pre-calculated EMA factor
+        self.sma = RunningSMA(MA_interval)              # gives the start value
+        self.count = 0
+        self.value = nan
+
+    def update(self, price):
+        if self.count < self.MA_interval:
+            self.sma.update(price)
+        elif self.count == self.MA_interval:
+            self.value = self.sma.update(price)             # start value
+            self.sma = None
+        else:
+            self.value = price*self.f + self.value*(1 - self.f)
+        self.count += 1
+
+        return self.value
+
+
+# moving average convergence/divergence (see MA_converge_diverge)
+class RunningMACD:
+
+    def __init__(self):
+        self.ema12 = RunningEMA(12, 2)
+        self.ema26 = RunningEMA(26, 2)
+        self.value = nan
+
+    def update(self, price):
+        self.value = self.ema12.update(price) - self.ema26.update(price)
+
+        return self.value
+
+
+# stochastic oscillator over the `window` periods before the latest one (see stochastic_oscillator).
+# the window's high and low are kept in monotonic deques of (index, price).
+class RunningStochastic:
+
+    def __init__(self, window=14):
+        self.window = window
+        self.highs = deque()    # decreasing highs: the front is the window high
+        self.lows = deque()     # increasing lows: the front is the window low
+        self.last_price = nan
+        self.count = 0
+        self.value = nan
+
+    # high and low default to the price, for close-only feeds
+    def update(self, price, high=None, low=None):
+        high = price if high is None else high
+        low = price if low is None else low
+        if self.count >= self.window:
+            C = self.last_price             # latest close
+            L = self.lows[0][1]             # window low
+            H = self.highs[0][1]            # window high
+            self.value = (C - L)/(H - L)*100 if H > L else 50.0
+
+        i = self.count
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((i, high))
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((i, low))
+        # drop periods that will be outside the window at the next update
+        while self.highs[0][0] <= i - self.window:
+            self.highs.popleft()
+        while self.lows[0][0] <= i - self.window:
+            self.lows.popleft()
+
+        self.last_price = price
+        self.count += 1
+
+        return self.value
+
+
+# sample standard deviation of the MA_interval prices before the latest one (see moving_volatility),
+# kept with a sliding-window Welford update of the window mean and sum of squared deviations
+class RunningVolatility:
+
+    def __init__(self, MA_interval):
+        self.MA_interval = MA_interval
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+        self.value = nan
+
+    def update(self, price):
+        k = self.MA_interval
+        if len(self.window) == k and k > 1:
+            self.value = math.sqrt(max(self.m2, 0.0)/(k - 1))
+        else:
+            self.value = nan
+
+        self.window.append(price)
+        n = len(self.window)
+        if n <= k:      # window still filling: standard Welford step
+            delta = price - self.mean
+            self.mean += delta/n
+            self.m2 += delta*(price - self.mean)
+        else:           # replace the oldest price with the new one
+            old = self.window.popleft()
+            old_mean = self.mean
+            self.mean += (price - old)/k
+            self.m2 += (price - old)*(price - self.mean + old - old_mean)
+        self.updates += 1
+        if self.updates % k == 0:   # recompute exactly now and then so rounding errors can't build up
+            self.mean = math.fsum(self.window)/len(self.window)
+            self.m2 = math.fsum((x - self.mean)**2 for x in self.window)
+
+        return self.value
@@ -0,0 +1,11 @@
+# Registry of the metrics PlotStockInfo can plot: name -> (names of the metrics or intermediates it is computed
+# from, function of their values). "history" is a ticker's OHLCV DataFrame; everything else is computed from it.
+# It is a module of its own so plugins can register metrics with "from MetricRegistry import register_metric"
+# and reach the same registry when PlotStockInfo runs as a script (as __main__ rather than PlotStockInfo).
+
+METRICS = {}
+
+
+# add a metric (or an intermediate other metrics use), e.g. from a plugin module
+def register_metric(name, inputs, function):
+    METRICS[name] = (tuple(inputs), function)
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Performance and risk metrics of many equity curves at once, e.g. every configuration of a parameter sweep.
+# Curves are the columns of a dates x curves array (or DataFrame) of portfolio values; a single curve can be
+# 1-D. Each metric is computed for all the curves together with whole-array operations.
+# Returns, volatility and drawdowns are fractions (0.1 is 10%), annualised with periods_per_year, and
+# risk_free is an annual rate. Drawdown durations are in periods.
+
+PERIODS_PER_YEAR = 252
+METRICS = ['cagr', 'volatility', 'sharpe', 'sortino', 'max_drawdown', 'drawdown_duration', 'calmar']
+
+
+def _curves(equity):
+    equity = np.asarray(equity, dtype=float)
+    return equity[:, None] if equity.ndim == 1 else equity
+
+
+# returns of each period (dates - 1 x curves)
+def period_returns(equity):
+    equity = _curves(equity)
+    return equity[1:]/equity[:-1] - 1
+
+
+# compound annual growth rate
+def cagr(equity, periods_per_year=PERIODS_PER_YEAR):
+    equity = _curves(equity)
+    return (equity[-1]/equity[0])**(periods_per_year/(len(equity) - 1)) - 1
+
+
+# annualised standard deviation of returns
+def volatility(equity, periods_per_year=PERIODS_PER_YEAR):
+    return period_returns(equity).std(axis=0, ddof=1)*np.sqrt(periods_per_year)
+
+
+def sharpe(equity, risk_free=0.0, periods_per_year=PERIODS_PER_YEAR):
+    excess = period_returns(equity) - risk_free/periods_per_year
+    return excess.mean(axis=0)/excess.std(axis=0, ddof=1)*np.sqrt(periods_per_year)
+
+
+# like the Sharpe ratio, but only counting returns below the risk-free rate as risk
+def sortino(equity, risk_free=0.0, periods_per_year=PERIODS_PER_YEAR):
+    excess = period_returns(equity) - risk_free/periods_per_year
+    downside = np.sqrt((np.minimum(excess, 0)**2).mean(axis=0))
+    return excess.mean(axis=0)/downside*np.sqrt(periods_per_year)
+
+
+# fall from the highest value so far, on every date (dates x curves)
+def drawdowns(equity):
+    equity = _curves(equity)
+    return 1 - equity/np.maximum.accumulate(equity, axis=0)
+
+
+def max_drawdown(equity):
+    return drawdowns(equity).max(axis=0)
+
+
+# longest time (in periods) spent below an earlier peak
+def drawdown_duration(equity):
+    equity = _curves(equity)
+    period = np.arange(len(equity))[:, None]
+    at_peak = equity >= np.maximum.accumulate(equity, axis=0)
+    return (period - np.maximum.accumulate(np.where(at_peak, period, 0), axis=0)).max(axis=0)
+
+
+# CAGR over maximum drawdown
+def calmar(equity, periods_per_year=PERIODS_PER_YEAR):
+    with np.errstate(divide='ignore'):
+        return cagr(equity, periods_per_year)/max_drawdown(equity)
+
+
+# value traded over mean portfolio value, from dates x curves traded values
+def turnover(traded, equity):
+    return _curves(traded).sum(axis=0)/_curves(equity).mean(axis=0)
+
+
+# all the metrics of each curve (a row per curve), computed chunk_size curves at a time so the intermediate
+# arrays stay small. traded adds turnover.
+def metrics(equity, traded=None, risk_free=0.0, periods_per_year=PERIODS_PER_YEAR, chunk_size=10000):
+    names = equity.columns if isinstance(equity, pd.DataFrame) else None
+    equity = _curves(equity)
+    n_curves = equity.shape[1]
+    table = np.empty((n_curves, len(METRICS) + (traded is not None)))
+
+    for a in range(0, n_curves, chunk_size):
+        curves = equity[:, a:a + chunk_size]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns = [cagr(curves, periods_per_year), volatility(curves, periods_per_year),
+                       sharpe(curves, risk_free, periods_per_year), sortino(curves, risk_free, periods_per_year),
+                       max_drawdown(curves), drawdown_duration(curves), calmar(curves, periods_per_year)]
+        if traded is not None:
+            columns.append(turnover(_curves(traded)[:, a:a + chunk_size], curves))
+        table[a:a + chunk_size] = np.column_stack(columns)
+
+    return pd.DataFrame(table, index=names, columns=METRICS + ['turnover']*(traded is not None))
+
+
+# sum over the last window rows of every row (NaN for the first window - 1 rows, so all of them when there
+# are fewer than window rows)
+def _rolling_sum(values, window):
+    total = np.full(values.shape, np.nan)
+    if window > len(values):
+        return total
+    cumulative = np.cumsum(values, axis=0)
+    total[window - 1] = cumulative[window - 1]
+    total[window:] = cumulative[window:] - cumulative[:-window]
+    return total
+
+
+# the metrics over the trailing window periods at every date (a dates x curves array per metric, NaN until
+# there are window periods of history). traded adds turnover.
+def rolling_metrics(equity, window, traded=None, risk_free=0.0, periods_per_year=PERIODS_PER_YEAR,
+                    max_elements=2*10**7):
+    equity = _curves(equity)
+    n_periods, n_curves = equity.shape
+    nan_row = np.full((1, n_curves), np.nan)
+
+    # return statistics from running sums over the returns ending on each date
+    excess = equity[1:]/equity[:-1] - 1 - risk_free/periods_per_year
+    total = np.vstack((nan_row, _rolling_sum(excess, window)))
+    squares = np.vstack((nan_row, _rolling_sum(excess**2, window)))
+    downside = np.vstack((nan_row, _rolling_sum(np.minimum(excess, 0)**2, window)))
+    mean = total/window
+    std = np.sqrt(np.maximum(squares - total*mean, 0)/(window - 1))
+    growth = np.full(equity.shape, np.nan)
+    growth[window:] = (equity[window:]/equity[:-window])**(periods_per_year/window) - 1
+
+    # drawdowns within each window, over blocks of dates small enough to hold every window of the block
+    drawdown = np.full(equity.shape, np.nan)
+    duration = np.full(equity.shape, np.nan)
+    block = max(1, max_elements//(n_curves*(window + 1)))
+    period = np.arange(window + 1)
+    for a in range(window, n_periods, block):
+        b = min(a + block, n_periods)
+        windows = sliding_window_view(equity[a - window:b], window + 1, axis=0)   # dates x curves x window
+        peak = np.maximum.accumulate(windows, axis=-1)
+        drawdown[a:b] = (1 - windows/peak).max(axis=-1)
+        duration[a:b] = (period - np.maximum.accumulate(np.where(windows >= peak, period, 0), axis=-1)).max(axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rolling = {'cagr': growth, 'volatility': std*np.sqrt(periods_per_year),
+                   'sharpe': mean/std*np.sqrt(periods_per_year),
+                   'sortino': mean/np.sqrt(downside/window)*np.sqrt(periods_per_year),
+                   'max_drawdown': drawdown, 'drawdown_duration': duration, 'calmar': growth/drawdown}
+    if traded is not None:
+        traded_sum = _rolling_sum(_curves(traded), window)
+        rolling['turnover'] = traded_sum/(_rolling_sum(equity, window)/window)
+        rolling['turnover'][:window] = np.nan     # like the other metrics, NaN until window periods have passed
+    return rolling
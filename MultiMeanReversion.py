@@ -1,5 +1,10 @@
 from StockGetFunctions import get_attr_history
+from StockGetFunctions import get_panel
+from LiveIndicators import RunningSMA
+from TopStockInfo import simple_moving_average
+from Metrics import metrics
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 
 # ====== set global variables ======
@@ -7,196 +12,163 @@ start = "2012-01-01"    # start date in "YYYY-MM-DD"
 end = "2017-01-01"      # end date in "YYYY-MM-DD"
 interval = "1d"         # sampling period for stock prices (see yfinance intervals)
 ticker_list = ["VOO", "^FTSE", "VWO"]       # choose tickers to trade
-SNP = get_attr_history("VOO", "Close", start, end, interval)    # get S&P500 series for benchmarking
 ma_long_interval = 10   # interval to calculate long-term moving average
 ma_short_interval = 5  # interval to calculate short-term moving average
 
-series_list = {}    # initialise dictionary of ticker price series
-ma_list = {}
 cash = 10000.0
 trade_factor = 0.05  # factor to modify trade amount
-# initialise lists to store history of portfolio data
-cash_history = []
-holdings_history = []
-portfolio_history = []
 # ==================================
 
 
 # function to get ma over an entire time series for a given series
 def ma_series(series, ma_period):
     ma = np.zeros(len(series))
+    sma = RunningSMA(ma_period)     # mean of the ma_period prices before each day
     for i in range(len(series)):
+        value = sma.update(series[i])
         if i > ma_period:
-            ma[i] = series[i - ma_period : i].mean()
+            ma[i] = value
 
     return ma
 
 
-# populate series and MA lists
-for ticker in ticker_list:
-    series_list[ticker] = get_attr_history(ticker, "Close", start, end, interval).to_numpy()
-    ma_list[ticker] = [ma_series(series_list[ticker], ma_long_interval),
-                       ma_series(series_list[ticker], ma_short_interval)]
-
-
-# class to define Stock objects for keeping price and moving averages, etc.
-class Stock:
-
-    # initialise stock info
-    def __init__(self, ticker):
-        self.ticker = ticker
-        self.price = 0.0
-        self.ma_long = 0.0
-        self.ma_short = 0.0
-        self.undervalued = False
-        self.ma_deviation = 0.0
-        self.position = 0.0
-        self.trade_amt = 0.0
-        self.price_yesterday = 0.0
-
-    # update stock ticker info on a given day
-    def get_info(self):
-        # update price and position
-        self.price = prices_today[self.ticker]
-        if self.price_yesterday == 0.0:
-            pass
-        else:
-            self.position *= self.price/self.price_yesterday    # change position according to price change
-        self.price_yesterday = self.price   # move "yesterday's" price one day forward
-        # update MA values
-        self.ma_long = ma_today[self.ticker][0]
-        self.ma_short = ma_today[self.ticker][1]
-        # check if stock is undervalued or not
-        if self.ma_long > self.ma_short:
-            self.undervalued = True
-        else:
-            self.undervalued = False
-        # get deviation of short ma from long ma (based on square distance)
-        if self.ma_long == 0:
-            self.ma_deviation = 0.0
-        else:
-            self.ma_deviation = abs(self.ma_short - self.ma_long) / self.ma_long
-        # define an amount to trade based on the ma deviation
-        self.trade_amt = self.position * self.ma_deviation
-
-    def trade(self):
-        if self.undervalued:    # if stock is undervalued, buy more
-            self.position += self.trade_amt
-        elif not self.undervalued:  # else, sell
-            # sell amt of stock, or whole position if amt > position
-            self.position = max(self.position - self.trade_amt, 0.0)
-
-
-# function to buy and sell stocks on a given day
-def trade(stocks_info, cash):
-    total_dev = 0.0     # variable to store sum of stock deviations for undervalued stocks
-    #print("===New trade===")
-    # deal with overvalued stocks (selling) first
-    for ticker in stocks_info:      # loop through all stocks
-        Stock = stocks_info[ticker]
-
-        if not Stock.undervalued:   # if stock is overvalued, sell amt (or whole position if amt > position)
-            #print(f"==Sell overval stock: {ticker}")
-            #print(f"Cash before trade: {cash}\nPosition before trade:{Stock.position}\nTrade amt: {Stock.trade_amt}")
-            Stock.trade()
-            cash += min(Stock.position, Stock.trade_amt)
-            #print(f"Cash after trade: {cash}\nPosition after trade: {Stock.position}")
-        elif Stock.undervalued:     # count deviation for undervalued stocks
-            total_dev += Stock.ma_deviation
-
-    buy_amt = cash * trade_factor       # set aside cash to buy
-
-    # deal with buying undervalued stocks
-    for ticker in ticker_list:      # loop through all stocks (again)
-        Stock = stocks_info[ticker]
-
-        if Stock.undervalued:   # for undervalued stocks, buy proportionally to MA deviation
-            #print("==Buy underval stock:", Stock.ticker)
-            Stock.trade_amt = buy_amt * Stock.ma_deviation / total_dev      # set proportional trade amt
-            #print(f"Cash before trade: {cash}\nPosition before trade:{Stock.position}\nMA deviation: {Stock.ma_deviation}\nTrade amt: {Stock.trade_amt}")
-            Stock.trade()       # buy amt of stock
-            cash -= Stock.trade_amt     # reflect purchase in cash reserves
-            #print(f"Cash after trade: {cash}\nPosition after trade: {Stock.position}")
-
-    return cash
-
-
-
-# initialise stock objects from ticker list
-stocks_info = {}
-for ticker in ticker_list:
-    stocks_info[ticker] = Stock(ticker)
-
-
-# simulate real-time prices
-for i in range(len(SNP)):
-    #print(f"++++ Day {i} ++++")
-    if i < ma_long_interval:    # don't trade until MA can be calculated
-        pass
-    else:
-
-        # get today's price for each stock in ticker list
-        prices_today = {}    # init prices list dictionary
-        ma_today = {}        # init moving average list dictionary
-        for ticker in ticker_list:
-            while True:
-                try:
-                    prices_today[ticker] = series_list[ticker][i]    # for each ticker, set the prices list element to today's price
-                    ma_today[ticker] = [ma_list[ticker][0][i], ma_list[ticker][1][i]]     # likewise for moving averages
-                    stocks_info[ticker].get_info()      # get stock info for today
-                    break
-                except IndexError:
-                    print(f"{ticker} has the wrong number of periods")
-                    break
-        # perform trading algorithm (sell overvalued stocks then use portion of cash to buy undervalued stocks)
-        cash = trade(stocks_info, cash)
-
-    # sum stock positions to get total holdings for the day
-    holdings_total = 0.0
+# ====== universe engine ======
+# The strategy runs over a whole universe at once: prices, positions, MA deviations and the undervalued flags
+# are arrays over all tickers (and over a batch of configurations, the leading dimension of every state
+# array, for ParameterSweep.py), and each day's sell pass and proportional buy allocation are array operations.
+
+
+# ma_series for every column of a days x tickers price matrix. Columns may start at different dates (NaN before
+# listing), in which case the MA is 0 until ma_period + 1 days after each column's first price.
+def ma_panel(prices, ma_period):
+    prices = np.asarray(prices, dtype=float)
+    ma = np.nan_to_num(simple_moving_average(prices, ma_period))
+    listed = ~np.isnan(prices)
+    first = np.where(listed.any(axis=0), listed.argmax(axis=0), len(prices))
+    ma[np.arange(len(prices))[:, None] <= (first + ma_period)[None, :]] = 0.0
+
+    return ma
+
+
+# simulate the strategy over a days x tickers price matrix for a batch of configurations.
+# ma_long and ma_short are the ma_panel arrays (days x tickers, or configurations x days x tickers when they
+# differ between configurations), and trade_factor is a scalar or one per configuration. With long_index and
+# short_index, ma_long and ma_short are stacks of ma_panel arrays (windows x days x tickers, possibly the same
+# stack or a memory-mapped file) and configuration j uses ma_long[long_index[j]] and ma_short[short_index[j]];
+# only each day's rows are gathered, so the stacks are never copied per configuration. Every day positions
+# follow the price change, overvalued stocks (short MA >= long MA) are sold down by their MA deviation, and a
+# trade_factor share of cash is spread over undervalued stocks in proportion to their deviation. A sale credits
+# cash with the smaller of the remaining position and the amount sold, as the original per-Stock loop did.
+# Tickers without a price on a day (not listed yet, delisted or a gap) keep their last value and aren't traded.
+# returns (cash history, holdings history, traded value history), each days x configurations.
+def mean_reversion_backtest(prices, ma_long, ma_short, trade_factor, cash=10000.0, long_index=None,
+                            short_index=None):
+
+    prices = np.asarray(prices, dtype=float)
+    ma_long = ma_long.reshape((-1,) + prices.shape)
+    ma_short = ma_short.reshape((-1,) + prices.shape)
+    long_index = np.arange(len(ma_long)) if long_index is None else np.atleast_1d(long_index)
+    short_index = np.arange(len(ma_short)) if short_index is None else np.atleast_1d(short_index)
+    trade_factor = np.atleast_1d(np.asarray(trade_factor, dtype=float))
+    n_configs = max(len(long_index), len(short_index), len(trade_factor))
+    n_days, n_tickers = prices.shape
+
+    # daily price changes, with no change while a ticker has no price
+    priced = ~np.isnan(prices)
+    filled = pd.DataFrame(prices).ffill().to_numpy()
+    growth = np.ones((n_days, n_tickers))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth[1:] = filled[1:]/filled[:-1]
+    growth[~np.isfinite(growth)] = 1.0
+
+    cash = np.full(n_configs, cash, dtype=float)
+    position = np.zeros((n_configs, n_tickers))
+    cash_history = np.empty((n_days, n_configs))
+    holdings_history = np.empty((n_days, n_configs))
+    traded_history = np.empty((n_days, n_configs))
+    # nothing is traded before the long MA exists: both MAs are 0 and positions stay empty until then
+    for i in range(n_days):
+        position *= growth[i]       # change position according to price change
+        ma_l = ma_long[long_index, i]
+        ma_s = ma_short[short_index, i]
+        undervalued = (ma_l > ma_s) & priced[i]
+        overvalued = ~(ma_l > ma_s) & priced[i]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ma_deviation = np.where(ma_l == 0, 0.0, np.abs(ma_s - ma_l)/ma_l)
+
+        # sell overvalued stocks (the whole position if the amount is larger)
+        trade_amt = position*ma_deviation
+        sold_position = np.where(overvalued, np.maximum(position - trade_amt, 0.0), position)
+        cash += np.where(overvalued, np.minimum(sold_position, trade_amt), 0.0).sum(axis=1)
+        sold = (position - sold_position).sum(axis=1)
+        position = sold_position
+
+        # buy undervalued stocks in proportion to MA deviation
+        buy_deviation = np.where(undervalued, ma_deviation, 0.0)
+        total_dev = buy_deviation.sum(axis=1, keepdims=True)
+        buy_amt = (cash*trade_factor)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            trade_amt = np.where(undervalued, buy_amt*buy_deviation/total_dev, 0.0)
+        position += trade_amt
+        bought = trade_amt.sum(axis=1)
+        cash -= bought
+
+        cash_history[i] = cash
+        holdings_history[i] = position.sum(axis=1)
+        traded_history[i] = sold + bought
+
+    return cash_history, holdings_history, traded_history
+
+
+if __name__ == "__main__":
+    # get S&P500 series for benchmarking
+    SNP = get_attr_history("VOO", "Close", start, end, interval)
+
+    # prices of every ticker on a common calendar (NaN on days a ticker didn't trade), and their MAs
+    prices = get_panel(ticker_list, "Close", start, end, interval)
+    ma_long = ma_panel(prices, ma_long_interval)
+    ma_short = ma_panel(prices, ma_short_interval)
+
+    # simulate real-time prices: each day, sell overvalued stocks then use a portion of cash to buy undervalued ones
+    cash_history, holdings_history, traded_history = mean_reversion_backtest(prices, ma_long, ma_short,
+                                                                              trade_factor, cash)
+    cash_history, holdings_history = cash_history[:, 0], holdings_history[:, 0]
+    portfolio_history = cash_history + holdings_history
+
+    # === plot results with matplotlib.pyplot ===
+    # replace all zero MAs with NaN for prettier graphs
+    ma_long[ma_long == 0] = np.nan
+    ma_short[ma_short == 0] = np.nan
+
+    # plot stock data
+    fig, a = plt.subplots(len(ticker_list))
+    for i, ticker in enumerate(ticker_list):
+        a[i].plot(prices[ticker].to_numpy(), "k")
+        a[i].plot(ma_long[:, i], "b")
+        a[i].plot(ma_short[:, i], "r")
+        a[i].set_title(ticker)
+
+    # print results summary
+    print(f"Trading results from {start} to {end}:\n_________________________________")
+    portfolio_returns = round(portfolio_history[-1] / portfolio_history[0] * 100, 2)
+    print(f"Portfolio returns: {portfolio_returns}%")
+    print(metrics(portfolio_history, traded_history).round(3).to_string(index=False))
+    print("_________________________________")
+    market_returns_sum = 0.0
     for ticker in ticker_list:
-        Stock = stocks_info[ticker]
-        holdings_total += Stock.position
-
-    # append histories
-    cash_history.append(cash)
-    holdings_history.append(holdings_total)
-    portfolio_history.append(cash + holdings_total)
-
-# === plot results with matplotlib.pyplot ===
-# replace all zero MAs with NaN for prettier graphs
-for ticker in ticker_list:
-    for i in range(ma_long_interval+1):
-        ma_list[ticker][0][i] = "NaN"
-        ma_list[ticker][1][i] = "NaN"
-
-# plot stock data
-fig, a = plt.subplots(len(ticker_list))
-i = 0
-for ticker in ticker_list:
-    a[i].plot(series_list[ticker], "k")
-    a[i].plot(ma_list[ticker][0], "b")
-    a[i].plot(ma_list[ticker][1], "r")
-    a[i].set_title(ticker)
-    i += 1
-
-# print results summary
-print(f"Trading results from {start} to {end}:\n_________________________________")
-portfolio_returns = round(portfolio_history[-1] / portfolio_history[0] * 100, 2)
-print(f"Portfolio returns: {portfolio_returns}%\n_________________________________")
-market_returns_sum = 0.0
-for ticker in ticker_list:
-    market_returns = round(series_list[ticker][-1] / series_list[ticker][0] * 100, 2)
-    print(f"Market returns for {ticker}: {market_returns}%")
-    market_returns_sum += market_returns
-print(f"_________________________________\nAverage market return: {round(market_returns_sum/len(ticker_list), 2)}%")
-print(f"S&P500 returns: {round(SNP[-1] / SNP[0] * 100, 2)}%")
-
-# plot portfolio data
-plt.figure()
-plt.plot(np.arange(0, len(SNP)), portfolio_history, 'k', label="Total portfolio")
-plt.title("Portfolio Values")
-plt.plot(np.arange(0, len(SNP)), cash_history, 'b', label="Cash")
-plt.plot(np.arange(0, len(SNP)), holdings_history, 'r', label="Equity")
-
-plt.legend()
-plt.show()
+        series = prices[ticker].dropna().to_numpy()
+        market_returns = round(series[-1] / series[0] * 100, 2)
+        print(f"Market returns for {ticker}: {market_returns}%")
+        market_returns_sum += market_returns
+    print(f"_________________________________\nAverage market return: {round(market_returns_sum/len(ticker_list), 2)}%")
+    print(f"S&P500 returns: {round(SNP.iloc[-1] / SNP.iloc[0] * 100, 2)}%")
+
+    # plot portfolio data
+    plt.figure()
+    plt.plot(np.arange(0, len(prices)), portfolio_history, 'k', label="Total portfolio")
+    plt.title("Portfolio Values")
+    plt.plot(np.arange(0, len(prices)), cash_history, 'b', label="Cash")
+    plt.plot(np.arange(0, len(prices)), holdings_history, 'r', label="Equity")
+
+    plt.legend()
+    plt.show()
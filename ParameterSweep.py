@@ -0,0 +1,152 @@
+from StockGetFunctions import get_panel
+from MultiMeanReversion import ma_panel, mean_reversion_backtest
+import MultiMeanReversion
+import Metrics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+import io
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Grid search of the MultiMeanReversion parameters over a process pool. The price and MA arrays are written
+# once to memory-mapped files that every worker reads without copying, and each task only carries its
+# configurations. Finished configurations are appended to a checkpoint CSV, so an interrupted sweep resumes
+# where it stopped when it is run again with the same grid.
+
+# ====== set global variables ======
+ma_long_intervals = range(10, 101, 5)       # long-term MA intervals to try
+ma_short_intervals = range(3, 31)           # short-term MA intervals to try
+trade_factors = [0.01, 0.02, 0.05, 0.1, 0.2]
+checkpoint = "sweep_results.csv"            # results file, resumed from if it exists
+chunk_size = 200                            # configurations per task
+# ==================================
+
+COLUMNS = ['config', 'ma_long_interval', 'ma_short_interval', 'trade_factor',
+           'final_return', 'max_drawdown', 'turnover']
+
+
+# every configuration of the grid, numbered in order
+def parameter_grid(ma_long_intervals, ma_short_intervals, trade_factors):
+    grid = pd.DataFrame(list(product(ma_long_intervals, ma_short_intervals, trade_factors)),
+                        columns=['ma_long_interval', 'ma_short_interval', 'trade_factor'])
+    grid.insert(0, 'config', np.arange(len(grid)))
+    return grid
+
+
+# final return (%), maximum drawdown (%) and turnover (traded value over mean portfolio value) of each
+# configuration, from the days x configurations histories of mean_reversion_backtest
+def sweep_statistics(cash_history, holdings_history, traded_history):
+    value = cash_history + holdings_history
+    final_return = value[-1]/value[0]*100
+    max_drawdown = Metrics.max_drawdown(value)*100
+    turnover = Metrics.turnover(traded_history, value)
+    return final_return, max_drawdown, turnover
+
+
+# arrays memory-mapped by the workers, opened once per process by the pool initializer
+_arrays = {}
+
+
+def _open_arrays(paths):
+    for key, path in paths.items():
+        _arrays[key] = np.load(path, mmap_mode='r')
+
+
+# run one chunk of configurations and return its result rows
+def _sweep_task(configs, cash):
+    prices, ma = _arrays['prices'], _arrays['ma']
+    windows = _arrays['windows']
+    long_index = np.searchsorted(windows, configs['ma_long_interval'].to_numpy())
+    short_index = np.searchsorted(windows, configs['ma_short_interval'].to_numpy())
+    histories = mean_reversion_backtest(prices, ma, ma, configs['trade_factor'].to_numpy(), cash,
+                                        long_index, short_index)
+    final_return, max_drawdown, turnover = sweep_statistics(*histories)
+    return configs.assign(final_return=final_return, max_drawdown=max_drawdown, turnover=turnover)
+
+
+# configurations already in the checkpoint file, checking they belong to the same grid
+def _read_checkpoint(path, grid):
+    if path is None or not os.path.exists(path):
+        return pd.DataFrame(columns=COLUMNS)
+    with open(path) as file:
+        text = file.read()
+    # a last line without its newline was cut short by an interruption (its last number may be truncated
+    # rather than missing), so it is dropped and run again
+    text = text[:text.rfind('\n') + 1]
+    if not text:
+        return pd.DataFrame(columns=COLUMNS)
+    done = pd.read_csv(io.StringIO(text)).dropna()
+    if not done['config'].isin(grid['config']).all():
+        raise ValueError(f"checkpoint {path} was written for a different parameter grid")
+    expected = grid.set_index('config').loc[done['config']]
+    if not np.allclose(expected.to_numpy(), done[expected.columns].to_numpy()):
+        raise ValueError(f"checkpoint {path} was written for a different parameter grid")
+    return done
+
+
+# replace the checkpoint file with the given rows, writing to a temporary file first so an interruption
+# leaves either the old file or the new one
+def _write_checkpoint(path, rows):
+    temporary = f"{path}.tmp"
+    rows.to_csv(temporary, index=False, columns=COLUMNS)
+    os.replace(temporary, path)
+
+
+# add the rows of a finished chunk to the checkpoint file in a single write
+def _append_checkpoint(path, rows):
+    with open(path, 'a') as file:
+        file.write(rows.to_csv(index=False, header=False, columns=COLUMNS))
+        file.flush()
+        os.fsync(file.fileno())
+
+
+# grid search over every (ma_long_interval, ma_short_interval, trade_factor) configuration on a days x tickers
+# price matrix. Returns the results table ordered by configuration.
+def sweep(prices, ma_long_intervals, ma_short_intervals, trade_factors, cash=10000.0, checkpoint=None,
+          chunk_size=200, max_workers=None):
+
+    prices = np.asarray(prices, dtype=float)
+    grid = parameter_grid(ma_long_intervals, ma_short_intervals, trade_factors)
+    if not len(grid):
+        raise ValueError("the parameter grid has no configurations")
+    done = _read_checkpoint(checkpoint, grid)
+    remaining = grid[~grid['config'].isin(done['config'])]
+    if checkpoint is not None:
+        _write_checkpoint(checkpoint, done)     # drops any line cut short by an interruption
+
+    results = [done] if len(done) else []
+    with tempfile.TemporaryDirectory() as directory:
+        # MAs of every interval in the grid, computed once for all configurations
+        windows = np.unique(np.concatenate((grid['ma_long_interval'], grid['ma_short_interval'])))
+        arrays = {'prices': prices, 'windows': windows,
+                  'ma': np.stack([ma_panel(prices, k) for k in windows])}
+        paths = {}
+        for key, array in arrays.items():
+            paths[key] = os.path.join(directory, f"{key}.npy")
+            np.save(paths[key], array)
+        del arrays
+
+        with ProcessPoolExecutor(max_workers, initializer=_open_arrays, initargs=(paths,)) as pool:
+            tasks = [pool.submit(_sweep_task, remaining.iloc[i:i + chunk_size], cash)
+                     for i in range(0, len(remaining), chunk_size)]
+            for task in as_completed(tasks):
+                rows = task.result()
+                if checkpoint is not None:
+                    _append_checkpoint(checkpoint, rows)
+                results.append(rows)
+
+    return pd.concat(results).astype({'config': int}).sort_values('config').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # prices of the MultiMeanReversion tickers on the days they all traded
+    prices = get_panel(MultiMeanReversion.ticker_list, "Close", MultiMeanReversion.start,
+                       MultiMeanReversion.end, MultiMeanReversion.interval).dropna()
+
+    results = sweep(prices, ma_long_intervals, ma_short_intervals, trade_factors, MultiMeanReversion.cash,
+                    checkpoint, chunk_size)
+    print(f"{len(results)} configurations of {list(prices.columns)} from {MultiMeanReversion.start} to "
+          f"{MultiMeanReversion.end}\nBest final returns:")
+    print(results.sort_values('final_return', ascending=False).head(10).to_string(index=False))
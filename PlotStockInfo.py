@@ -1,106 +1,205 @@
 # Gets user input of stocks, time period and metrics and plots the metric values over the given time period.
-
-import yfinance as yf
+# Run with arguments (or a JSON config) instead to render every metric x ticker chart to image files without a
+# display, e.g. for nightly reports:
+#   python PlotStockInfo.py --metrics Close Volume --tickers VOO MSFT --start 2020-01-01 --end 2021-01-01 --out charts
+# Charts are rendered on a process pool with a non-GUI backend, and long series are downsampled with
+# largest-triangle-three-buckets (LTTB) first, so rendering takes about as long for minute bars as for daily ones.
+# Metrics come from a registry of each metric's inputs (see register_metric): each ticker's history is downloaded
+# once and shared by all the metrics computed from it, and --plugins imports modules that register more metrics
+# (with "from MetricRegistry import register_metric").
+
+import argparse
+import importlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
 import pandas as pd
 import numpy as np
+from StockGetFunctions import get_panel
+from BlockStats import block_stats
+from MetricRegistry import METRICS, register_metric
 
-# get list of metrics and stock tickers to print
-metrics = input("Enter a comma-space-separated list of metrics to plot from the below:\n"
-                "Open, High, Low, Close, Volume, DailyReturn%, WeekVolatility, MonthVolatility\n")
-stocks = input("Enter a comma-space-separated list of stock tickers for which to plot the chosen metrics:\n")
-
-metricsList = metrics.split(", ")     # convert metric string to list
-stocksList = stocks.split(", ")     # convert tickers string to list
-
-# get period start and end from user
-timeStart = input("Enter history start date in the format YYYY-MM-DD:\n")
-timeEnd = input("Enter end date in the format YYYY-MM-DD:\n")
-
+# get volatility (standard deviation of closing values) of a stock in each calendar month, dated by its first bar
+def get_month_volatility(close_hist):
+    return block_stats(close_hist, freq='M')['std']
 
-# get volatility of stock's value on a monthly basis based off closing values
-def get_month_volatility(ticker_hist):
 
-    close_hist = np.array(ticker_hist['Close'])  # get close history
-    volatility_hist = [0]*int(len(close_hist)/30)    # initialise array for volatility history
+# get volatility of a stock in each calendar week (Monday to Sunday), dated by its first bar
+def get_week_volatility(close_hist):
+    return block_stats(close_hist, freq='W')['std']
 
-    for i in range(int(len(close_hist)/30)):        # calculate standard deviation for each month in history
-        month_values = close_hist[i*30 : (i+1)*30]
-        month_values = pd.Series(month_values)
-        volatility_hist[i] = month_values.std()
 
-    return pd.Series(volatility_hist)
-
-
-# get volatility of stock's value on a weekly basis based off closing values
-def get_week_volatility(ticker_hist):
+# get history of daily percentage change of a stock
+def get_return_percent(open_hist, close_hist):
+    return (1 - open_hist/close_hist)*100
 
-    close_hist = np.array(ticker_hist['Close'])  # get close history
-    volatility_hist = [0]*int(len(close_hist)/7)    # initialise array for volatility history
 
-    for i in range(int(len(close_hist)/7)):         # calculate standard deviation for each week in history
-        week_values = close_hist[i*7 : (i+1)*7]
-        week_values = pd.Series(week_values)
-        volatility_hist[i] = week_values.std()
+# the metrics built in to the registry (see MetricRegistry)
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+for field in FIELDS:
+    register_metric(field, ['history'], lambda history, field=field: history[field])
+register_metric('DailyReturn%', ['Open', 'Close'], get_return_percent)
+register_metric('WeekVolatility', ['Close'], get_week_volatility)
+register_metric('MonthVolatility', ['Close'], get_month_volatility)
 
-    return pd.Series(volatility_hist)
 
+# import modules that register their own metrics
+def load_plugins(modules):
+    for module in modules:
+        importlib.import_module(module)
 
-# get history of daily percentage change of a stock
-def get_return_percent(ticker_hist):
 
-    close_hist = ticker_hist['Close']       # get close history
-    open_hist = ticker_hist['Open']         # get open history
-    change_hist = [0]*len(close_hist)       # initialise array for change history
+# value of a metric from the values computed so far for a ticker, computing (and keeping) its inputs first
+def _evaluate(name, values):
+    if name not in values:
+        if name not in METRICS:
+            raise KeyError(f"unknown metric {name}, choose from {list(METRICS)}")
+        inputs, function = METRICS[name]
+        values[name] = function(*[_evaluate(source, values) for source in inputs])
+    return values[name]
 
-    for i in range(len(close_hist)):        # calculate percentage change for each day in history
-        change_hist[i] = (1 - open_hist[i]/close_hist[i])*100
 
-    return pd.Series(close_hist)        # return panda series
+# values of the metrics for every ticker, as {metric: {ticker: series}}. Each ticker's history is downloaded
+# once (concurrently, through the price cache), and each metric and intermediate is computed once per ticker
+# however many of the requested metrics depend on it.
+def evaluate_metrics(metrics_list, tickers, start, end, interval="1d", fetch=None):
+    history = get_panel(tickers, FIELDS, start, end, interval, fetch=fetch)
+    results = {metric: {} for metric in metrics_list}
+    for tick in dict.fromkeys(tickers):
+        values = {'history': history.xs(tick, axis=1, level=1).dropna(how='all')}
+        for metric in metrics_list:
+            results[metric][tick] = _evaluate(metric, values)
+    return results
 
 
 # get historical data of a given stock from ticker name, start and end, and metric name
-def get_stock_data(tick, metric, timeStart, timeEnd):
-
-    ticker = yf.Ticker(tick)        # get yf ticker
-    ticker_hist = ticker.history(start=timeStart, end=timeEnd)  # generate history of ticker
-
-    if metric == 'DailyReturn%':
-        data_hist = get_return_percent(ticker_hist)     # get daily return percent history
-
-    elif metric == 'WeekVolatility':
-        data_hist = get_week_volatility(ticker_hist)
-
-    elif metric == 'MonthVolatility':
-        data_hist = get_month_volatility(ticker_hist)
+def get_stock_data(tick, metric, timeStart, timeEnd, interval="1d"):
+    return evaluate_metrics([metric], [tick], timeStart, timeEnd, interval)[metric][tick]
+
+
+# keep n_out of the points of a series with largest-triangle-three-buckets: the first and last points, and from
+# each of n_out - 2 equal buckets in between the point forming the largest triangle with the point kept from the
+# bucket before and the mean of the bucket after. returns the indices of the points kept.
+def lttb(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(np.int64), n)
+    # mean of every bucket, with the last point as a bucket of its own
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x, edges[:-1])/counts
+    mean_y = np.add.reduceat(y, edges[:-1])/counts
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - mean_x[i + 1])*(y[lo:hi] - y[a]) - (x[a] - x[lo:hi])*(mean_y[i + 1] - y[a]))
+        a = lo + np.argmax(area)
+        keep[i + 1] = a
+    return keep
+
+
+# x values (matplotlib date numbers for a date index), y values and whether x is dates, of a series with its
+# missing values dropped, downsampled to at most max_points points
+def chart_points(series, max_points=2000):
+    series = series.dropna()
+    dates = isinstance(series.index, pd.DatetimeIndex)
+    x = mdates.date2num(series.index.tz_localize(None)) if dates else np.asarray(series.index, dtype=float)
+    y = series.to_numpy(dtype=float)
+    keep = lttb(x, y, max_points) if max_points else np.arange(len(x))
+    return x[keep], y[keep], dates
+
+
+def _init_renderer():
+    plt.switch_backend("Agg")
+
+
+# draw one chart and save it to a file (PNG, SVG, etc. from its extension)
+def _render_task(path, title, xlabel, ylabel, x, y, dates):
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.plot(x, y, linewidth=0.8)
+    if dates:
+        ax.xaxis_date()
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.grid()
+    fig.savefig(path)
+    plt.close(fig)
+    return path
+
+
+# render a chart of every metric for every ticker into out_dir as <metric>_<ticker>.<fmt>, returning the paths
+def render_charts(metrics_list, tickers, start, end, out_dir, fmt="png", max_points=2000, max_workers=None,
+                  interval="1d", fetch=None):
+    os.makedirs(out_dir, exist_ok=True)
+    data = evaluate_metrics(metrics_list, tickers, start, end, interval, fetch)
+    tasks = []
+    for metric in metrics_list:
+        for tick in tickers:
+            x, y, dates = chart_points(data[metric][tick], max_points)
+            name = re.sub(r"[^\w.-]", "_", f"{metric}_{tick}")
+            tasks.append((os.path.join(out_dir, f"{name}.{fmt}"), f"{tick} {metric}", "Date", metric, x, y, dates))
+
+    with ProcessPoolExecutor(max_workers, initializer=_init_renderer) as pool:
+        return list(pool.map(_render_task, *zip(*tasks)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plot stock metrics; renders to files when given arguments")
+    parser.add_argument("--config", help="JSON file with any of the options below")
+    parser.add_argument("--metrics", nargs="+", help="Open, High, Low, Close, Volume, DailyReturn%%, WeekVolatility, "
+                                                     "MonthVolatility")
+    parser.add_argument("--tickers", nargs="+")
+    parser.add_argument("--start", help="YYYY-MM-DD")
+    parser.add_argument("--end", help="YYYY-MM-DD")
+    parser.add_argument("--interval", default="1d", help="bar interval (see yfinance intervals)")
+    parser.add_argument("--out", default="charts", help="output directory")
+    parser.add_argument("--format", default="png", help="png, svg, pdf, ...")
+    parser.add_argument("--points", type=int, default=2000, help="points per chart after downsampling (0 for all)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--plugins", nargs="+", default=[], help="modules that register extra metrics")
+    args = parser.parse_args()
+    if args.config:
+        with open(args.config) as file:
+            parser.set_defaults(**json.load(file))
+        args = parser.parse_args()
+
+    load_plugins(args.plugins)
+    if args.metrics and args.tickers:
+        # batch mode
+        paths = render_charts(args.metrics, args.tickers, args.start, args.end, args.out, args.format, args.points,
+                              args.workers, args.interval)
+        print(f"Rendered {len(paths)} charts to {args.out}")
 
     else:
-        data_hist = ticker_hist[metric]         # get data of specified metric
-        data_hist = pd.Series(data_hist)        # convert to panda series
+        # get list of metrics and stock tickers to print
+        metrics = input("Enter a comma-space-separated list of metrics to plot from the below:\n"
+                        "Open, High, Low, Close, Volume, DailyReturn%, WeekVolatility, MonthVolatility\n")
+        stocks = input("Enter a comma-space-separated list of stock tickers for which to plot the chosen metrics:\n")
 
-    return data_hist
+        metricsList = metrics.split(", ")     # convert metric string to list
+        stocksList = stocks.split(", ")     # convert tickers string to list
 
+        # get period start and end from user
+        timeStart = input("Enter history start date in the format YYYY-MM-DD:\n")
+        timeEnd = input("Enter end date in the format YYYY-MM-DD:\n")
 
-# plot data
-i = 0
-for i in range(len(metricsList)):   # iterate through metrics
-    dataList = pd.DataFrame({})  # make pandas dataframe to store information of current metric
-    j = 0
-    for j in range(len(stocksList)):    # iterate through stocks
-        # append stock data for current metric onto dataframe
-        dataList[stocksList[j]] = get_stock_data(stocksList[j], metricsList[i], timeStart, timeEnd)
-
-    # plot all stock's data for current metric
-    dataList.plot(title=metricsList[i])
-
-    # choose label for x-axis
-    if metricsList[i] == 'WeekVolatility':
-        xlabel = 'Weeks from start date'
-    else:
-        xlabel= metricsList[i]
+        # plot data
+        data = evaluate_metrics(metricsList, stocksList, timeStart, timeEnd)
+        i = 0
+        for i in range(len(metricsList)):   # iterate through metrics
+            # all stock's data for current metric
+            dataList = pd.DataFrame(data[metricsList[i]])
 
-    plt.xlabel(xlabel)
-    plt.ylabel(metricsList[i])
+            # plot all stock's data for current metric
+            dataList.plot(title=metricsList[i])
 
-plt.show()
+            plt.xlabel('Date')
+            plt.ylabel(metricsList[i])
 
+        plt.show()
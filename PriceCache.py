@@ -0,0 +1,237 @@
+import os
+import json
+import threading
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+# Local on-disk cache of price histories. Each ticker/interval pair is kept in one columnar file
+# (parquet when pyarrow is installed, otherwise a pandas pickle) alongside a small json file listing
+# the date spans that have already been downloaded. Requests are answered from disk where the spans
+# cover them, and only the missing spans are downloaded and merged in. Histories are adjusted for dividends
+# and splits, so when a download shows one after the last cached bar, the cached spans are downloaded again.
+
+try:
+    import pyarrow  # noqa: F401  (only needed so pandas can write parquet)
+    FILE_FORMAT = "parquet"
+except ImportError:
+    FILE_FORMAT = "pkl"
+
+DEFAULT_CACHE_DIR = os.environ.get("PM_CACHE_DIR",
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), ".price_cache"))
+
+# yfinance history periods converted to a calendar offset back from today
+PERIOD_OFFSETS = {'1d': pd.DateOffset(days=1), '5d': pd.DateOffset(days=5), '1mo': pd.DateOffset(months=1),
+                  '3mo': pd.DateOffset(months=3), '6mo': pd.DateOffset(months=6), '1y': pd.DateOffset(years=1),
+                  '2y': pd.DateOffset(years=2), '5y': pd.DateOffset(years=5), '10y': pd.DateOffset(years=10)}
+
+# the longest span that can come back empty because the market was closed (a long weekend over a holiday)
+EMPTY_SPAN = pd.Timedelta(days=5)
+
+
+# convert a yfinance period string (e.g. '5y', 'ytd', 'max') into a [start, end) range of timestamps, ending
+# with the last completed day: today's bar is still changing, so a range including it could never be cached
+def period_to_range(period):
+    end = pd.Timestamp(dt.date.today())
+    if period == 'max':
+        start = pd.Timestamp("1900-01-01")
+    elif period == 'ytd':
+        start = pd.Timestamp(dt.date(dt.date.today().year, 1, 1))
+    else:
+        start = end - PERIOD_OFFSETS[period]
+    return start, end
+
+
+# drop timezone from an index so that it can be compared against naive start/end timestamps
+def naive_index(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        return index.tz_localize(None)
+    return index
+
+
+# put an index on a common footing across exchanges: local dates for daily bars, UTC for intraday bars
+def align_index(index, interval):
+    index = pd.DatetimeIndex(index)
+    if interval[-1] in "dko":   # '1d', '5d', '1wk', '1mo', '3mo'
+        return naive_index(index).normalize()
+    if index.tz is not None:
+        return index.tz_convert("UTC").tz_localize(None)
+    return index
+
+
+# merge a list of [start, end) spans into the smallest sorted list of non-overlapping spans
+def merge_spans(spans):
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+# get the parts of [start, end) that are not covered by a sorted list of spans
+def missing_spans(spans, start, end):
+    missing = []
+    cursor = start
+    for span_start, span_end in spans:
+        if span_end <= cursor:
+            continue
+        if span_start >= end:
+            break
+        if span_start > cursor:
+            missing.append([cursor, span_start])
+        cursor = max(cursor, span_end)
+    if cursor < end:
+        missing.append([cursor, end])
+    return missing
+
+
+# whether a history has a dividend or split after a time. Histories are adjusted for every corporate action
+# up to when they were downloaded, so one after the last cached bar means the cached bars are on an old basis.
+def new_corporate_action(frame, after):
+    if not len(frame):
+        return False
+    later = naive_index(frame.index) > after
+    dividends = frame['Dividends'].to_numpy()[later] if 'Dividends' in frame else []
+    splits = frame['Stock Splits'].to_numpy()[later] if 'Stock Splits' in frame else []
+    return bool(np.any(dividends != 0) or np.any((splits != 0) & (splits != 1)))
+
+
+class PriceCache:
+
+    # fetch(tick, start, end, interval) downloads missing spans, Yahoo Finance by default (see DataProviders.py)
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, fetch=None):
+        if fetch is None:
+            from DataProviders import YahooProvider
+            fetch = YahooProvider()
+        self.cache_dir = cache_dir
+        self.fetch = fetch
+        self.hits = 0           # requests answered entirely from disk
+        self.misses = 0         # requests that needed at least one download
+        self.downloads = 0      # number of missing spans downloaded
+        self.rows_downloaded = 0
+        self._locks = {}        # one lock per ticker/interval file so concurrent requests don't race on disk
+        self._locks_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def _lock(self, tick, interval):
+        with self._locks_lock:
+            return self._locks.setdefault((tick, interval), threading.Lock())
+
+    # paths of the data file and covered-spans file for a ticker and interval
+    def _paths(self, tick, interval):
+        name = f"{tick}_{interval}".replace("/", "_").replace("^", "_idx_")
+        return (os.path.join(self.cache_dir, f"{name}.{FILE_FORMAT}"),
+                os.path.join(self.cache_dir, f"{name}.json"))
+
+    def _load(self, tick, interval):
+        data_path, span_path = self._paths(tick, interval)
+        if not (os.path.exists(data_path) and os.path.exists(span_path)):
+            return pd.DataFrame(), []
+        if FILE_FORMAT == "parquet":
+            frame = pd.read_parquet(data_path)
+        else:
+            frame = pd.read_pickle(data_path)
+        with open(span_path) as f:
+            spans = [[pd.Timestamp(s), pd.Timestamp(e)] for s, e in json.load(f)]
+        return frame, spans
+
+    def _save(self, tick, interval, frame, spans):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, span_path = self._paths(tick, interval)
+        if FILE_FORMAT == "parquet":
+            frame.to_parquet(data_path)
+        else:
+            frame.to_pickle(data_path)
+        with open(span_path, "w") as f:
+            json.dump([[str(s), str(e)] for s, e in spans], f)
+
+    def _download(self, tick, start, end, interval):
+        new_data = self.fetch(tick, start.to_pydatetime(), end.to_pydatetime(), interval)
+        with self._stats_lock:
+            self.downloads += 1
+            self.rows_downloaded += len(new_data)
+        return new_data
+
+    # load the cached file and download any spans of [start, end) that it doesn't cover yet
+    def _update(self, tick, start, end, interval):
+        frame, spans = self._load(tick, interval)
+        missing = missing_spans(spans, start, end)
+
+        if not missing:
+            with self._stats_lock:
+                self.hits += 1
+        else:
+            with self._stats_lock:
+                self.misses += 1
+            # today's bar is still changing, so never mark it (or anything later) as covered
+            today = pd.Timestamp(dt.date.today())
+            first_bar = naive_index(frame.index).min() if len(frame) else None
+            last_bar = naive_index(frame.index).max() if len(frame) else None
+            covered = merge_spans(spans)
+            rebase = False
+            for span_start, span_end in missing:
+                new_data = self._download(tick, span_start, span_end, interval)
+                if len(new_data):
+                    rebase |= last_bar is not None and new_corporate_action(new_data, last_bar)
+                    frame = pd.concat([frame, new_data]) if len(frame) else new_data
+                elif span_end - span_start > EMPTY_SPAN and (first_bar is None or span_end > first_bar):
+                    # nothing for longer than a weekend or holiday, and not from before the first bar (the
+                    # listing), is more likely a failed download than a real gap, so it is tried again next time
+                    continue
+                if span_start < today:
+                    spans.append([span_start, min(span_end, today)])
+            if rebase:
+                # a dividend or split since the cached bars changed the adjustment of all the earlier prices,
+                # so the spans cached before are downloaded again (the new spans are already on the new basis)
+                for span_start, span_end in covered:
+                    new_data = self._download(tick, span_start, span_end, interval)
+                    if len(new_data):
+                        frame = pd.concat([frame, new_data])
+            if len(frame):
+                frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+            self._save(tick, interval, frame, merge_spans(spans))
+
+        return frame
+
+    # get full OHLCV history of a ticker between start (inclusive) and end (exclusive), downloading only
+    # the spans that are not already on disk
+    def history(self, tick, start=None, end=None, interval="1d", period=None):
+        if period is not None:
+            start, end = period_to_range(period)
+        start = pd.Timestamp(start) if start is not None else pd.Timestamp("1900-01-01")
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp(dt.date.today()) + pd.Timedelta(days=1)
+
+        with self._lock(tick, interval):
+            frame = self._update(tick, start, end, interval)
+
+        if not len(frame):
+            return frame
+        index = naive_index(frame.index)
+        return frame[(index >= start) & (index < end)]
+
+    # summary of hits and misses since the cache was created
+    def stats(self):
+        requests = self.hits + self.misses
+        return {'requests': requests, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'downloads': self.downloads, 'rows_downloaded': self.rows_downloaded}
+
+    def report(self):
+        s = self.stats()
+        return (f"Price cache: {s['hits']} hits, {s['misses']} misses ({round(s['hit_rate']*100, 1)}% hit rate), "
+                f"{s['downloads']} spans / {s['rows_downloaded']} rows downloaded")
+
+    # remove cached data for a ticker and interval, or everything if no ticker is given
+    def clear(self, tick=None, interval="1d"):
+        if tick is not None:
+            paths = self._paths(tick, interval)
+        elif os.path.isdir(self.cache_dir):
+            paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)]
+        else:
+            paths = []
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
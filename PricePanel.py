@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# Columnar multi-asset panel: one contiguous float64 dates x tickers array per field (e.g. quoted price, shares
+# held, price in the home currency), all stored in a single fields x dates x tickers block. Fields, tickers and
+# date windows are returned as views of that block, so whole-portfolio calculations are matrix operations on
+# the arrays themselves rather than on a wide DataFrame built up one column at a time.
+
+
+class PricePanel:
+
+    def __init__(self, dates, tickers, fields=('price', 'shares', 'value'), values=None):
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = list(tickers)
+        self.fields = list(fields)
+        self.columns = {ticker: k for k, ticker in enumerate(self.tickers)}
+        if values is None:
+            values = np.zeros((len(self.fields), len(self.dates), len(self.tickers)))
+        self.values = values
+
+    # dates x tickers array of a field (a view: writing to it writes to the panel)
+    def __getitem__(self, field):
+        if isinstance(field, tuple):    # (field, ticker): one ticker's column
+            field, ticker = field
+            return self.values[self.fields.index(field), :, self.columns[ticker]]
+        return self.values[self.fields.index(field)]
+
+    def __setitem__(self, field, array):
+        self[field][...] = array
+
+    def __len__(self):
+        return len(self.dates)
+
+    # panel of the dates from start to end (inclusive), sharing memory with this one
+    def window(self, start=None, end=None):
+        first = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start))
+        last = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side='right')
+        return PricePanel(self.dates[first:last], self.tickers, self.fields, self.values[:, first:last])
+
+    # column indices of a list of tickers
+    def index(self, tickers):
+        return np.array([self.columns[ticker] for ticker in tickers], dtype=np.int64)
+
+    # a field as a DataFrame (without copying the data)
+    def frame(self, field):
+        return pd.DataFrame(self[field], index=self.dates, columns=self.tickers, copy=False)
+
+    # panel of this one's dates followed by another's (with the same tickers and fields)
+    def append(self, other):
+        return PricePanel(self.dates.append(other.dates), self.tickers, self.fields,
+                          np.concatenate((self.values, other.values), axis=1))
+
+    # forward-fill missing values of a field down each column, in place, starting from an initial row if given
+    def ffill(self, field, initial=None):
+        if initial is None:
+            self[field] = pd.DataFrame(self[field]).ffill().to_numpy()
+        else:
+            self[field] = pd.DataFrame(np.vstack((initial, self[field]))).ffill().to_numpy()[1:]
@@ -1,4 +1,6 @@
-import yfinance as yf
+from StockGetFunctions import get_delta_history
+from itertools import combinations, islice
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -15,24 +17,26 @@ import matplotlib.pyplot as plt
 stockInput = "AMZN, GOOG, MSFT"
 time_range = "5y"
 resolution = 20
+solver = "grid"     # "grid" evaluates every weighting at the resolution, "cla" traces the efficient frontier directly,
+                    # "monte carlo" samples random weightings
+samples = 10**6     # number of random weightings for the monte carlo solver
+frontier_points = 50    # number of target-return portfolios on the traced frontier
+RFRR = 6.5          # annual risk-free rate of return (%) for the maximum-Sharpe portfolio
 
 resolution = int(100/resolution)    # convert percentage to a fraction of 100%
+resolution_scale = float(1/resolution)        # scaling factor to put final weighting into range [0, 1]
 
-# get history of stock delta (close-open) as a percentage
-def getDeltaHistory(tick, time_range):
-
-    ticker = yf.Ticker(tick)    # get yf ticker from input
-    ticker_hist = ticker.history(period=time_range)    # generate history of ticker
-    closeList = ticker_hist['Close']    # get close values from history
-    openList = ticker_hist['Open']      # get open values from history
+# histories and matrices already computed, so that each ticker is only downloaded once per time range
+delta_cache = {}
+matrix_cache = {}
 
-    deltaList = [0]*int(len(closeList))  # initialise list of deltas
+# get history of stock delta (close-open) as a percentage (memoized per ticker and time range)
+def getDeltaHistory(tick, time_range):
 
-    j = 0
-    for j in range(len(deltaList)):     # calculate bi-monthly price delta % over history
-        deltaList[j] = (1 - openList[j]/closeList[j])*100
+    if (tick, time_range) not in delta_cache:
+        delta_cache[(tick, time_range)] = get_delta_history(tick, time_range)
 
-    return pd.Series(deltaList)    # convert list into panda series
+    return delta_cache[(tick, time_range)]
 
 
 # get mean daily delta for a stock
@@ -57,11 +61,27 @@ def weights(portfolio_size, resolution):
     if portfolio_size == 1:
         yield (resolution,)
     else:
-        for value in range(resolution):
+        for value in range(resolution + 1):
             for permutation in weights(portfolio_size - 1, resolution - value):
                 yield (value,) + permutation
 
 
+# the same permutations as weights(), in the same order, as integer arrays of at most chunk_size rows.
+# each permutation is a choice of portfolio_size - 1 dividers among resolution + portfolio_size - 1 slots
+# ("stars and bars"), which itertools.combinations enumerates in C.
+def weight_chunks(portfolio_size, resolution, chunk_size=100000):
+
+    slots = resolution + portfolio_size - 1
+    dividers = combinations(range(slots), portfolio_size - 1)
+    while True:
+        rows = list(islice(dividers, chunk_size))
+        if not rows:
+            return
+        chunk = np.array(rows, dtype=np.int64).reshape(len(rows), portfolio_size - 1)
+        edges = np.hstack((np.full((len(chunk), 1), -1), chunk, np.full((len(chunk), 1), slots)))
+        yield np.diff(edges, axis=1) - 1
+
+
 # find weighted return of portfolio
 def portfolio_return(portfolio):
 
@@ -69,55 +89,335 @@ def portfolio_return(portfolio):
 
     i = 0
     for i in range(len(portfolio)):
-        weighted_return += portfolio[i].weight * portfolio[i].mean
+        weighted_return += portfolio[i].weight * resolution_scale * portfolio[i].mean
 
     return weighted_return
 
 
-# find weighted risk (sDev) of entire portfolio
-def portfolio_risk(portfolio, time_range):
+# get the matrices shared by every weighting of a list of stocks, built once per (tickers, time range):
+# daily deltas (one column per stock), mean and sDev of each stock, their correlation, and the covariance
+# sDev*corr*sDev such that portfolio variance = w*cov*w
+def get_portfolio_matrices(ticks, time_range):
 
-    # generate data frame of stock deltas
-    sDevFrame = pd.DataFrame([[0]*len(portfolio)]*len(getDeltaHistory(portfolio[0].tick, time_range)))
+    key = (tuple(ticks), time_range)
+    if key not in matrix_cache:
+        deltas = [getDeltaHistory(tick, time_range) for tick in ticks]
+        # generate data frame of stock deltas
+        sDevFrame = pd.DataFrame({i: deltas[i] for i in range(len(ticks))}).iloc[:len(deltas[0])]
 
-    i = 0
-    for i in range(len(portfolio)):
-        sDevFrame[i] = getDeltaHistory(portfolio[i].tick, time_range)
+        # correlation from the covariance matrix, with the diagonal set to exactly 1. sDevs are taken from the
+        # same covariance matrix so that sDev*corr*sDev reproduces it.
+        covMatrix = np.array(sDevFrame.cov())
+        sDev = np.sqrt(np.diag(covMatrix))
+        corrMatrix = covMatrix/np.outer(sDev, sDev)
+        np.fill_diagonal(corrMatrix, 1)
 
-    covMatrix = sDevFrame.cov()     # covariance matrix of portfolio
-    covMatrix = np.array(covMatrix)
+        matrix_cache[key] = {'deltas': sDevFrame, 'mean': np.array([delta.mean() for delta in deltas]),
+                             'sDev': sDev, 'corr': corrMatrix, 'cov': sDev[:, None]*corrMatrix*sDev[None, :]}
 
-    # make diagonal values = 1
-    i = 0
-    for i in range(len(portfolio)):
-        j = 0
-        for j in range(len(portfolio)):
-            if i == j:
-                covMatrix[i][j] = 1
-
-    # generate vertical and horizontal weighting matrices
-    wtHorizontal = np.array([0.0]*len(portfolio))     # horizontal weighting matrix
-    wtVertical = np.array([[0.0]] * len(portfolio))   # vertical weighting matrix
-    i = 0
-    for i in range(len(portfolio)):     # populate matrices
-        wtHorizontal[i] = float(portfolio[i].weight*resolution_scale)
-        wtVertical[i] = float(portfolio[i].weight*resolution_scale)
+    return matrix_cache[key]
 
-    # generate sDev matrix
-    sDevMatrix = np.array([[0.0]*len(portfolio)]*len(portfolio))
-    i = 0
-    for i in range(len(portfolio)):
-        j = 0
-        for j in range(len(portfolio)):
-            if i == j:
-                sDevMatrix[i][j] = portfolio[i].sDev
 
-    # compute portfolio variance (risk) with matrix multiplication
-    total_risk = np.matmul(np.matmul(np.matmul(np.matmul(wtHorizontal, sDevMatrix), covMatrix), sDevMatrix), wtVertical)
+# find weighted risk (sDev) of entire portfolio
+def portfolio_risk(portfolio, time_range):
+
+    ticks = [portfolio[i].tick for i in range(len(portfolio))]
+    covMatrix = get_portfolio_matrices(ticks, time_range)['cov']
+
+    # weighting vector
+    wt = np.array([portfolio[i].weight*resolution_scale for i in range(len(portfolio))])
+
+    # compute portfolio sDev with the precomputed covariance matrix
+    total_risk = np.sqrt(max(wt @ covMatrix @ wt, 0.0))
 
     return float(total_risk)
 
 
+# risk (sDev) and return of many portfolios at once, one weighting per row of weight_matrix:
+# risk = sqrt(w*cov*w) for each row, return = weight_matrix*mean
+def evaluate_portfolios(weight_matrix, mean, covMatrix):
+
+    variance = np.einsum('ij,ij->i', weight_matrix @ covMatrix, weight_matrix)
+    risk = np.sqrt(np.maximum(variance, 0.0))
+
+    return risk, weight_matrix @ mean
+
+
+# stream (weights, risk, return) for every weighting of a list of stocks with a given resolution, in chunks
+# of at most chunk_size portfolios so memory stays bounded however many weightings there are
+def frontier_chunks(ticks, time_range, resolution, chunk_size=100000):
+
+    matrices = get_portfolio_matrices(ticks, time_range)
+    for chunk in weight_chunks(len(ticks), resolution, chunk_size):
+        wt = chunk/resolution       # put weighting into range [0, 1]
+        risk, ret = evaluate_portfolios(wt, matrices['mean'], matrices['cov'])
+        yield wt, risk, ret
+
+
+# Long-only efficient frontier by the critical line algorithm (Markowitz; Bailey & Lopez de Prado, 2013).
+# Starting from the highest-return portfolio, assets are freed from or bound to their weight limits one at a
+# time as the risk-aversion multiplier lam falls to 0, the minimum-variance portfolio. Between consecutive
+# turning points the efficient weights are linear in lam, so the turning points describe the whole frontier.
+class CriticalLine:
+
+    def __init__(self, mean, covMatrix, lower=None, upper=None):
+        self.mean = np.asarray(mean, dtype=float)
+        self.cov = np.asarray(covMatrix, dtype=float)
+        n = len(self.mean)
+        self.lower = np.zeros(n) if lower is None else np.asarray(lower, dtype=float)
+        self.upper = np.ones(n) if upper is None else np.asarray(upper, dtype=float)
+        self.turning_points = []    # weights at each turning point, from highest return to minimum variance
+        self.lambdas = []
+        self.solve()
+
+    # highest-return portfolio: fill assets to their upper bound in order of mean, leaving one asset free
+    def _start(self):
+        order = np.argsort(self.mean)
+        w = self.lower.copy()
+        i = len(order)
+        while w.sum() < 1:
+            i -= 1
+            w[order[i]] = self.upper[order[i]]
+        w[order[i]] += 1 - w.sum()
+        return [order[i]], w
+
+    def solve(self):
+        free, w = self._start()
+        n = len(self.mean)
+        self.turning_points.append(w.copy())
+        self.lambdas.append(np.inf)
+        changed = None      # asset bound or freed at the last turning point, which can't flip straight back
+
+        covF_inv = np.linalg.inv(self.cov[np.ix_(free, free)])
+
+        while True:
+            bound = np.setdiff1d(np.arange(n), free)
+            onesF = covF_inv.sum(axis=1)                        # covF_inv*1
+            meanF = covF_inv @ self.mean[free]                  # covF_inv*mean
+            c1 = onesF.sum()
+            c3 = meanF.sum()
+            v = self.cov[:, bound] @ w[bound]                   # covariance with the bound weights
+            l3 = covF_inv @ v[free]
+            l2 = l3.sum()
+            l1 = w[bound].sum()
+
+            # case a): bind one free weight to the limit it is heading towards
+            l_in = -np.inf
+            if len(free) > 1:
+                c = -c1*meanF + c3*onesF
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    bi = np.where(c > 0, self.upper[free], self.lower[free])
+                    lam = ((1 - l1 + l2)*onesF - c1*(bi + l3))/c
+                lam[(c == 0) | (np.asarray(free) == changed)] = -np.inf
+                k = int(np.argmax(lam))
+                l_in, i_in, bi_in = lam[k], free[k], bi[k]
+
+            # case b): free one bound weight. The inverse of the enlarged free covariance matrix is applied
+            # through the bordering formula, for all bound assets at once.
+            l_out = -np.inf
+            if len(bound):
+                cols = self.cov[np.ix_(free, bound)]
+                U = covF_inv @ cols
+                s = self.cov[bound, bound] - (cols*U).sum(axis=0)
+                sumU = U.sum(axis=0)
+                t1 = (1 - cols.T @ onesF)/s
+                tm = (self.mean[bound] - cols.T @ meanF)/s
+                c1_ = c1 - sumU*t1 + t1
+                c3_ = c3 - sumU*tm + tm
+                c = -c1_*tm + c3_*t1
+                yz = l3[:, None] - U*w[bound]
+                tz = (v[bound] - np.diag(self.cov)[bound]*w[bound] - (cols*yz).sum(axis=0))/s
+                l2_ = yz.sum(axis=0) - sumU*tz + tz
+                l1_ = l1 - w[bound]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    lam = ((1 - l1_ + l2_)*t1 - c1_*(w[bound] + tz))/c
+                lam[(c == 0) | (bound == changed) | ~(lam < self.lambdas[-1]*(1 - 1e-12))] = -np.inf
+                k = int(np.argmax(lam))
+                l_out, i_out = lam[k], bound[k]
+
+            if l_in <= 0 and l_out <= 0:   # no more events: finish at the minimum-variance portfolio
+                lam = 0.0
+            elif l_in > l_out:
+                lam = l_in
+                free.remove(i_in)
+                w[i_in] = bi_in
+                changed = i_in
+            else:
+                lam = l_out
+                free.append(i_out)
+                changed = i_out
+
+            # weights of the free assets at this turning point (the inverse is kept for the next step)
+            bound = np.setdiff1d(np.arange(n), free)
+            covF_inv = np.linalg.inv(self.cov[np.ix_(free, free)])
+            onesF = covF_inv.sum(axis=1)
+            meanF = covF_inv @ self.mean[free]
+            w1 = covF_inv @ (self.cov[np.ix_(free, bound)] @ w[bound])
+            g = (-lam*meanF.sum() + 1 - w[bound].sum() + w1.sum())/onesF.sum()
+            w[free] = -w1 + g*onesF + lam*meanF
+
+            self.turning_points.append(w.copy())
+            self.lambdas.append(lam)
+            if lam == 0:
+                break
+
+        self._purge()
+
+    # drop turning points that break the constraints through rounding, or that are not efficient
+    def _purge(self, tol=1e-9):
+        points = np.array(self.turning_points)
+        valid = ((points >= self.lower - tol).all(axis=1) & (points <= self.upper + tol).all(axis=1)
+                 & (np.abs(points.sum(axis=1) - 1) < tol))
+        points = points[valid]
+        returns = points @ self.mean
+        later_best = np.maximum.accumulate(returns[::-1])[::-1]     # best return from each point onwards
+        self.turning_points = list(points[returns >= later_best])
+        self.lambdas = list(np.array(self.lambdas)[valid][returns >= later_best])
+
+    def _stats(self, weight_matrix):
+        return evaluate_portfolios(np.atleast_2d(weight_matrix), self.mean, self.cov)
+
+    # minimum-variance portfolio: (weights, risk, return)
+    def min_variance(self):
+        w = self.turning_points[-1]
+        risk, ret = self._stats(w)
+        return w, risk[0], ret[0]
+
+    # maximum-Sharpe portfolio for a risk-free rate per period, by golden-section search along each segment
+    # of the frontier (the Sharpe ratio is unimodal on a segment)
+    def max_sharpe(self, risk_free=0.0):
+        best = (None, -np.inf)
+        golden = (np.sqrt(5) - 1)/2
+        points = self.turning_points
+        for w0, w1 in zip(points[:-1], points[1:]) if len(points) > 1 else [(points[0], points[0])]:
+            def sharpe(a):
+                risk, ret = self._stats(a*w0 + (1 - a)*w1)
+                return (ret[0] - risk_free)/risk[0] if risk[0] > 0 else -np.inf
+            a, b = 0.0, 1.0
+            for _ in range(100):
+                x1, x2 = b - golden*(b - a), a + golden*(b - a)
+                if sharpe(x1) < sharpe(x2):
+                    a = x1
+                else:
+                    b = x2
+                if b - a < 1e-10:
+                    break
+            for x in (0.0, (a + b)/2, 1.0):
+                if sharpe(x) > best[1]:
+                    best = (x*w0 + (1 - x)*w1, sharpe(x))
+        w = best[0]
+        risk, ret = self._stats(w)
+        return w, risk[0], ret[0]
+
+    # n_points portfolios on the frontier, evenly spaced in return from the highest return down to the
+    # minimum-variance portfolio. Within a segment, weights and return are both linear in lam, so the
+    # weights for a target return are an exact interpolation of the two turning points around it.
+    def frontier(self, n_points=50):
+        points = np.array(self.turning_points)
+        returns = points @ self.mean
+        targets = np.linspace(returns[0], returns[-1], n_points)
+        weight_matrix = np.empty((n_points, len(self.mean)))
+        for j, target in enumerate(targets):
+            k = min(np.searchsorted(-returns, -target, side='right'), len(points) - 1)
+            k = max(k, 1)
+            if returns[k - 1] == returns[k]:
+                weight_matrix[j] = points[k]
+            else:
+                a = (target - returns[k])/(returns[k - 1] - returns[k])
+                weight_matrix[j] = a*points[k - 1] + (1 - a)*points[k]
+        risk, ret = self._stats(weight_matrix)
+        return weight_matrix, risk, ret
+
+
+# solve the long-only efficient frontier of a list of stocks with the critical line algorithm
+def efficient_frontier(ticks, time_range):
+
+    matrices = get_portfolio_matrices(ticks, time_range)
+
+    return CriticalLine(matrices['mean'], matrices['cov'])
+
+
+# indices of the Pareto-efficient portfolios (no other portfolio has lower or equal risk and a higher return),
+# ordered by increasing risk
+def pareto_front(risk, ret):
+
+    order = np.lexsort((-ret, risk))    # by risk, then best return first among equal risks
+    best_before = np.maximum.accumulate(np.concatenate(([-np.inf], ret[order][:-1])))
+    return order[ret[order] > best_before]
+
+
+# streaming reducer that keeps only the Pareto-efficient portfolios of every chunk it is given, so memory
+# stays proportional to the size of the frontier however many portfolios are sampled
+class ParetoFront:
+
+    def __init__(self, portfolio_size):
+        self.weights = np.empty((0, portfolio_size))
+        self.risk = np.empty(0)
+        self.ret = np.empty(0)
+        self.count = 0      # portfolios seen
+
+    def add(self, weight_matrix, risk, ret):
+        self.count += len(risk)
+        keep = pareto_front(risk, ret)      # prune the chunk before merging
+        weights = np.vstack((self.weights, weight_matrix[keep]))
+        risk = np.concatenate((self.risk, risk[keep]))
+        ret = np.concatenate((self.ret, ret[keep]))
+        keep = pareto_front(risk, ret)
+        self.weights, self.risk, self.ret = weights[keep], risk[keep], ret[keep]
+
+    def merge(self, other):
+        self.add(other.weights, other.risk, other.ret)
+        self.count += other.count - len(other.risk)
+
+
+# mean and covariance shared by the sampling workers, set once per process by the pool initializer
+_sample_matrices = {}
+
+
+def _init_sampler(mean, covMatrix):
+    _sample_matrices['mean'] = mean
+    _sample_matrices['cov'] = covMatrix
+
+
+# draw n_samples Dirichlet(concentration) long-only weightings from a seed sequence, in batches of
+# batch_size, and return their Pareto front
+def _sample_task(seed, n_samples, batch_size, concentration):
+
+    mean, covMatrix = _sample_matrices['mean'], _sample_matrices['cov']
+    rng = np.random.default_rng(seed)
+    front = ParetoFront(len(mean))
+    for start in range(0, n_samples, batch_size):
+        # normalized gamma variates are Dirichlet distributed
+        wt = rng.standard_gamma(concentration, (min(batch_size, n_samples - start), len(mean)))
+        wt /= wt.sum(axis=1, keepdims=True)
+        front.add(wt, *evaluate_portfolios(wt, mean, covMatrix))
+    return front
+
+
+# Monte Carlo alternative to the grid: sample n_samples random long-only weightings of a list of stocks and
+# keep the Pareto-efficient ones. The samples are split into tasks of task_size, each with its own child of
+# SeedSequence(seed), so the result is reproducible whatever the number of workers or order of completion.
+def sample_frontier(ticks, time_range, n_samples, seed=0, task_size=1000000, batch_size=100000,
+                    concentration=1.0, max_workers=None):
+
+    matrices = get_portfolio_matrices(ticks, time_range)
+    sizes = [min(task_size, n_samples - start) for start in range(0, n_samples, task_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    front = ParetoFront(len(ticks))
+    if max_workers == 1:
+        _init_sampler(matrices['mean'], matrices['cov'])
+        for task_seed, size in zip(seeds, sizes):
+            front.merge(_sample_task(task_seed, size, batch_size, concentration))
+        return front
+    with ProcessPoolExecutor(max_workers, initializer=_init_sampler,
+                             initargs=(matrices['mean'], matrices['cov'])) as pool:
+        tasks = [pool.submit(_sample_task, task_seed, size, batch_size, concentration)
+                 for task_seed, size in zip(seeds, sizes)]
+        for task in as_completed(tasks):
+            front.merge(task.result())
+    return front
+
+
 class Stock:  # relevant information for stocks
 
     def __init__(self, tick, mean, sDev, weight):
@@ -129,56 +429,59 @@ class Stock:  # relevant information for stocks
 
 # ========================================== DRIVER CODE =============================================================
 
-# create array and dictionary of stock tickers
-stockNames = stockInput.split(", ")
-portfolio = {}
-
-resolution_scale = float(1/resolution)        # scaling factor to put final weighting into range [0, 1]
-
-i = 0
-for i in range(len(stockNames)):
-    portfolio[i] = stockNames[i]
-
-# populate stock objects using defined functions
-k = 0
-for k in range(len(stockNames)):
+if __name__ == "__main__":
+    # create array and dictionary of stock tickers
+    stockNames = stockInput.split(", ")
+    portfolio = {}
 
-    portfolio[k] = Stock(tick=stockNames[k], mean=getMean(stockNames[k]),
-                         sDev=getsDev(stockNames[k]), weight=0)
-
-# get list of weights
-weightsList = list(weights(len(portfolio), resolution))
-
-# dataframe to store risk vs return results
-risk_return = np.array([[0.0]*2]*len(weightsList))
-
-# list to store markers for graph
-weight_markers = [[0.0]*len(portfolio)]*len(weightsList)
-
-# try all different weightings to generate portfolio risk and reward
-i = 0
-for i in range(len(weightsList)):
-    j = 0
-    for j in range(len(portfolio)):        # define a portfolio weighting
-        portfolio[j].weight = weightsList[i][j]        # define stock weighting
-
-    weight_markers[i] = weightsList[i]       # get weighting marker
-
-    risk_return[i][0] = portfolio_risk(portfolio, time_range)        # assign risk according to given weight matrix
-    risk_return[i][1] = portfolio_return(portfolio)                 # assign return
-
-weight_markers = np.array(weight_markers)*resolution_scale
+    i = 0
+    for i in range(len(stockNames)):
+        portfolio[i] = stockNames[i]
+
+    # populate stock objects using defined functions
+    k = 0
+    for k in range(len(stockNames)):
+
+        portfolio[k] = Stock(tick=stockNames[k], mean=getMean(stockNames[k]),
+                             sDev=getsDev(stockNames[k]), weight=0)
+
+    if solver == "cla":
+        # trace the efficient frontier and mark its minimum-variance and maximum-Sharpe portfolios
+        cla = efficient_frontier(stockNames, time_range)
+        weight_matrix, risk, ret = cla.frontier(frontier_points)
+        min_w, min_risk, min_ret = cla.min_variance()
+        sharpe_w, sharpe_risk, sharpe_ret = cla.max_sharpe(RFRR/252)   # daily risk-free return (%)
+
+        plt.plot(risk, ret, c='#ff0000')
+        plt.scatter([min_risk, sharpe_risk], [min_ret, sharpe_ret], c='#0000ff', marker='o')
+        plt.annotate("min variance", xy=(min_risk, min_ret))
+        plt.annotate("max Sharpe", xy=(sharpe_risk, sharpe_ret))
+        plt.title(stockNames)
+        plt.xlabel("Portfolio Risk")
+        plt.ylabel("Portfolio Return")
+        for name, w in (("min variance", min_w), ("max Sharpe", sharpe_w)):
+            print(name, {stockNames[i]: round(w[i], 4) for i in np.flatnonzero(w > 1e-6)})
+        plt.show()
 
-# FINALLY plot risk vs reward for all permuted portfolio weightings
-fig = plt.figure()
-ax = fig.add_subplot(111)
-plt.scatter(risk_return[:, 0], risk_return[:, 1], s=None, c='#ff0000', marker='.')
-plt.title(stockNames)
-plt.xlabel("Portfolio Risk")
-plt.ylabel("Portfolio Return")
-k = 0
-for i, j in zip(risk_return[:, 0], risk_return[:, 1]):
-    ax.annotate(weight_markers[k], xy=(i, j))
-    k += 1
-plt.show()
+    else:
+        fig = plt.figure()
+        ax = fig.add_subplot(111)
+        if solver == "monte carlo":
+            # only the efficient samples are kept
+            front = sample_frontier(stockNames, time_range, samples)
+        else:
+            # evaluate all weightings in chunks, plotting each chunk and keeping its efficient weightings
+            front = ParetoFront(len(stockNames))
+            for wt, risk, ret in frontier_chunks(stockNames, time_range, resolution):
+                plt.scatter(risk, ret, s=None, c='#ff0000', marker='.')
+                front.add(wt, risk, ret)
+
+        # FINALLY plot risk vs reward, annotating the weightings on the frontier only
+        plt.plot(front.risk, front.ret, c='#0000ff', marker='.')
+        plt.title(stockNames)
+        plt.xlabel("Portfolio Risk")
+        plt.ylabel("Portfolio Return")
+        for k in range(len(front.risk)):
+            ax.annotate(np.round(front.weights[k], 2), xy=(front.risk[k], front.ret[k]))
+        plt.show()
 
@@ -1,4 +1,6 @@
 from StockGetFunctions import get_attr_history
+from TopStockInfo import simple_moving_average
+from Metrics import metrics
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -8,117 +10,113 @@ start = "2018-01-01"
 end = "2020-01-01"
 interval = "1d"
 
-# get time series from yfinance and choose starting values for portfolio
-
-close_hist = get_attr_history(ticker, "Close", start, end, interval)
+# choose starting values for portfolio and trading parameters
 cash = 500.0
 portfolio = 500.0
-
-
-# calculate a moving average from a time series, at a current date and for a chosen time interval
-def running_ma(time_series, current_date, ma_period):
-
-    ma = time_series[current_date - ma_period : current_date].mean()
-
-    return ma
-
-
-# wallet class to store portfolio values
-class Wallet:
-    cash = cash
-    holdings = portfolio
-
-
-# buy an amt in cash to holdings
-def buy(amt):
-    if Wallet.cash > amt:   # if funds are sufficient, move cash into stock holdings
-        Wallet.cash -= amt
-        Wallet.holdings += amt
-    else:                   # else sell as much as is available (this might be a bad idea)
-        amt = Wallet.cash
-        Wallet.cash -= amt
-        Wallet.holdings += amt
-
-
-# sell an amt from holdings to generate cash
-def sell(amt):
-    if Wallet.holdings > amt:   # if holdings are sufficient, sell amt to generate cash
-        Wallet.cash += amt
-        Wallet.holdings -= amt
-    else:                       # else sell as much stock as possible
-        amt = Wallet.holdings
-        Wallet.cash += amt
-        Wallet.holdings -= amt
-
-
-# update holdings value at start of day
-def update(time_series, current_date):
-    Wallet.holdings = Wallet.holdings * time_series[current_date]/time_series[current_date - 1]
+amt = 10                # trading unit
+ma_short_interval = 7   # interval of the short-term moving average
+ma_long_interval = 30   # interval of the long-term moving average
+
+
+# days x windows matrix of the moving average of each interval in windows
+def moving_average_table(close, windows):
+    return np.column_stack([simple_moving_average(close, k) for k in windows])
+
+
+# simulate mean reversion trading of one price series for a batch of configurations at once.
+# ma_short, ma_long and amt are scalars or arrays that broadcast to the batch (one configuration each), and
+# every configuration starts with the same cash and holdings. Each day, holdings are first updated with the
+# change in price since the previous day, then when the short MA is below the long MA,
+# amt*(MA_long - MA_short)^2/MA_long of cash is moved into holdings (or all the cash if there is less), and
+# when it is above, the same amount of holdings is sold (or all of them).
+# ma_table = (windows, days x windows MA matrix) gives precomputed MAs, e.g. rows of MAs over a longer history
+# when close is a window of it, and previous_close is the price before the first day.
+# returns (cash history, holdings history), both days x configurations arrays.
+def mean_reversion_backtest(close, ma_short, ma_long, amt, cash=500.0, holdings=500.0, ma_table=None,
+                            previous_close=None):
+
+    close = np.asarray(close, dtype=float)
+    ma_short, ma_long, amt = np.broadcast_arrays(np.atleast_1d(ma_short), np.atleast_1d(ma_long),
+                                                 np.atleast_1d(amt).astype(float))
+    # moving averages of the prices before each day, computed once per distinct interval
+    if ma_table is None:
+        windows = np.unique(np.concatenate((ma_short, ma_long)))
+        ma_table = (windows, moving_average_table(close, windows))
+    windows, ma = ma_table
+    missing = np.setdiff1d(np.concatenate((ma_short, ma_long)), windows)
+    if len(missing):
+        raise ValueError(f"moving average intervals {missing.tolist()} are not in ma_table")
+    short_column = np.searchsorted(windows, ma_short)
+    long_column = np.searchsorted(windows, ma_long)
+    # price change since the previous day. Without a previous price for the first day (as in the original
+    # day-by-day script, which indexed the price series at -1) the change from the last price is used.
+    growth = close/np.roll(close, 1)
+    if previous_close is not None:
+        growth[0] = close[0]/previous_close
+
+    cash = np.full(len(amt), cash, dtype=float)
+    holdings = np.full(len(amt), holdings, dtype=float)
+    cash_history = np.empty((len(close), len(amt)))
+    holdings_history = np.empty((len(close), len(amt)))
+    for i in range(len(close)):
+        holdings *= growth[i]
+        ma_s = ma[i, short_column]
+        ma_l = ma[i, long_column]
+        amt_temp = amt*(ma_l - ma_s)**2/ma_l    # increase amt proportional to distance from mean
+        # no trades while the MAs are warming up (NaN compares false)
+        bought = np.where(ma_s < ma_l, np.minimum(amt_temp, cash), 0.0)
+        sold = np.where(ma_s > ma_l, np.minimum(amt_temp, holdings), 0.0)
+        cash += sold - bought
+        holdings += bought - sold
+        cash_history[i] = cash
+        holdings_history[i] = holdings
+
+    return cash_history, holdings_history
 
 
 # TESTING:
 
-# initialise parameters and arrays
-undervalued = True
-portfolio_history = np.zeros(shape=(2, len(close_hist), 2))
-ma_history = np.zeros(shape=(2, len(close_hist)))
-amt = 10
-amt_temp = amt      # temp variable for changing amt if necessary
-
-# step through time series element-wise
-for i in range(len(close_hist)):
-
-    # update value of holdings based on change since previous period
-    update(close_hist, i)
-    # compute both moving averages
-    ma_long = running_ma(close_hist, i, 30)
-    ma_short = running_ma(close_hist, i, 7)
-
-    # increase amt proportional to distance from mean
-    amt_temp = amt * (ma_long - ma_short)**2 / ma_long
-
-    # mean reversion: if 30d MA < 90d MA, assume stock is undervalued and buy.
-    # if 30d MA > 90d MA, assume stock is overvalued and sell.
-    # occurs once per day, after price has been updated.
-    if ma_short < ma_long:
-        buy(amt_temp)
-    elif ma_short > ma_long:
-        sell(amt_temp)
-
-    # populate history arrays for plotting
-    ma_history[0][i] = ma_short
-    ma_history[1][i] = ma_long
-    portfolio_history[0][i] = Wallet.cash
-    portfolio_history[1][i] = Wallet.holdings
-
-# print main results:
-total_portfolio = portfolio_history[:][0] + portfolio_history[:][1]
-portfolio_end = total_portfolio[-1][0]
-portfolio_start = total_portfolio[0][0]
-
-portfolio_return = round(portfolio_end/portfolio_start * 100, 2)
-cash_percent = round(portfolio_history[0][-1][0]/portfolio_end * 100, 2)
-equity_percent = 100 - cash_percent
-stock_return = round(close_hist[-1]/close_hist[0] * 100, 2)
-print(f"{ticker} market returns from {start} to {end}:\n{stock_return}%\n"
-      f"Portfolio returns:\n{portfolio_return}%"
-      f"\nWith {cash_percent}% of portfolio in cash and "
-      f"{equity_percent}% in stocks at {end}")
-
-# plot results with matplotlib.pyplot
-fig, a = plt.subplots(2, 2)
-
-a[0][0].plot(np.arange(0, len(close_hist)), ma_history[:][0], 'r')
-a[0][0].plot(np.arange(0, len(close_hist)), ma_history[:][1], 'b')
-a[0][0].plot(np.arange(0, len(close_hist)), close_hist, 'k')
-a[0][0].set_title("Moving Averages Over Price History")
-a[0][1].plot(np.arange(0, len(close_hist)), portfolio_history[:][0] + portfolio_history[:][1], 'k')
-a[0][1].set_title("Total Portfolio Value")
-a[1][0].plot(np.arange(0, len(close_hist)), portfolio_history[:][0], 'r')
-a[1][0].set_title("Cash")
-a[1][1].plot(np.arange(0, len(close_hist)), portfolio_history[:][1], 'r')
-a[1][1].set_title("Equity Holdings")
-
-fig.suptitle(f"Plotted results for mean reversion trading of {ticker} from {start} to {end}\n"
-             f"With trading unit of ${amt} and sampling period of {interval}")
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    # get time series from yfinance
+    close_hist = get_attr_history(ticker, "Close", start, end, interval)
+    close = close_hist.to_numpy()
+
+    # simulate the single configuration
+    cash_history, holdings_history = mean_reversion_backtest(close, ma_short_interval, ma_long_interval, amt,
+                                                             cash, portfolio)
+    cash_history, holdings_history = cash_history[:, 0], holdings_history[:, 0]
+    ma_history = [simple_moving_average(close, ma_short_interval), simple_moving_average(close, ma_long_interval)]
+
+    # print main results:
+    total_portfolio = cash_history + holdings_history
+    portfolio_end = total_portfolio[-1]
+    portfolio_start = total_portfolio[0]
+
+    portfolio_return = round(portfolio_end/portfolio_start * 100, 2)
+    cash_percent = round(cash_history[-1]/portfolio_end * 100, 2)
+    equity_percent = 100 - cash_percent
+    stock_return = round(close[-1]/close[0] * 100, 2)
+    print(f"{ticker} market returns from {start} to {end}:\n{stock_return}%\n"
+          f"Portfolio returns:\n{portfolio_return}%"
+          f"\nWith {cash_percent}% of portfolio in cash and "
+          f"{equity_percent}% in stocks at {end}")
+    # risk-adjusted performance of the strategy against holding the stock
+    print(metrics(np.column_stack((total_portfolio, close))).set_axis(["Portfolio", ticker]).round(3).to_string())
+
+    # plot results with matplotlib.pyplot
+    fig, a = plt.subplots(2, 2)
+
+    a[0][0].plot(np.arange(0, len(close)), ma_history[0], 'r')
+    a[0][0].plot(np.arange(0, len(close)), ma_history[1], 'b')
+    a[0][0].plot(np.arange(0, len(close)), close, 'k')
+    a[0][0].set_title("Moving Averages Over Price History")
+    a[0][1].plot(np.arange(0, len(close)), total_portfolio, 'k')
+    a[0][1].set_title("Total Portfolio Value")
+    a[1][0].plot(np.arange(0, len(close)), cash_history, 'r')
+    a[1][0].set_title("Cash")
+    a[1][1].plot(np.arange(0, len(close)), holdings_history, 'r')
+    a[1][1].set_title("Equity Holdings")
+
+    fig.suptitle(f"Plotted results for mean reversion trading of {ticker} from {start} to {end}\n"
+                 f"With trading unit of ${amt} and sampling period of {interval}")
+    plt.show()
@@ -0,0 +1,67 @@
+import os
+import numpy as np
+import pandas as pd
+from PricePanel import PricePanel
+from Baskets import BasketEngine
+from Ledger import EVENT_DTYPE
+
+# Saved state of Portfolio Info.py between runs, in a directory holding the valued panel with the capital
+# invested, the ledger events it was built from and the closes of its last days (panel.npz), and the basket
+# engine (baskets.npz). A snapshot is only reused for the same settings (its key), and only while the ledger
+# events up to its last date and the closes of its last days are unchanged; otherwise the portfolio is rebuilt
+# from scratch (see Valuation.py).
+
+
+# closes is a dates x tickers DataFrame of the last days' closes, including tickers that aren't in the panel
+# (basket constituents, FX rates)
+def save_snapshot(directory, key, panel, capital, events, engine, closes):
+    os.makedirs(directory, exist_ok=True)
+    np.savez(os.path.join(directory, "panel.npz"), key=np.array(key), dates=np.asarray(panel.dates, dtype='M8[ns]'),
+             tickers=np.array(panel.tickers), fields=np.array(panel.fields), values=panel.values, capital=capital,
+             event_date=events['date'], event_ticker=events['ticker'].astype(str), event_shares=events['shares'],
+             event_capital=events['capital'], close_dates=np.asarray(closes.index, dtype='M8[ns]'),
+             close_tickers=np.array(closes.columns, dtype=str), close_values=closes.to_numpy(dtype=float))
+    engine.save(os.path.join(directory, "baskets.npz"))
+
+
+# (panel, capital, events, basket engine, closes) of a snapshot, or None if there is none for this key
+def load_snapshot(directory, key, baskets, tickers):
+    if directory is None or not os.path.exists(os.path.join(directory, "panel.npz")):
+        return None
+    with np.load(os.path.join(directory, "panel.npz")) as state:
+        if str(state['key']) != key or 'close_values' not in state:    # (or saved before closes were)
+            return None
+        panel = PricePanel(state['dates'], state['tickers'].tolist(), state['fields'].tolist(), state['values'])
+        capital = state['capital']
+        events = np.empty(len(state['event_date']), dtype=EVENT_DTYPE)
+        events['date'] = state['event_date']
+        events['ticker'] = state['event_ticker'].astype(object)
+        events['shares'] = state['event_shares']
+        events['capital'] = state['event_capital']
+        closes = pd.DataFrame(state['close_values'], index=pd.DatetimeIndex(state['close_dates']),
+                              columns=state['close_tickers'].tolist())
+    engine = BasketEngine.load(os.path.join(directory, "baskets.npz"), baskets, tickers)
+    return panel, capital, events, engine, closes
+
+
+# whether the events on or before a date differ from those a snapshot was built from (a back-dated trade,
+# or an edited or deleted one)
+def ledger_changed(saved, events, last_date):
+    last_date = np.datetime64(pd.Timestamp(last_date).date(), 'D')
+    saved = saved[saved['date'] <= last_date]
+    events = events[events['date'] <= last_date]
+    return not (len(saved) == len(events) and np.array_equal(saved['date'], events['date'])
+                and np.array_equal(saved['ticker'], events['ticker'])
+                and np.array_equal(saved['shares'], events['shares'])
+                and np.array_equal(saved['capital'], events['capital']))
+
+
+# whether closes fetched again for dates of saved closes differ from them (a close appearing or disappearing
+# counts too), e.g. when a provider revises a close or adjusts history for a split or dividend
+def prices_revised(saved, prices, rtol=1e-6):
+    dates = saved.index.intersection(prices.index)
+    tickers = saved.columns.intersection(prices.columns)
+    if not len(dates):
+        return False
+    return not np.allclose(prices.loc[dates, tickers].to_numpy(dtype=float),
+                           saved.loc[dates, tickers].to_numpy(dtype=float), rtol=rtol, equal_nan=True)
@@ -1,46 +1,71 @@
-import yfinance as yf
+import os
 import pandas as pd
 import numpy as np
 import datetime as dt
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from PriceCache import PriceCache, DEFAULT_CACHE_DIR, naive_index, align_index
+from DataProviders import YahooProvider
+from BlockStats import block_stats
+
+# shared on-disk price cache of Yahoo Finance data (see PriceCache.py)
+price_cache = PriceCache(fetch=YahooProvider())
+# source of every history request in this module: the price cache, or any provider set with set_provider
+market_data = price_cache
+
+
+# switch the data source of this module to another provider (see DataProviders.py), e.g. a ReplayProvider or
+# SyntheticProvider for offline tests. With cache=True, its histories are cached in their own cache folder.
+def set_provider(provider, cache=False):
+    global market_data
+    if cache:
+        market_data = PriceCache(os.path.join(DEFAULT_CACHE_DIR, provider.name), fetch=provider)
+    else:
+        market_data = provider
+    return market_data
+
+
+# the download function behind market_data, skipping the cache: for requests that must see the provider's
+# current prices, e.g. checking cached prices for revisions. It can be passed to get_panel as fetch.
+def uncached_fetch():
+    return market_data.fetch if isinstance(market_data, PriceCache) else market_data
+
+
+# drop the cached histories of tickers so they are downloaded again (nothing to do without a cache)
+def clear_cache(ticks, interval="1d"):
+    if isinstance(market_data, PriceCache):
+        for tick in ticks:
+            market_data.clear(tick, interval)
 
 
 # gets stock attribute over a history
 # e.g. Open    High    Low    Close   Volume   Dividends   Splits
 def get_attr_history(tick, attribute, start, end, interval):
 
-    ticker = yf.Ticker(tick)  # get yf ticker from input
-    return pd.Series(ticker.history(start=start, end=end, interval=interval)[attribute])
+    # answered from the local cache where possible, only missing date spans are downloaded
+    return pd.Series(market_data.history(tick, start, end, interval)[attribute])
 
 
 # gets daily (close-open) as a percentage over a history
 def get_delta_history(tick, time_range):
 
-    ticker = yf.Ticker(tick)    # get yf ticker from input
-    ticker_hist = ticker.history(period=time_range)    # generate history of ticker
-    closeList = ticker_hist['Close']    # get close values from history
-    openList = ticker_hist['Open']      # get open values from history
-
-    deltaList = [0]*int(len(closeList))  # initialise list of deltas
+    ticker_hist = market_data.history(tick, period=time_range)    # generate history of ticker
+    closeList = ticker_hist['Close'].to_numpy()     # get close values from history
+    openList = ticker_hist['Open'].to_numpy()       # get open values from history
 
-    j = 0
-    for j in range(len(deltaList)):     # calculate bi-monthly price delta % over history
-        deltaList[j] = (1 - openList[j]/closeList[j])*100
+    deltaList = (1 - openList/closeList)*100        # calculate price delta % over history
 
-    return pd.Series(deltaList)    # convert list into panda series
+    return pd.Series(deltaList)    # convert array into panda series
 
 
-# gets history of volatility (calculated as SDev) of a stock on a monthly basis
+# gets history of volatility (calculated as SDev of close values) of a stock in each calendar month
 def get_month_volatility(tick, time_range):
 
-    close_hist = np.array(get_attr_history(tick, 'Close', time_range))  # get close history
-    volatility_hist = [0]*int(len(close_hist)/30)    # initialise array for volatility history
-
-    for i in range(int(len(close_hist)/30)):        # calculate standard deviation for each month in history
-        month_values = close_hist[i*30 : (i+1)*30]
-        month_values = pd.Series(month_values)
-        volatility_hist[i] = month_values.std()
+    ticker_hist = market_data.history(tick, period=time_range)    # generate history of ticker
+    close_hist = pd.Series(ticker_hist['Close'].to_numpy(), index=naive_index(ticker_hist.index))
 
-    return pd.Series(volatility_hist)
+    return block_stats(close_hist, freq='M')['std']
 
 
 # gets (close_i - close_(i-1)) of a stock from a start to end date (YYYY-MM-DD)
@@ -49,22 +74,122 @@ def get_stock_change(tick, start, end):
     # format start and end dates to allow for operators
     start1 = dt.datetime.strptime(start, '%Y-%m-%d')
     end1 = dt.datetime.strptime(end, '%Y-%m-%d')
-    # get start and end one day earlier
-    start2 = dt.datetime.strptime(start, '%Y-%m-%d') - dt.timedelta(days=1)
-    end2 = dt.datetime.strptime(end, '%Y-%m-%d') - dt.timedelta(days=1)
+    # get history from a week earlier so that the first day in range also has a previous close
+    start2 = start1 - dt.timedelta(days=7)
 
-    # get series for day i and day i - 1
-    ticker = yf.Ticker(tick)  # get yf ticker from input
-    close_hist_i = np.array(ticker.history(start=start1, end=end1)["Close"])
-    close_hist_im1 = np.array(ticker.history(start=start2, end=end2)["Close"])
-    close_change = np.subtract(close_hist_i, close_hist_im1)
+    # get series for day i and day i - 1 (previous trading day)
+    ticker_hist = market_data.history(tick, start2, end1)
+    close_hist_i = ticker_hist["Close"].to_numpy()
+    close_hist_im1 = np.roll(close_hist_i, 1)
+    in_range = naive_index(ticker_hist.index) >= start1
+    in_range[:1] = False    # the first bar has no previous close
 
-    close_change = np.array([100*(close_hist_i[i] - close_hist_im1[i])/close_hist_i[i] for i in range(len(close_hist_i))])
+    close_change = (100*(close_hist_i - close_hist_im1)/close_hist_i)[in_range]
     change_mean = np.average(close_change)
     change_sdev = np.std(close_change)
     # get dates array
-    dates = np.array([start1 + dt.timedelta(days=i) for i in range(len(close_hist_i))])
+    dates = naive_index(ticker_hist.index)[in_range]
 
-    # get stock change series
     return [pd.DataFrame(close_change, index=dates), change_mean, change_sdev]
 
+
+# ========= concurrent multi-ticker downloads ======================== #
+
+# token bucket shared by all worker threads of a download so that requests never exceed `rate` per second
+class RateLimiter:
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    # block until a request may be made
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last)*self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens)/self.rate
+            time.sleep(wait)
+
+
+# requests currently being downloaded, so identical requests made at the same time share one download
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+# fetch a ticker's history, retrying with exponential backoff if the download fails
+def _fetch_with_retries(fetch, tick, start, end, interval, retries, limiter, backoff):
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fetch(tick, start, end, interval)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2**attempt)
+
+
+# fetch a ticker's history, or wait on the result of an identical request that is already in flight
+def _fetch_once(fetch, tick, start, end, interval, retries, limiter, backoff):
+    key = (fetch, tick, str(start), str(end), interval)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _in_flight[key] = future
+    if not owner:
+        return future.result()
+
+    try:
+        result = _fetch_with_retries(fetch, tick, start, end, interval, retries, limiter, backoff)
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+
+# gets attribute histories for many tickers at once, downloading them concurrently on a bounded pool.
+# returns one DataFrame aligned on date: columns are tickers for a single attribute (e.g. "Close"),
+# or (attribute, ticker) pairs for a list of attributes.
+# fetch(tick, start, end, interval) -> OHLCV DataFrame defaults to the module's market data source.
+def get_panel(tickers, attributes, start, end, interval="1d", max_workers=8, retries=2, rate_limit=None,
+              fetch=None, backoff=0.5):
+
+    fetch = fetch or market_data.history
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+    unique_tickers = list(dict.fromkeys(tickers))      # drop repeated tickers, keeping order
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {tick: pool.submit(_fetch_once, fetch, tick, start, end, interval, retries, limiter, backoff)
+                   for tick in unique_tickers}
+        histories = {tick: future.result() for tick, future in futures.items()}
+
+    attribute_list = [attributes] if isinstance(attributes, str) else list(attributes)
+    columns = {}
+    for attribute in attribute_list:
+        for tick in unique_tickers:
+            hist = histories[tick]
+            if attribute in hist:
+                series = pd.Series(hist[attribute].to_numpy(), index=align_index(hist.index, interval))
+                columns[(attribute, tick)] = series[~series.index.duplicated(keep='last')]
+            else:   # no data returned for this ticker
+                columns[(attribute, tick)] = pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+    panel = pd.concat(columns, axis=1).sort_index()
+
+    if isinstance(attributes, str):
+        panel.columns = panel.columns.droplevel(0)
+    return panel
+
@@ -15,94 +15,229 @@ MA_interval = 14      # interval for MA calcs in days
 
 # ========= calculated global variables ============================== #
 
-close_hist = get_attr_history(ticker, "Close", start, end, interval)
 # dictionary to map string interval to int interval in days
 interval_dict = {'1d': 1, '5d': 5, '1wk': 7, '1mo': 30, '3mo': 91}
+# only download when run as a script, so that the indicators can be imported without network access
+if __name__ == "__main__":
+    close_hist = get_attr_history(ticker, "Close", start, end, interval)
 
 # ==================================================================== #
 
 
+# Every indicator accepts a pandas Series (one ticker), or a dates x tickers DataFrame or numpy matrix to
+# compute all tickers in one vectorized pass, and returns the same type. Columns may start at different
+# dates (NaN before listing): each column's warm-up starts at its first price, and later gaps are
+# forward-filled.
+
+
 # get moving average of price history over an interval in days
-# calculated as MA = sum(values)/#periods
+# calculated as MA = sum(values)/#periods over the MA_interval periods before each day
 def simple_moving_average(close_history, MA_interval):
-    SMA = close_history.copy()      # create copy of hist to init SMA
 
-    # calculate MA array
-    i = 0
-    while i < MA_interval:
-        SMA[i] = 'NaN'      # don't plot values until SMA can be properly calculated
-        i += 1
-    while i in range(MA_interval, len(SMA)):
-        SMA[i] = close_history[i - MA_interval : i].sum()/MA_interval
-        i += 1
-
-    return SMA
+    return _apply(_sma_values, close_history, MA_interval)
 
 
 # get exponential moving average over interval in days
 # 12- and 26-day for short term, 50- and 200-day for longer term
 # smoothing = 2 by default. Increasing weights recent pricing more.
 def exp_moving_average(close_history, MA_interval, smoothing_factor):
-    SF = smoothing_factor               # smoothing factor
-    f = SF/(1 + MA_interval)            # pre-calculated EMA factor
-    EMA = close_history.copy()          # create copy of hist to init EMA
-
-    # calculate MA array
-    i = 0
-    while i < MA_interval:
-        EMA[i] = 'NaN'      # don't plot values until EMA can be properly calculated
-        i += 1
-    EMA[MA_interval] = simple_moving_average(close_history, MA_interval)[MA_interval]   # get start value
-    i += 1
-    while i in range(MA_interval+1, len(EMA)):
-        EMA[i] = close_history[i]*f + EMA[i-1]*(1-f)        # get EMA values until end of period
-        i += 1
 
-    return EMA
+    return _apply(_ema_values, close_history, MA_interval, smoothing_factor)
 
 
 # gets moving average convergence/divergence
 def MA_converge_diverge(close_history):
-    close_hist = close_history.copy()
 
-    EMA12 = exp_moving_average(close_hist, 12, 2)
-    EMA26 = exp_moving_average(close_hist, 26, 2)
+    EMA12 = exp_moving_average(close_history, 12, 2)
+    EMA26 = exp_moving_average(close_history, 26, 2)
 
-    MACD = EMA12.subtract(EMA26)
+    MACD = EMA12 - EMA26
 
     return MACD
 
 
-# gets the stochastic oscillator
-def stochastic_oscillator(close_history):
-    SO = close_history.copy()  # init SO array
+# gets the stochastic oscillator %K: where the latest close sits in the high-low range of the `window`
+# periods before each day, as a percentage. The range comes from High/Low histories when they are given,
+# otherwise from closes. A flat range (high == low) gives 50 rather than dividing by zero.
+def stochastic_oscillator(close_history, window=14, high_history=None, low_history=None):
+    high = None if high_history is None else _matrix(high_history)
+    low = None if low_history is None else _matrix(low_history)
 
-    for i in range(0, 15):
-        SO[i] = 'NaN'
-        i += 1
+    return _apply(_stochastic_values, close_history, high, low, window)
 
-    for i in range(15, len(close_history)): # compute SO for each day
-        C = close_history[i-1]      # latest close
-        L14 = close_history[i - 14:i].min()     # 14-day high
-        H14 = close_history[i - 14:i].max()     # 14-day low
-        SO[i] = ((C-L14)/(H14-L14))*100
-        i += 1
 
-    return SO
+# gets the stochastic oscillator %K and %D, the d_window moving average of %K
+def stochastic_kd(close_history, window=14, d_window=3, high_history=None, low_history=None):
+    K = stochastic_oscillator(close_history, window, high_history, low_history)
+    D = _apply(_rolling_mean_values, K, d_window)
+
+    return [K, D]
 
 
 # gets moving volatility (standard deviation) over an interval
 def moving_volatility(close_history, MA_interval):
-    MsDev = close_history.copy()
 
-    i = 0
-    while i < MA_interval:
-        MsDev[i] = 'NaN'  # don't plot values until sDev can be properly calculated
-        i += 1
+    return _apply(_volatility_values, close_history, MA_interval)
+
+
+# ========= array kernels ============================================ #
+# Each kernel is O(n) over a dates x tickers matrix and keeps the warm-up of the original loops: values
+# before index MA_interval (counted from each column's first price) are NaN, and the value at index i only
+# uses prices before i.
+
+# history as a 2-D float matrix (a single series becomes one column)
+def _matrix(history):
+    values = np.asarray(history, dtype=float)
+    return values.reshape(len(values), -1)
+
+
+# run a kernel on a Series, DataFrame or numpy array, and return the result as the same type
+def _apply(kernel, history, *args):
+    result = kernel(_matrix(history), *args)
+    if isinstance(history, pd.DataFrame):
+        return pd.DataFrame(result, index=history.index, columns=history.columns)
+    if isinstance(history, pd.Series):
+        return pd.Series(result[:, 0], index=history.index, name=history.name)
+    if np.ndim(history) == 1:
+        return result[:, 0]
+    return result
+
+
+# panels at least this wide are stepped through row by row (vectorized across tickers) instead of column
+# by column with pandas
+WIDE_PANEL = 64
+
+
+# forward-fill gaps in each column, and find each column's first priced row
+def _prepare(values):
+    n, m = values.shape
+    missing = np.isnan(values)
+    if not missing.any():
+        return values, np.zeros(m, dtype=int)
+    valid = ~missing
+    first = np.where(valid.any(axis=0), valid.argmax(axis=0), n)
+    gaps = missing.sum(axis=0) > first      # columns with missing prices after their first price
+    if gaps.any():
+        values = values.copy()
+        values[:, gaps] = pd.DataFrame(values[:, gaps]).ffill().to_numpy()
+    return values, first
+
+
+# mask of rows that are still in each column's warm-up of k periods
+def _warming_up(first, n, k):
+    return np.arange(n)[:, None] < (first + k)[None, :]
+
+
+# windowed sums of values[i-k:i] and of their squares, from differences of cumulative sums of deviations from
+# each column's first price (which keeps the sums small). Returns the first price, and sums for rows k..n-1.
+def _window_sums(values, first, k, squares=False):
+    n, m = values.shape
+    shift = values[np.minimum(first, n - 1), np.arange(m)]
+    deviations = values - shift
+    np.copyto(deviations, 0.0, where=np.isnan(deviations))     # rows before listing add nothing
+    csum = np.zeros((n + 1, m))
+    np.cumsum(deviations, axis=0, out=csum[1:])
+    sums = csum[k:n] - csum[:n - k]
+    if not squares:
+        return shift, sums, None
+    np.cumsum(deviations**2, axis=0, out=csum[1:])
+    return shift, sums, csum[k:n] - csum[:n - k]
+
+
+# SMA[i] = mean(values[i-k:i]) from differences of a cumulative sum
+def _sma_values(values, k):
+    values, first = _prepare(values)
+    n = len(values)
+    SMA = np.full(values.shape, np.nan)
+    if n > k:
+        shift, sums, _ = _window_sums(values, first, k)
+        SMA[k:] = sums/k + shift
+        SMA[_warming_up(first, n, k)] = np.nan
+    return SMA
+
+
+# EMA seeded with SMA[k] at index k, then EMA[i] = values[i]*f + EMA[i-1]*(1-f)
+def _ema_values(values, k, smoothing_factor):
+    values, first = _prepare(values)
+    n, m = values.shape
+    f = smoothing_factor/(1 + k)
+    seed = first + k
+    # start values: mean of each column's first k prices
+    seed_rows = np.minimum(first[None, :] + np.arange(k)[:, None], n - 1)
+    start = values[seed_rows, np.arange(m)[None, :]].mean(axis=0)
+
+    rows = np.arange(n)[:, None]
+    if m < WIDE_PANEL and 0 < f <= 1:
+        # the recursion is pandas' adjust=False ewm with alpha = f, which starts at each column's seed
+        x = np.where(rows > seed[None, :], values, np.nan)
+        x = np.where(rows == seed[None, :], start[None, :], x)
+        return pd.DataFrame(x).ewm(alpha=f, adjust=False).mean().to_numpy()
+
+    EMA = np.full((n, m), np.nan)
+    for i in range(min(seed.min(), n), n):     # columns before their seed stay NaN through the recursion
+        EMA[i] = values[i]*f + EMA[i - 1]*(1 - f)
+        seeded = seed == i
+        EMA[i, seeded] = start[seeded]
+    return EMA
 
-    while i in range(MA_interval, len(MsDev)):
-        MsDev[i] = close_history[i-MA_interval:i].std()
-        i += 1
 
+# sample standard deviation of values[i-k:i]. Narrow panels use pandas' rolling variance recurrence,
+# wide panels use windowed sums (with deviations from the first price keeping them well conditioned).
+def _volatility_values(values, k):
+    values, first = _prepare(values)
+    n, m = values.shape
+    MsDev = np.full((n, m), np.nan)
+    if n <= k or k < 2:
+        return MsDev
+    if m < WIDE_PANEL:
+        MsDev[1:] = pd.DataFrame(values[:-1]).rolling(k).std().to_numpy()
+        return MsDev
+    shift, sums, square_sums = _window_sums(values, first, k, squares=True)
+    MsDev[k:] = np.sqrt(np.maximum(square_sums - sums**2/k, 0.0)/(k - 1))
+    MsDev[_warming_up(first, n, k)] = np.nan
     return MsDev
 
+
+# mean of values[i-k+1 : i+1], i.e. including the current value (used to smooth %K into %D). This is the
+# SMA one row later, so the SMA is taken with the last row repeated and shifted back by one.
+def _rolling_mean_values(values, k):
+    return _sma_values(np.vstack((values, values[-1:])), k)[1:]
+
+
+# rolling max of values[j-w+1 : j+1] down each column (NaN before the first full window), in linear time
+# with the van Herk/Gil-Werman method: the column is cut into blocks of w, and every window is the max of a
+# block suffix and the next block's prefix. NaNs are ignored.
+def _rolling_max_values(values, w):
+    n, m = values.shape
+    M = np.full((n, m), np.nan)
+    if n >= w:
+        blocks = np.full((-(-n // w)*w, m), np.nan)
+        blocks[:n] = values
+        blocks = blocks.reshape(-1, w, m)
+        prefix = np.fmax.accumulate(blocks, axis=1).reshape(-1, m)
+        suffix = np.fmax.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, m)
+        M[w - 1:] = np.fmax(suffix[:n - w + 1], prefix[w - 1:n])
+    return M
+
+
+def _rolling_min_values(values, w):
+    return -_rolling_max_values(-values, w)
+
+
+# SO[i] = (C - L)/(H - L)*100 with C the close at i-1 and H, L the high and low of the window before i
+def _stochastic_values(close, high, low, window):
+    close, first = _prepare(close)
+    high = close if high is None else _prepare(high)[0]
+    low = close if low is None else _prepare(low)[0]
+    n = len(close)
+    SO = np.full(close.shape, np.nan)
+    if n > window:
+        H = _rolling_max_values(high, window)[window - 1:n - 1]
+        L = _rolling_min_values(low, window)[window - 1:n - 1]
+        C = close[window - 1:n - 1]
+        price_range = H - L
+        with np.errstate(invalid='ignore', divide='ignore'):
+            SO[window:] = np.where(price_range > 0, (C - L)/price_range*100, 50.0)
+        SO[window:][np.isnan(price_range) | np.isnan(C)] = np.nan
+        SO[_warming_up(first, n, window)] = np.nan
+    return SO
@@ -0,0 +1,96 @@
+import numpy as np
+from StockGetFunctions import get_panel, uncached_fetch, clear_cache
+from Ledger import ledger_positions
+from PricePanel import PricePanel
+from Currency import PanelConverter, register, ticker_currency, fx_rates
+from Baskets import BasketEngine
+from Snapshot import save_snapshot, load_snapshot, ledger_changed, prices_revised
+
+# Daily valuation of a portfolio of stocks and custom baskets from a ledger of trades, in a base currency (the
+# computation behind Portfolio Info.py). The valued panel can be saved as a snapshot, and a later valuation
+# carries on from it, only valuing the days since, while nothing before its last day has changed: the ledger
+# events up to that day, and the closes of its last few days (stocks, basket constituents and FX rates), which
+# are downloaded again to check for revisions.
+
+
+class Valuation:
+
+    def __init__(self, stocks, baskets, events, start, end, base_currency="ZAR"):
+        self.stocks = list(stocks)
+        self.baskets = list(baskets)
+        self.events = events
+        self.start = str(start)
+        self.end = str(end)
+        self.base_currency = base_currency
+        for basket in self.baskets:
+            register(basket.name, basket.currency)
+        # baskets are valued from their constituents, so download those too
+        self.listed = list(dict.fromkeys(self.stocks + [ticker for basket in self.baskets
+                                                        for ticker in basket.constituents]))
+        self.held = self.stocks + [basket.name for basket in self.baskets]
+        currencies = {ticker_currency(ticker)[0] for ticker in self.held} | {base_currency}
+        self.fx_tickers = [f"{currency}=X" for currency in sorted(currencies - {'USD'})]
+
+    # closes of the listed tickers and FX rates from a date, keeping the trading days of the first stock as the
+    # date index. fetch replaces the cached market data, e.g. with uncached_fetch().
+    def download(self, start_date, fetch=None):
+        prices = get_panel(self.listed + self.fx_tickers, "Close", start_date, self.end, fetch=fetch)
+        return prices[prices[self.stocks[0]].notna()]
+
+    # value the portfolio over a block of (adjusted) close prices of the listed tickers. Given the panel and
+    # capital of the days before the block, prices, holdings and capital carry on from its last day, and only
+    # the trades after that day are applied.
+    def value_block(self, prices, engine, previous=None, previous_capital=None):
+        # one dates x tickers array per field: quoted price, shares held, and price in the base currency
+        block = PricePanel(prices.index, self.held, fields=('price', 'shares', 'home'))
+        block['price'][:, :len(self.stocks)] = prices[self.stocks].to_numpy()
+
+        # baskets (e.g. DCX10, which has no data in yfinance) are computed from their constituents' prices
+        block['price'][:, len(self.stocks):] = engine.update(prices.index, prices[self.listed].to_numpy())
+
+        # fill in any existing nan values
+        block.ffill('price', None if previous is None else previous['price'][-1])
+
+        # convert quoted prices into the base currency (JSE stocks are quoted in ZAR cents, the rest in USD)
+        block['home'] = PanelConverter(block['price'], block.dates, self.held).convert(self.base_currency)
+
+        # holdings and capital from the transaction ledger
+        if previous is None:
+            block['shares'], block_capital = ledger_positions(self.events, block.dates, self.held, block['home'])
+        else:
+            later = self.events[self.events['date'] > np.datetime64(previous.dates[-1].date(), 'D')]
+            shares, block_capital = ledger_positions(later, block.dates, self.held, block['home'])
+            block['shares'] = shares + previous['shares'][-1]
+            block_capital = block_capital + previous_capital[-1]
+        return block, block_capital
+
+    # (panel, capital) from start to end, carrying on from the snapshot in snapshot_dir (if there is one for
+    # this key and nothing before its last day has changed), and saving the result as the next snapshot.
+    # overlap is the number of the snapshot's last days downloaded again to check for revised prices.
+    def value(self, snapshot_dir=None, key="", overlap=5):
+        snapshot = load_snapshot(snapshot_dir, key, self.baskets, self.listed)
+        if snapshot is not None:
+            panel, capital, saved_events, engine, closes = snapshot
+            # the bars after the snapshot, and its last few days again. These come from the provider rather than
+            # the cache, which would return the prices the snapshot was built from.
+            prices = self.download(str(panel.dates[-min(overlap, len(panel))].date()), uncached_fetch())
+            revised = prices_revised(closes, prices)
+            if ledger_changed(saved_events, self.events, panel.dates[-1]) or revised:
+                print("Ledger or prices changed before the last snapshot: rebuilding the portfolio")
+                snapshot = None
+                if revised:     # the cached histories and FX rates hold the old prices too
+                    clear_cache(self.listed + self.fx_tickers)
+                    fx_rates.clear()
+            else:
+                later = prices[prices.index > panel.dates[-1]]
+                if len(later):
+                    block, block_capital = self.value_block(later, engine, panel, capital)
+                    panel = panel.append(block)
+                    capital = np.concatenate((capital, block_capital))
+        if snapshot is None:
+            engine = BasketEngine(self.baskets, self.listed)
+            prices = self.download(self.start)
+            panel, capital = self.value_block(prices, engine)
+        if snapshot_dir is not None:
+            save_snapshot(snapshot_dir, key, panel, capital, self.events, engine, prices.iloc[-overlap:])
+        return panel, capital
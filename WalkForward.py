@@ -0,0 +1,139 @@
+from StockGetFunctions import get_panel
+import SimpleMeanReversion
+import MultiMeanReversion
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+# Walk-forward optimization of the mean-reversion strategies. The history is split into rolling folds of
+# in_sample days followed by out_of_sample days (each fold moves forward by out_of_sample days). On each fold
+# every configuration of the parameter grid is simulated over the in-sample days, the one with the best final
+# return is simulated over the out-of-sample days, and the out-of-sample equity curves are stitched together.
+# The indicators are computed once over the whole history and sliced for each window, so the folds share them
+# (and every window starts with MAs that are already warmed up on the prices before it).
+
+# ====== set global variables ======
+strategy = "multi"      # "simple" (SimpleMeanReversion on one ticker) or "multi" (MultiMeanReversion)
+start = "2008-01-01"
+end = "2020-01-01"
+in_sample = 504         # days to optimize on in each fold
+out_of_sample = 126     # days to trade the optimized parameters on
+# parameter grid of each strategy
+grids = {'simple': {'ma_short': range(3, 21), 'ma_long': range(20, 121, 10), 'amt': [5.0, 10.0, 20.0, 50.0]},
+         'multi': {'ma_long_interval': range(10, 101, 10), 'ma_short_interval': range(3, 31, 3),
+                   'trade_factor': [0.01, 0.02, 0.05, 0.1, 0.2]}}
+# ==================================
+
+
+# every configuration of a parameter grid, as one array per parameter
+def grid_configs(grid):
+    configs = list(product(*grid.values()))
+    return {name: np.array([config[k] for config in configs]) for k, name in enumerate(grid)}
+
+
+# SimpleMeanReversion on the first column of prices: the arrays shared by all folds
+def _simple_arrays(prices, configs):
+    close = prices[:, 0]
+    windows = np.unique(np.concatenate((configs['ma_short'], configs['ma_long'])))
+    return {'close': close, 'windows': windows, 'ma': SimpleMeanReversion.moving_average_table(close, windows)}
+
+
+# portfolio values of the configurations over days a..b-1 relative to the starting capital (days x configurations)
+def _simple_values(arrays, configs, a, b):
+    close = arrays['close']
+    cash_history, holdings_history = SimpleMeanReversion.mean_reversion_backtest(
+        close[a:b], configs['ma_short'], configs['ma_long'], configs['amt'], SimpleMeanReversion.cash,
+        SimpleMeanReversion.portfolio, (arrays['windows'], arrays['ma'][a:b]), close[max(a - 1, 0)])
+    return (cash_history + holdings_history)/(SimpleMeanReversion.cash + SimpleMeanReversion.portfolio)
+
+
+def _multi_arrays(prices, configs):
+    windows = np.unique(np.concatenate((configs['ma_long_interval'], configs['ma_short_interval'])))
+    return {'prices': prices, 'windows': windows,
+            'ma': np.stack([MultiMeanReversion.ma_panel(prices, k) for k in windows])}
+
+
+def _multi_values(arrays, configs, a, b):
+    ma = arrays['ma'][:, a:b]
+    long_index = np.searchsorted(arrays['windows'], configs['ma_long_interval'])
+    short_index = np.searchsorted(arrays['windows'], configs['ma_short_interval'])
+    cash_history, holdings_history, _ = MultiMeanReversion.mean_reversion_backtest(
+        arrays['prices'][a:b], ma, ma, configs['trade_factor'], MultiMeanReversion.cash, long_index, short_index)
+    return (cash_history + holdings_history)/MultiMeanReversion.cash
+
+
+STRATEGIES = {'simple': (_simple_arrays, _simple_values), 'multi': (_multi_arrays, _multi_values)}
+
+# strategy, indicator arrays and configurations of the workers, set once per process by the pool initializer
+_shared = {}
+
+
+def _init_folds(name, arrays, configs):
+    _shared.update(strategy=name, arrays=arrays, configs=configs)
+
+
+# optimize on days a..b-1, then trade the best configuration on days b..c-1
+def _fold_task(a, b, c):
+    values = STRATEGIES[_shared['strategy']][1]
+    configs = _shared['configs']
+    in_sample_values = values(_shared['arrays'], configs, a, b)
+    in_sample_return = in_sample_values[-1]
+    best = int(np.argmax(in_sample_return))
+    best_config = {name: configs[name][best:best + 1] for name in configs}
+    out_of_sample_values = values(_shared['arrays'], best_config, b, c)[:, 0]
+    return best, in_sample_return[best], out_of_sample_values
+
+
+# day ranges (in-sample start, out-of-sample start, out-of-sample end) of the rolling folds
+def fold_ranges(n_days, in_sample, out_of_sample):
+    if n_days <= in_sample:
+        raise ValueError(f"{n_days} days of history leave nothing to trade after in_sample={in_sample} days")
+    return [(a, a + in_sample, min(a + in_sample + out_of_sample, n_days))
+            for a in range(0, n_days - in_sample, out_of_sample)]
+
+
+# walk-forward optimization of a strategy ("simple" or "multi") over a dates x tickers price DataFrame.
+# returns (table of folds with the chosen parameters and in- and out-of-sample returns (%),
+#          stitched out-of-sample equity curve starting at 1)
+def walk_forward(name, prices, grid, in_sample, out_of_sample, max_workers=None):
+
+    configs = grid_configs(grid)
+    if not len(next(iter(configs.values()), [])):
+        raise ValueError("the parameter grid has no configurations")
+    arrays = STRATEGIES[name][0](prices.to_numpy(dtype=float), configs)
+    folds = fold_ranges(len(prices), in_sample, out_of_sample)
+    with ProcessPoolExecutor(max_workers, initializer=_init_folds, initargs=(name, arrays, configs)) as pool:
+        results = list(pool.map(_fold_task, *zip(*folds)))
+
+    rows = []
+    curves = []
+    level = 1.0
+    for (a, b, c), (best, in_sample_return, values) in zip(folds, results):
+        # each fold trades from the level the last fold ended at
+        curve = values*level
+        level = curve[-1]
+        curves.append(pd.Series(curve, index=prices.index[b:c]))
+        rows.append({'in_sample_start': prices.index[a], 'out_of_sample_start': prices.index[b],
+                     'out_of_sample_end': prices.index[c - 1],
+                     **{param: configs[param][best] for param in configs},
+                     'in_sample_return': in_sample_return*100, 'out_of_sample_return': values[-1]*100})
+
+    return pd.DataFrame(rows), pd.concat(curves)
+
+
+if __name__ == "__main__":
+    tickers = [SimpleMeanReversion.ticker] if strategy == "simple" else MultiMeanReversion.ticker_list
+    prices = get_panel(tickers, "Close", start, end).dropna()
+
+    folds, equity = walk_forward(strategy, prices, grids[strategy], in_sample, out_of_sample)
+    print(folds.to_string(index=False))
+    print(f"Out-of-sample return from {equity.index[0].date()} to {equity.index[-1].date()}: "
+          f"{round(equity.iloc[-1]*100, 2)}%")
+
+    plt.plot(equity.index, equity.to_numpy(), 'k')
+    plt.title(f"Walk-forward out-of-sample equity of {strategy} mean reversion on {tickers}")
+    plt.xlabel("Date")
+    plt.ylabel("Portfolio value (relative)")
+    plt.show()
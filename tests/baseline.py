@@ -0,0 +1,388 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+# Verbatim copies of the per-element loops of the original scripts, as they were before the vectorized
+# versions replaced them. The tests check the fast paths against these, and Benchmarks.py times them.
+# The scripts ran their loops at module level on yfinance downloads, so the reference_* functions below take
+# the prices as arguments and run the loop for one configuration, keeping only the histories they return.
+# The functions and loop bodies are otherwise copied unchanged.
+
+
+# the original loops index histories by position and write 'NaN' strings into a copy of them, which pandas
+# only allows on object Series
+def _history(values):
+    return pd.Series(np.asarray(values, dtype=float), dtype=object)
+
+
+def _values(history):
+    return history.astype(float).to_numpy()
+
+
+# ========= TopStockInfo.py ========================================== #
+
+# get moving average of price history over an interval in days
+# calculated as MA = sum(values)/#periods
+def simple_moving_average(close_history, MA_interval):
+    SMA = close_history.copy()      # create copy of hist to init SMA
+
+    # calculate MA array
+    i = 0
+    while i < MA_interval:
+        SMA[i] = 'NaN'      # don't plot values until SMA can be properly calculated
+        i += 1
+    while i in range(MA_interval, len(SMA)):
+        SMA[i] = close_history[i - MA_interval : i].sum()/MA_interval
+        i += 1
+
+    return SMA
+
+
+# get exponential moving average over interval in days
+# 12- and 26-day for short term, 50- and 200-day for longer term
+# smoothing = 2 by default. Increasing weights recent pricing more.
+def exp_moving_average(close_history, MA_interval, smoothing_factor):
+    SF = smoothing_factor               # smoothing factor
+    f = SF/(1 + MA_interval)            # pre-calculated EMA factor
+    EMA = close_history.copy()          # create copy of hist to init EMA
+
+    # calculate MA array
+    i = 0
+    while i < MA_interval:
+        EMA[i] = 'NaN'      # don't plot values until EMA can be properly calculated
+        i += 1
+    EMA[MA_interval] = simple_moving_average(close_history, MA_interval)[MA_interval]   # get start value
+    i += 1
+    while i in range(MA_interval+1, len(EMA)):
+        EMA[i] = close_history[i]*f + EMA[i-1]*(1-f)        # get EMA values until end of period
+        i += 1
+
+    return EMA
+
+
+# gets the stochastic oscillator
+def stochastic_oscillator(close_history):
+    SO = close_history.copy()  # init SO array
+
+    for i in range(0, 15):
+        SO[i] = 'NaN'
+        i += 1
+
+    for i in range(15, len(close_history)): # compute SO for each day
+        C = close_history[i-1]      # latest close
+        L14 = close_history[i - 14:i].min()     # 14-day high
+        H14 = close_history[i - 14:i].max()     # 14-day low
+        SO[i] = ((C-L14)/(H14-L14))*100
+        i += 1
+
+    return SO
+
+
+# gets moving volatility (standard deviation) over an interval
+def moving_volatility(close_history, MA_interval):
+    MsDev = close_history.copy()
+
+    i = 0
+    while i < MA_interval:
+        MsDev[i] = 'NaN'  # don't plot values until sDev can be properly calculated
+        i += 1
+
+    while i in range(MA_interval, len(MsDev)):
+        MsDev[i] = close_history[i-MA_interval:i].std()
+        i += 1
+
+    return MsDev
+
+
+def reference_sma(close, k):
+    return _values(simple_moving_average(_history(close), k))
+
+
+def reference_ema(close, k, smoothing_factor):
+    return _values(exp_moving_average(_history(close), k, smoothing_factor))
+
+
+# closes only, with the original fixed 14-period window
+def reference_stochastic(close):
+    return _values(stochastic_oscillator(_history(close)))
+
+
+def reference_volatility(close, k):
+    return _values(moving_volatility(_history(close), k))
+
+
+# ========= SimpleMeanReversion.py =================================== #
+
+cash = 500.0
+portfolio = 500.0
+
+
+# calculate a moving average from a time series, at a current date and for a chosen time interval
+def running_ma(time_series, current_date, ma_period):
+
+    ma = time_series[current_date - ma_period : current_date].mean()
+
+    return ma
+
+
+# wallet class to store portfolio values
+class Wallet:
+    cash = cash
+    holdings = portfolio
+
+
+# buy an amt in cash to holdings
+def buy(amt):
+    if Wallet.cash > amt:   # if funds are sufficient, move cash into stock holdings
+        Wallet.cash -= amt
+        Wallet.holdings += amt
+    else:                   # else sell as much as is available (this might be a bad idea)
+        amt = Wallet.cash
+        Wallet.cash -= amt
+        Wallet.holdings += amt
+
+
+# sell an amt from holdings to generate cash
+def sell(amt):
+    if Wallet.holdings > amt:   # if holdings are sufficient, sell amt to generate cash
+        Wallet.cash += amt
+        Wallet.holdings -= amt
+    else:                       # else sell as much stock as possible
+        amt = Wallet.holdings
+        Wallet.cash += amt
+        Wallet.holdings -= amt
+
+
+# update holdings value at start of day
+def update(time_series, current_date):
+    Wallet.holdings = Wallet.holdings * time_series[current_date]/time_series[current_date - 1]
+
+
+# the script's day-by-day loop for one configuration (the script used 7 and 30 day MAs), returning the
+# (cash, holdings) history
+def reference_mean_reversion(close_hist, ma_short_interval, ma_long_interval, amt, cash=cash, holdings=portfolio):
+    Wallet.cash, Wallet.holdings = cash, holdings
+    portfolio_history = np.zeros(shape=(2, len(close_hist)))
+
+    # step through time series element-wise
+    with warnings.catch_warnings():     # means of the empty slices before the first full window are NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for i in range(len(close_hist)):
+
+            # update value of holdings based on change since previous period
+            update(close_hist, i)
+            # compute both moving averages
+            ma_long = running_ma(close_hist, i, ma_long_interval)
+            ma_short = running_ma(close_hist, i, ma_short_interval)
+
+            # increase amt proportional to distance from mean
+            amt_temp = amt * (ma_long - ma_short)**2 / ma_long
+
+            # mean reversion: if 30d MA < 90d MA, assume stock is undervalued and buy.
+            # if 30d MA > 90d MA, assume stock is overvalued and sell.
+            # occurs once per day, after price has been updated.
+            if ma_short < ma_long:
+                buy(amt_temp)
+            elif ma_short > ma_long:
+                sell(amt_temp)
+
+            # populate history arrays for plotting
+            portfolio_history[0][i] = Wallet.cash
+            portfolio_history[1][i] = Wallet.holdings
+
+    return portfolio_history.T
+
+
+# ========= MultiMeanReversion.py ==================================== #
+
+# set for each run by reference_multi_mean_reversion, as globals of the script
+ticker_list = []
+trade_factor = 0.05
+prices_today = {}
+ma_today = {}
+
+
+# function to get ma over an entire time series for a given series
+def ma_series(series, ma_period):
+    ma = np.zeros(len(series))
+    for i in range(len(series)):
+        if i > ma_period:
+            ma[i] = series[i - ma_period : i].mean()
+
+    return ma
+
+
+# class to define Stock objects for keeping price and moving averages, etc.
+class Stock:
+
+    # initialise stock info
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.price = 0.0
+        self.ma_long = 0.0
+        self.ma_short = 0.0
+        self.undervalued = False
+        self.ma_deviation = 0.0
+        self.position = 0.0
+        self.trade_amt = 0.0
+        self.price_yesterday = 0.0
+
+    # update stock ticker info on a given day
+    def get_info(self):
+        # update price and position
+        self.price = prices_today[self.ticker]
+        if self.price_yesterday == 0.0:
+            pass
+        else:
+            self.position *= self.price/self.price_yesterday    # change position according to price change
+        self.price_yesterday = self.price   # move "yesterday's" price one day forward
+        # update MA values
+        self.ma_long = ma_today[self.ticker][0]
+        self.ma_short = ma_today[self.ticker][1]
+        # check if stock is undervalued or not
+        if self.ma_long > self.ma_short:
+            self.undervalued = True
+        else:
+            self.undervalued = False
+        # get deviation of short ma from long ma (based on square distance)
+        if self.ma_long == 0:
+            self.ma_deviation = 0.0
+        else:
+            self.ma_deviation = abs(self.ma_short - self.ma_long) / self.ma_long
+        # define an amount to trade based on the ma deviation
+        self.trade_amt = self.position * self.ma_deviation
+
+    def trade(self):
+        if self.undervalued:    # if stock is undervalued, buy more
+            self.position += self.trade_amt
+        elif not self.undervalued:  # else, sell
+            # sell amt of stock, or whole position if amt > position
+            self.position = max(self.position - self.trade_amt, 0.0)
+
+
+# function to buy and sell stocks on a given day
+def trade(stocks_info, cash):
+    total_dev = 0.0     # variable to store sum of stock deviations for undervalued stocks
+    #print("===New trade===")
+    # deal with overvalued stocks (selling) first
+    for ticker in stocks_info:      # loop through all stocks
+        Stock = stocks_info[ticker]
+
+        if not Stock.undervalued:   # if stock is overvalued, sell amt (or whole position if amt > position)
+            #print(f"==Sell overval stock: {ticker}")
+            #print(f"Cash before trade: {cash}\nPosition before trade:{Stock.position}\nTrade amt: {Stock.trade_amt}")
+            Stock.trade()
+            cash += min(Stock.position, Stock.trade_amt)
+            #print(f"Cash after trade: {cash}\nPosition after trade: {Stock.position}")
+        elif Stock.undervalued:     # count deviation for undervalued stocks
+            total_dev += Stock.ma_deviation
+
+    buy_amt = cash * trade_factor       # set aside cash to buy
+
+    # deal with buying undervalued stocks
+    for ticker in ticker_list:      # loop through all stocks (again)
+        Stock = stocks_info[ticker]
+
+        if Stock.undervalued:   # for undervalued stocks, buy proportionally to MA deviation
+            #print("==Buy underval stock:", Stock.ticker)
+            Stock.trade_amt = buy_amt * Stock.ma_deviation / total_dev      # set proportional trade amt
+            #print(f"Cash before trade: {cash}\nPosition before trade:{Stock.position}\nMA deviation: {Stock.ma_deviation}\nTrade amt: {Stock.trade_amt}")
+            Stock.trade()       # buy amt of stock
+            cash -= Stock.trade_amt     # reflect purchase in cash reserves
+            #print(f"Cash after trade: {cash}\nPosition after trade: {Stock.position}")
+
+    return cash
+
+
+# the script's daily loop for one configuration over a days x tickers price array, returning the
+# (cash, holdings) history
+def reference_multi_mean_reversion(prices, ma_long_interval, ma_short_interval, factor, cash=10000.0):
+    global ticker_list, trade_factor, prices_today, ma_today
+    ticker_list = list(range(prices.shape[1]))
+    trade_factor = factor
+    series_list = {}
+    ma_list = {}
+    cash_history = []
+    holdings_history = []
+
+    # populate series and MA lists
+    for ticker in ticker_list:
+        series_list[ticker] = prices[:, ticker]
+        ma_list[ticker] = [ma_series(series_list[ticker], ma_long_interval),
+                           ma_series(series_list[ticker], ma_short_interval)]
+
+    # initialise stock objects from ticker list
+    stocks_info = {}
+    for ticker in ticker_list:
+        stocks_info[ticker] = Stock(ticker)
+
+    # simulate real-time prices
+    for i in range(len(prices)):
+        #print(f"++++ Day {i} ++++")
+        if i < ma_long_interval:    # don't trade until MA can be calculated
+            pass
+        else:
+
+            # get today's price for each stock in ticker list
+            prices_today = {}    # init prices list dictionary
+            ma_today = {}        # init moving average list dictionary
+            for ticker in ticker_list:
+                while True:
+                    try:
+                        prices_today[ticker] = series_list[ticker][i]    # for each ticker, set the prices list element to today's price
+                        ma_today[ticker] = [ma_list[ticker][0][i], ma_list[ticker][1][i]]     # likewise for moving averages
+                        stocks_info[ticker].get_info()      # get stock info for today
+                        break
+                    except IndexError:
+                        print(f"{ticker} has the wrong number of periods")
+                        break
+            # perform trading algorithm (sell overvalued stocks then use portion of cash to buy undervalued stocks)
+            cash = trade(stocks_info, cash)
+
+        # sum stock positions to get total holdings for the day
+        holdings_total = 0.0
+        for ticker in ticker_list:
+            stock = stocks_info[ticker]     # (Stock in the script, where it didn't shadow the class)
+            holdings_total += stock.position
+
+        # append histories
+        cash_history.append(cash)
+        holdings_history.append(holdings_total)
+
+    return np.column_stack((cash_history, holdings_history))
+
+
+# ========= PlotStockInfo.py ========================================= #
+
+# get volatility of stock's value on a monthly basis based off closing values
+def get_month_volatility(ticker_hist):
+
+    close_hist = np.array(ticker_hist['Close'])  # get close history
+    volatility_hist = [0]*int(len(close_hist)/30)    # initialise array for volatility history
+
+    for i in range(int(len(close_hist)/30)):        # calculate standard deviation for each month in history
+        month_values = close_hist[i*30 : (i+1)*30]
+        month_values = pd.Series(month_values)
+        volatility_hist[i] = month_values.std()
+
+    return pd.Series(volatility_hist)
+
+
+# get volatility of stock's value on a weekly basis based off closing values
+def get_week_volatility(ticker_hist):
+
+    close_hist = np.array(ticker_hist['Close'])  # get close history
+    volatility_hist = [0]*int(len(close_hist)/7)    # initialise array for volatility history
+
+    for i in range(int(len(close_hist)/7)):         # calculate standard deviation for each week in history
+        week_values = close_hist[i*7 : (i+1)*7]
+        week_values = pd.Series(week_values)
+        volatility_hist[i] = week_values.std()
+
+    return pd.Series(volatility_hist)
+
+
+# std of each 7 or 30 row block of one close history
+def reference_block_std(close, block):
+    volatility = {7: get_week_volatility, 30: get_month_volatility}[block]
+    return volatility({'Close': close}).to_numpy()
@@ -0,0 +1,25 @@
+import os
+import sys
+import pandas as pd
+import pytest
+
+# the modules are files at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import StockGetFunctions    # noqa: E402
+import RiskReward           # noqa: E402
+from DataProviders import SyntheticProvider     # noqa: E402
+
+
+# a synthetic market as the data source of StockGetFunctions for one test, with five years of history up to
+# today so yfinance periods like '5y' find data. Returns a function taking the number of tickers.
+@pytest.fixture
+def synthetic_market(monkeypatch):
+    def use(n_tickers):
+        provider = SyntheticProvider(n_tickers=n_tickers, years=6,
+                                     origin=pd.Timestamp.today().normalize() - pd.DateOffset(years=5))
+        monkeypatch.setattr(StockGetFunctions, "market_data", provider)
+        monkeypatch.setattr(RiskReward, "delta_cache", {})
+        monkeypatch.setattr(RiskReward, "matrix_cache", {})
+        return provider
+    return use
@@ -0,0 +1,136 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+import Currency
+
+# Test doubles and reference implementations shared by the tests and Benchmarks.py: a fake downloader with
+# network latency for the concurrent download paths, and straightforward one-at-a-time versions of vectorized
+# code with no standalone loop in the original scripts to copy (see baseline.py for the ones that have one):
+# rewrites of what Portfolio Info.py did on its wide DataFrame, and loops for what is new.
+
+
+# fake downloader that sleeps like a network request and returns a random walk of daily bars
+class LatencyFetch:
+
+    def __init__(self, latency=0.05, fail_every=0):
+        self.latency = latency
+        self.fail_every = fail_every    # make every nth call raise, to exercise retries
+        self.calls = 0
+        self._lock = threading.Lock()   # calls come from many threads at once
+
+    def __call__(self, tick, start, end, interval):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.latency)
+        if self.fail_every and call % self.fail_every == 0:
+            raise ConnectionError(f"simulated failure for {tick}")
+        dates = pd.bdate_range(start, end, inclusive='left')
+        rng = np.random.default_rng(abs(hash(tick)) % 2**32)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 0},
+                            index=dates)
+
+
+# day-by-day basket values, rebalancing to the weights on the first day on or after each rebalance date
+def reference_basket(dates, prices, basket):
+    values = np.full(len(dates), np.nan)
+    units = None if basket.divisor is None else basket.weights/basket.divisor
+    rebalance = list(basket.rebalance)
+    for t in range(len(dates)):
+        price = prices[t]
+        due = False
+        while rebalance and rebalance[0] <= dates[t]:
+            rebalance.pop(0)
+            due = True
+        priced = np.all(np.isfinite(price))
+        if units is None and priced:
+            units = basket.weights/basket.weights.sum()*basket.base/price
+        elif due and priced:
+            level = price @ units
+            weights = basket.weights if basket.divisor is not None else basket.weights/price
+            units = weights*level/(price @ weights)
+        if units is not None:
+            values[t] = price @ units
+    return values
+
+
+# metrics of one equity curve, one pandas statistic at a time
+def reference_metrics(equity, traded, risk_free, periods_per_year=252):
+    curve = pd.Series(equity)
+    excess = curve.pct_change().dropna() - risk_free/periods_per_year
+    growth = (curve.iloc[-1]/curve.iloc[0])**(periods_per_year/(len(curve) - 1)) - 1
+    drawdown = 1 - curve/curve.cummax()
+    duration = longest = 0
+    for below in drawdown > 0:
+        duration = duration + 1 if below else 0
+        longest = max(longest, duration)
+    downside = np.sqrt((excess.clip(upper=0)**2).mean())
+    return [growth, excess.std()*np.sqrt(periods_per_year), excess.mean()/excess.std()*np.sqrt(periods_per_year),
+            excess.mean()/downside*np.sqrt(periods_per_year), drawdown.max(), longest, growth/drawdown.max(),
+            traded.sum()/curve.mean()]
+
+
+# point-by-point largest-triangle-three-buckets, for checking the vectorized buckets
+def reference_lttb(x, y, n_out):
+    n = len(x)
+    bucket = (n - 2)/(n_out - 2)
+    keep = [0]
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = int(1 + i*bucket), int(1 + (i + 1)*bucket)
+        next_lo, next_hi = hi, min(int(1 + (i + 2)*bucket), n) if i < n_out - 3 else n
+        if i == n_out - 3:
+            next_lo = n - 1
+        mean_x = sum(x[next_lo:next_hi])/(next_hi - next_lo)
+        mean_y = sum(y[next_lo:next_hi])/(next_hi - next_lo)
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((x[a] - mean_x)*(y[j] - y[a]) - (x[a] - x[j])*(mean_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    keep.append(n - 1)
+    return np.array(keep)
+
+
+# updates of every following row of a wide DataFrame, one trade at a time as Portfolio Info.py's buy and sell
+# did (but with sells subtracting shares). returns (holdings, capital) like Ledger.ledger_positions
+def reference_ledger(events, dates, tickers, prices):
+    frame = pd.DataFrame(0.0, index=dates, columns=list(tickers) + ['capital'])
+    for date, tick, signed_shares, counts in events:
+        first = frame.index.searchsorted(date)
+        frame.iloc[first:, frame.columns.get_loc(tick)] += signed_shares
+        if counts and first < len(dates):
+            frame.iloc[first:, -1] += signed_shares*prices[first, tickers.index(tick)]
+    return frame[tickers].to_numpy(), frame['capital'].to_numpy()
+
+
+# Portfolio Info.py's original valuation: a wide DataFrame built one column per ticker and field, with the
+# portfolio value summed column by column (and the whole frame copied for the R1000 normalisation)
+def reference_wide_portfolio(dates, tickers, prices, shares, usd_zar):
+    data = pd.DataFrame(index=dates)
+    data["USD/ZAR"] = usd_zar
+    for k, ticker in enumerate(tickers):
+        data[ticker] = prices[:, k]
+        data[ticker + " shares"] = shares[:, k]
+        data[ticker + " ZAR"] = data[ticker]/100 if "JO" in ticker else data[ticker]*data["USD/ZAR"]
+    data["Portfolio"] = 0.0
+    for ticker in tickers:
+        data["Portfolio"] += data[ticker + " shares"]*data[ticker + " ZAR"]
+    adj_returns = data.copy()
+    return data, adj_returns
+
+
+# prices converted into a currency one ticker at a time, as Portfolio Info.py did for ZAR, from a DataFrame of
+# units of each currency per USD
+def reference_conversion(prices, tickers, per_usd, currency="ZAR"):
+    converted = np.empty_like(prices)
+    for k, ticker in enumerate(tickers):
+        quote, unit = Currency.ticker_currency(ticker)
+        quote_rate = 1.0 if quote == "USD" else per_usd[quote].to_numpy()
+        base_rate = 1.0 if currency == "USD" else per_usd[currency].to_numpy()
+        converted[:, k] = prices[:, k]*unit*base_rate/quote_rate
+    return converted
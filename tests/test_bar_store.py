@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+import TopStockInfo
+from BarStore import BarStore, to_frame
+from DataProviders import SyntheticProvider
+
+
+@pytest.fixture(scope="module")
+def frames():
+    provider = SyntheticProvider(n_tickers=3, years=1)
+    return {tick: provider.history(tick, interval="1m")[['Open', 'High', 'Low', 'Close', 'Volume']].iloc[:50000]
+            for tick in provider.tickers}
+
+
+# one-day ranges of the store are views of the memory-mapped files, with the bars of the DataFrames
+def test_ranges_match_frames(frames, tmp_path):
+    store = BarStore(tmp_path, index_step=256)
+    for tick, frame in frames.items():
+        assert store.ingest(tick, "1m", "2000-01-01", "2030-01-01", fetch=lambda *args: frame) == len(frame)
+        assert store.ingest(tick, "1m", "2000-01-01", "2030-01-01", fetch=lambda *args: frame) == 0
+    rng = np.random.default_rng(0)
+    days = pd.DatetimeIndex(frames["SYN00000"].index.normalize().unique())
+    for tick, day in zip(rng.choice(list(frames), 30), days[rng.integers(0, len(days), 30)]):
+        bars = store.range(tick, "1m", day, day + pd.Timedelta(days=1))
+        expected = frames[tick].loc[day:day + pd.Timedelta(days=1) - pd.Timedelta(1)]
+        assert np.shares_memory(bars, store.bars(tick, "1m"))
+        assert np.array_equal(bars['time'], expected.index.as_unit('ns').asi8)
+        assert np.allclose(to_frame(bars).to_numpy(), expected.to_numpy(), rtol=1e-6)
+
+    close = store.range("SYN00000", "1m")['close']
+    assert np.allclose(TopStockInfo.simple_moving_average(close, 390),
+                       TopStockInfo.simple_moving_average(frames["SYN00000"]['Close'].to_numpy(), 390),
+                       rtol=1e-5, equal_nan=True)
+
+
+# intraday bars are stored in UTC, so bars either side of a daylight saving change stay in order
+def test_intraday_bars_in_utc(tmp_path):
+    store = BarStore(tmp_path)
+    index = pd.date_range("2021-11-07 00:30", periods=6, freq="30min", tz="America/New_York")
+    frame = pd.DataFrame({'Close': np.arange(6.0)}, index=index)
+    assert store.append("X", "30m", frame) == 6
+    times = store.range("X", "30m")['time']
+    assert np.array_equal(times, index.tz_convert("UTC").tz_localize(None).as_unit('ns').asi8)
+    assert len(store.range("X", "30m", "2021-11-07 06:00", "2021-11-07 07:00")) == 2
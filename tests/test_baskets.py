@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from Baskets import Basket, BasketEngine
+from DataProviders import SyntheticProvider
+from helpers import reference_basket
+
+
+# price-weighted and value-weighted baskets with different rebalance schedules against the day-by-day reference,
+# then one new bar added to an engine restored from disk
+def test_engine_matches_day_by_day(tmp_path):
+    n_tickers, size = 60, 8
+    provider = SyntheticProvider(n_tickers=n_tickers, years=3)
+    tickers = provider.tickers
+    close = provider.close_panel(tickers)
+    dates = close.index
+    prices = close.to_numpy().copy()
+    prices[:252, :10] = np.nan      # a few tickers listed a year late
+    rng = np.random.default_rng(0)
+    month_ends = pd.date_range(dates[0], dates[-1], freq='ME')
+    baskets = []
+    for j in range(6):
+        constituents = {tickers[k]: float(w) for k, w in zip(rng.choice(n_tickers, size, replace=False),
+                                                              rng.uniform(0.5, 2, size))}
+        baskets.append(Basket(f"B{j}", constituents, divisor=1000.0 if j % 2 else None,
+                              rebalance=month_ends[::[1, 3, 12][j % 3]]))
+
+    columns = {ticker: k for k, ticker in enumerate(tickers)}
+    reference = np.column_stack([reference_basket(dates, prices[:, [columns[ticker] for ticker in basket.constituents]],
+                                                  basket) for basket in baskets])
+    values = BasketEngine(baskets, tickers).update(dates, prices)
+    assert np.allclose(reference, values, equal_nan=True)
+
+    engine = BasketEngine(baskets, tickers)
+    engine.update(dates[:-1], prices[:-1])
+    engine.save(tmp_path/"baskets.npz")
+    engine = BasketEngine.load(tmp_path/"baskets.npz", baskets, tickers)
+    last = engine.update(dates[-1:], prices[-1:])
+    assert np.allclose(last, values[-1:]) and np.allclose(engine.values, values, equal_nan=True)
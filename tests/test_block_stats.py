@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+import BlockStats
+from DataProviders import SyntheticProvider
+from baseline import reference_block_std
+
+STATS = [stat for stat in BlockStats.STATS if stat != 'range']
+
+
+# a dates x tickers panel with a fifth of its prices missing
+@pytest.fixture(scope="module")
+def gaps():
+    close = SyntheticProvider(n_tickers=20, years=3).close_panel()
+    return close.mask(np.random.default_rng(0).random(close.shape) < 0.2)
+
+
+def test_stride_std_matches_loop():
+    values = SyntheticProvider(n_tickers=5, years=2).close_panel().to_numpy()
+    reference = np.array([reference_block_std(values[:, k], 7) for k in range(values.shape[1])]).T
+    assert np.allclose(reference, BlockStats.stride_stats(values, 7)['std'])
+
+
+def test_stride_stats_skip_missing_values(gaps):
+    values = gaps.to_numpy()
+    rows = len(values)//7*7
+    groups = pd.DataFrame(values[:rows]).groupby(np.arange(rows)//7)
+    strided = BlockStats.stride_stats(values, 7, STATS)
+    for stat in STATS:
+        assert np.allclose(getattr(groups, stat)().to_numpy(dtype=float), strided[stat], equal_nan=True), stat
+
+
+@pytest.mark.parametrize("freq", ['W', 'M', 'Q'])
+def test_calendar_stats_match_groupby(gaps, freq):
+    groups = gaps.groupby(gaps.index.to_period(freq))
+    blocks = BlockStats.block_stats(gaps, freq=freq, stats=BlockStats.STATS)
+    for stat in STATS:
+        assert np.allclose(getattr(groups, stat)().to_numpy(dtype=float), blocks[stat].to_numpy(), equal_nan=True)
+    assert np.allclose((groups.max() - groups.min()).to_numpy(), blocks['range'].to_numpy(), equal_nan=True)
+    assert (blocks['std'].index == gaps.index[BlockStats.block_starts(gaps.index, freq)]).all()
+
+
+def test_first_and_last_skip_missing_values():
+    dates = pd.bdate_range("2024-01-01", periods=10)     # two weeks
+    close = pd.Series([np.nan, 2, 3, 4, np.nan, 6, 7, 8, 9, np.nan], index=dates)
+    blocks = BlockStats.block_stats(close, freq='W', stats=('first', 'last'))
+    assert list(blocks['first']) == [2, 6] and list(blocks['last']) == [4, 9]
+
+
+# periods of a custom calendar of period start dates
+def test_custom_calendar():
+    dates = pd.bdate_range("2024-01-01", periods=30)
+    close = pd.Series(np.arange(30.0), index=dates)
+    blocks = BlockStats.block_stats(close, calendar=["2024-01-10", "2024-01-25"], stats=('count', 'first'))
+    assert list(blocks['count']) == [7, 11, 12] and list(blocks['first']) == [0, 7, 18]
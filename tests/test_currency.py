@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import Currency
+from helpers import LatencyFetch, reference_conversion
+
+
+def test_panel_converter():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2010-01-01", periods=300)
+    suffixes = ["", ".JO", ".L", ".DE", ".T"]
+    tickers = [f"T{k}{suffixes[k % len(suffixes)]}" for k in range(25)]
+    prices = 100*np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), len(tickers))), axis=0))
+    fetch = LatencyFetch(0.0)
+    rates = Currency.FXRates(fetch=fetch)
+    per_usd = rates.per_usd(["ZAR", "GBP", "EUR", "JPY"], dates)
+    calls = fetch.calls
+
+    converter = Currency.PanelConverter(prices, dates, tickers, rates)
+    zar = converter.convert("ZAR")
+    assert np.allclose(reference_conversion(prices, tickers, per_usd, "ZAR"), zar)
+    # cross rate through USD: GBP prices agree with ZAR prices at the ZAR/GBP rate
+    gbp = converter.convert("GBP")
+    assert np.allclose(gbp, zar*(per_usd["GBP"].to_numpy()/per_usd["ZAR"].to_numpy())[:, None])
+    # switching back reuses the first conversion, without fetching any FX history again
+    assert converter.convert("ZAR") is zar and fetch.calls == calls
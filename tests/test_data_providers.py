@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from StockGetFunctions import get_panel
+from DataProviders import ReplayProvider, SyntheticProvider
+
+
+# daily bars of a London-listed ticker, stamped at local midnight, across the clocks going forward on 2020-03-29
+def london_daily():
+    dates = pd.bdate_range("2020-03-23", "2020-04-03").tz_localize("Europe/London")
+    return SyntheticProvider(years=25).history("SYN00000", "2020-03-23", "2020-04-04").set_axis(dates)
+
+
+@pytest.mark.parametrize("frame, interval", [
+    (SyntheticProvider(years=25).history("SYN00000", "2020-01-01", "2020-03-01"), "1d"),
+    (london_daily(), "1d"),
+    (SyntheticProvider(years=25).history("SYN00000", "2021-11-05", "2021-11-09", interval="1h")
+     .tz_localize("America/New_York"), "1h")])
+def test_replay_round_trip(tmp_path, frame, interval):
+    ReplayProvider(tmp_path).save("X", frame, interval)
+    replayed = ReplayProvider(tmp_path).history("X", "2000-01-01", "2030-01-01", interval)
+    assert replayed.index.equals(frame.index)
+    assert np.allclose(replayed.to_numpy(dtype=float), frame.to_numpy(dtype=float))
+
+
+# daily bars recorded across a daylight saving change keep their local dates when replayed into a panel
+def test_replayed_daily_bars_keep_local_dates(tmp_path):
+    frame = london_daily()
+    provider = ReplayProvider(tmp_path)
+    provider.save("X", frame)
+    expected = frame.index.tz_localize(None)
+    panel = get_panel(["X"], "Close", "2020-03-01", "2020-05-01", fetch=provider)
+    assert panel.index.equals(expected) and (panel.index.dayofweek < 5).all()
+
+    os.remove(os.path.join(tmp_path, "X_1d.tz"))    # recorded before timezones were saved
+    panel = get_panel(["X"], "Close", "2020-03-01", "2020-05-01", fetch=ReplayProvider(tmp_path))
+    assert panel.index.equals(expected)
+
+
+def test_replay_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    frame = london_daily()
+    ReplayProvider(tmp_path).save("X", frame, file_format="parquet")
+    assert ReplayProvider(tmp_path).history("X", "2000-01-01", "2030-01-01").index.equals(frame.index)
+
+
+def test_replay_missing_history(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ReplayProvider(tmp_path).history("X", "2020-01-01", "2021-01-01")
+
+
+# a ticker's path depends only on the seed and ticker, whichever range is requested and from which instance
+@pytest.mark.parametrize("interval", ["1d", "1h"])
+def test_synthetic_paths_are_reproducible(interval):
+    full = SyntheticProvider(years=3).history("SYN00003", "2000-01-01", "2003-01-01", interval)
+    part = SyntheticProvider(years=3).history("SYN00003", "2001-06-01", "2002-02-01", interval)
+    assert part.equals(full.loc["2001-06-01":"2002-01-31"])
+    assert not SyntheticProvider(years=3, seed=1).history("SYN00003", "2001-06-01", "2002-02-01",
+                                                          interval).equals(part)
+    assert not SyntheticProvider(years=3).history("SYN00004", "2001-06-01", "2002-02-01", interval).equals(part)
+
+
+def test_synthetic_close_panel_matches_histories():
+    provider = SyntheticProvider(n_tickers=3, years=2)
+    panel = provider.close_panel(start="2000-06-01", end="2001-03-01")
+    for tick in provider.tickers:
+        assert np.allclose(panel[tick], provider.history(tick, "2000-06-01", "2001-03-01")["Close"])
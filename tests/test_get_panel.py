@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from StockGetFunctions import get_panel
+from helpers import LatencyFetch
+
+TICKERS = [f"T{i}" for i in range(10)]
+START, END = "2020-01-01", "2021-01-01"
+
+
+# concurrent download with repeated tickers and failing calls against one download per ticker in turn
+def test_get_panel_matches_serial_downloads():
+    fetch = LatencyFetch(0.001)
+    serial = pd.DataFrame({tick: fetch(tick, START, END, "1d")["Close"] for tick in TICKERS})
+    fetch = LatencyFetch(0.001, fail_every=4)
+    panel = get_panel(TICKERS + TICKERS[:3], "Close", START, END, fetch=fetch, backoff=0.001)
+    assert list(panel.columns) == TICKERS
+    assert np.allclose(serial.to_numpy(), panel.to_numpy())
+    assert fetch.calls > len(TICKERS)   # one call per distinct ticker, plus the retries of the failed ones
+
+
+def test_get_panel_raises_after_retries():
+    with pytest.raises(ConnectionError):
+        get_panel(TICKERS[:2], "Close", START, END, fetch=LatencyFetch(0.0, fail_every=1), backoff=0.001)
+
+
+# two panels of the same tickers requested at the same time share each download
+def test_concurrent_panels_share_downloads():
+    shared = LatencyFetch(0.1)
+    with ThreadPoolExecutor(2) as pool:
+        panels = [pool.submit(get_panel, TICKERS, "Close", START, END, max_workers=len(TICKERS), fetch=shared)
+                  for _ in range(2)]
+        first, second = (panel.result() for panel in panels)
+    assert shared.calls == len(TICKERS)
+    assert first.equals(second)
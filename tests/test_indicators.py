@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+import TopStockInfo
+from DataProviders import SyntheticProvider
+from baseline import reference_sma, reference_ema, reference_volatility, reference_stochastic
+
+
+@pytest.fixture(scope="module")
+def hourly():
+    return SyntheticProvider(years=1).history("SYN00000", interval="1h")
+
+
+@pytest.mark.parametrize("reference, indicator", [
+    (lambda close: reference_sma(close, 26), lambda close: TopStockInfo.simple_moving_average(close, 26)),
+    (lambda close: reference_ema(close, 26, 2), lambda close: TopStockInfo.exp_moving_average(close, 26, 2)),
+    (lambda close: reference_ema(close, 12, 2) - reference_ema(close, 26, 2), TopStockInfo.MA_converge_diverge),
+    (lambda close: reference_volatility(close, 26), lambda close: TopStockInfo.moving_volatility(close, 26))])
+def test_indicator_matches_loop(hourly, reference, indicator):
+    close = hourly["Close"]
+    expected = reference(close.to_numpy())
+    assert np.allclose(expected, indicator(close).to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+# the original loop over closes left one more day blank than the window needs
+def test_stochastic_matches_loop(hourly):
+    close = hourly["Close"]
+    expected = reference_stochastic(close.to_numpy())
+    result = TopStockInfo.stochastic_oscillator(close, 14).to_numpy()
+    assert np.allclose(expected[15:], result[15:]) and np.isnan(result[:14]).all()
+
+
+# with High/Low histories, the range is the highest high and lowest low of the window before each bar
+def test_stochastic_high_low_window(hourly):
+    high, low, close = hourly["High"], hourly["Low"], hourly["Close"]
+    H = high.rolling(20).max().shift(1).to_numpy()
+    L = low.rolling(20).min().shift(1).to_numpy()
+    expected = (close.shift(1).to_numpy() - L)/(H - L)*100
+    assert np.allclose(expected, TopStockInfo.stochastic_oscillator(close, 20, high, low).to_numpy(), equal_nan=True)
+
+
+def test_stochastic_flat_range_is_50():
+    close = pd.Series([10.0]*20 + [11.0, 12.0])
+    result = TopStockInfo.stochastic_oscillator(close, 14).to_numpy()
+    assert (result[14:21] == 50).all() and result[21] == 100
+
+
+# every indicator over a dates x tickers panel with staggered listing dates and gaps, column by column against
+# the single-series path from each ticker's first price (gaps filled forward). Panels narrower than WIDE_PANEL
+# are computed column by column and wider ones row by row, so both are checked.
+@pytest.mark.parametrize("n_tickers", [TopStockInfo.WIDE_PANEL//2, TopStockInfo.WIDE_PANEL*2])
+@pytest.mark.parametrize("indicator, args", [
+    (TopStockInfo.simple_moving_average, (30,)), (TopStockInfo.exp_moving_average, (26, 2)),
+    (TopStockInfo.MA_converge_diverge, ()), (TopStockInfo.moving_volatility, (20,)),
+    (TopStockInfo.stochastic_oscillator, (14,))])
+def test_panel_indicator_matches_columns(indicator, args, n_tickers):
+    prices = SyntheticProvider(n_tickers=n_tickers, years=1).close_panel().to_numpy(copy=True)
+    rng = np.random.default_rng(0)
+    listed = rng.integers(0, len(prices)//2, n_tickers)
+    prices[np.arange(len(prices))[:, None] < listed[None, :]] = np.nan
+    prices[rng.integers(0, len(prices), n_tickers), rng.integers(0, n_tickers, n_tickers)] = np.nan
+    listed = np.argmax(~np.isnan(prices), axis=0)     # first priced row, after any gaps landing on listing day
+
+    result = indicator(prices, *args)
+    for j in range(n_tickers):
+        column = pd.Series(prices[listed[j]:, j]).ffill()
+        assert np.allclose(indicator(column, *args).to_numpy(), result[listed[j]:, j], equal_nan=True)
+        assert np.isnan(result[:listed[j], j]).all()
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import Ledger
+from helpers import reference_ledger
+
+
+# holdings and capital of a random ledger (trades on weekends and holidays included) against the original
+# per-trade updates of every following row
+def test_positions_match_row_updates():
+    rng = np.random.default_rng(0)
+    n_events, n_tickers = 400, 20
+    dates = pd.bdate_range("2015-01-01", periods=500)
+    tickers = [f"T{k}" for k in range(n_tickers)]
+    prices = 100*np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), n_tickers)), axis=0))
+    event_dates = dates[rng.integers(0, len(dates), n_events)] - pd.to_timedelta(rng.integers(0, 3, n_events), 'D')
+    actions = rng.choice(['buy', 'sell', 'drip'], n_events, p=[0.7, 0.2, 0.1])
+    event_tickers = rng.choice(tickers, n_events)
+    shares = rng.exponential(10, n_events)
+
+    events = Ledger.ledger_events(event_dates, event_tickers, actions, shares)
+    holdings, capital = Ledger.ledger_positions(events, dates, tickers, prices)
+    expected_holdings, expected_capital = reference_ledger(events, dates, tickers, prices)
+    assert np.allclose(holdings, expected_holdings) and np.allclose(capital, expected_capital)
+    assert np.isclose(holdings[-1].sum(), np.where(actions == 'sell', -shares, shares).sum())
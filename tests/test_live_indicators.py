@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import TopStockInfo
+from LiveIndicators import RunningSMA, RunningEMA, RunningMACD, RunningStochastic, RunningVolatility
+from DataProviders import SyntheticProvider
+
+
+@pytest.fixture(scope="module")
+def hourly():
+    return SyntheticProvider(years=1).history("SYN00000", interval="1h")
+
+
+# values after each update against the batch indicator over the whole history
+@pytest.mark.parametrize("running, indicator", [
+    (lambda: RunningSMA(26), lambda close: TopStockInfo.simple_moving_average(close, 26)),
+    (lambda: RunningEMA(26, 2), lambda close: TopStockInfo.exp_moving_average(close, 26, 2)),
+    (lambda: RunningEMA(12, 3), lambda close: TopStockInfo.exp_moving_average(close, 12, 3)),
+    (RunningMACD, TopStockInfo.MA_converge_diverge),
+    (lambda: RunningStochastic(14), lambda close: TopStockInfo.stochastic_oscillator(close, 14)),
+    (lambda: RunningVolatility(26), lambda close: TopStockInfo.moving_volatility(close, 26)),
+    (lambda: RunningVolatility(2), lambda close: TopStockInfo.moving_volatility(close, 2))])
+def test_running_matches_batch(hourly, running, indicator):
+    close = hourly["Close"]
+    live = running()
+    values = np.array([live.update(price) for price in close.to_numpy()])
+    assert np.allclose(values, indicator(close).to_numpy(), rtol=1e-8, atol=1e-8, equal_nan=True)
+
+
+# the window high and low taken from High/Low bars
+def test_running_stochastic_with_high_low(hourly):
+    high, low, close = hourly["High"], hourly["Low"], hourly["Close"]
+    live = RunningStochastic(14)
+    values = np.array([live.update(*bar) for bar in zip(close.to_numpy(), high.to_numpy(), low.to_numpy())])
+    expected = TopStockInfo.stochastic_oscillator(close, 14, high, low).to_numpy()
+    assert np.allclose(values, expected, rtol=1e-8, atol=1e-8, equal_nan=True)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import SimpleMeanReversion
+import MultiMeanReversion
+from DataProviders import SyntheticProvider
+from baseline import reference_mean_reversion, reference_multi_mean_reversion
+
+
+@pytest.fixture(scope="module")
+def close():
+    return SyntheticProvider(years=3).history("SYN00000")["Close"].to_numpy()
+
+
+@pytest.fixture(scope="module")
+def prices():
+    return SyntheticProvider(n_tickers=3, years=3).close_panel().to_numpy()
+
+
+# a batch of configurations against the original loop run per configuration
+def test_simple_batch_matches_loop(close):
+    ma_short, ma_long, amt = np.meshgrid([3, 7, 12], [20, 30, 45], [5.0, 10.0, 50.0])
+    ma_short, ma_long, amt = ma_short.ravel(), ma_long.ravel(), amt.ravel()
+    cash, holdings = SimpleMeanReversion.mean_reversion_backtest(close, ma_short, ma_long, amt)
+    for j in range(len(amt)):
+        expected = reference_mean_reversion(close, ma_short[j], ma_long[j], amt[j])
+        assert np.allclose(expected, np.column_stack((cash[:, j], holdings[:, j])))
+
+
+def test_simple_ma_table_needs_every_window(close):
+    windows = np.array([5, 10])
+    table = SimpleMeanReversion.moving_average_table(close, windows)
+    with pytest.raises(ValueError):
+        SimpleMeanReversion.mean_reversion_backtest(close, 7, 10, 1.0, ma_table=(windows, table))
+    with pytest.raises(ValueError):
+        SimpleMeanReversion.mean_reversion_backtest(close, 5, 12, 1.0, ma_table=(windows, table))
+
+
+@pytest.mark.parametrize("ma_long, ma_short, trade_factor", [(10, 5, 0.05), (30, 7, 0.2), (45, 20, 0.01)])
+def test_multi_matches_loop(prices, ma_long, ma_short, trade_factor):
+    cash, holdings, _ = MultiMeanReversion.mean_reversion_backtest(
+        prices, MultiMeanReversion.ma_panel(prices, ma_long), MultiMeanReversion.ma_panel(prices, ma_short),
+        trade_factor)
+    expected = reference_multi_mean_reversion(prices, ma_long, ma_short, trade_factor)
+    assert np.allclose(expected, np.column_stack((cash[:, 0], holdings[:, 0])))
+
+
+# configurations picking their MAs from a stack by index give the same result as their own MA arrays
+def test_multi_ma_stack_indices(prices):
+    windows = np.array([5, 7, 10, 30])
+    stack = np.stack([MultiMeanReversion.ma_panel(prices, k) for k in windows])
+    long_index, short_index = np.array([2, 3, 3]), np.array([0, 0, 1])
+    trade_factor = np.array([0.05, 0.1, 0.2])
+    stacked = MultiMeanReversion.mean_reversion_backtest(prices, stack, stack, trade_factor, 10000.0,
+                                                         long_index, short_index)
+    copied = MultiMeanReversion.mean_reversion_backtest(prices, stack[long_index], stack[short_index], trade_factor)
+    for a, b in zip(stacked, copied):
+        assert np.array_equal(a, b)
+
+
+# with staggered listing dates, adding a ticker that never trades doesn't change the result
+def test_multi_unlisted_ticker_changes_nothing():
+    prices = SyntheticProvider(n_tickers=20, years=4).close_panel().to_numpy(copy=True)
+    listed = np.random.default_rng(0).integers(0, len(prices)//2, prices.shape[1])
+    prices[np.arange(len(prices))[:, None] < listed[None, :]] = np.nan
+
+    def run(prices):
+        return MultiMeanReversion.mean_reversion_backtest(prices, MultiMeanReversion.ma_panel(prices, 30),
+                                                          MultiMeanReversion.ma_panel(prices, 7), 0.05)
+    cash, holdings, _ = run(prices)
+    cash_empty, holdings_empty, _ = run(np.column_stack((prices, np.full(len(prices), np.nan))))
+    assert np.allclose(cash, cash_empty) and np.allclose(holdings, holdings_empty)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+import Metrics
+from helpers import reference_metrics
+
+RISK_FREE = 0.065
+
+
+@pytest.fixture(scope="module")
+def curves():
+    rng = np.random.default_rng(0)
+    equity = 10000*np.exp(np.cumsum(rng.normal(0.0003, 0.01, (252, 50)), axis=0))
+    traded = rng.exponential(100, (252, 50))
+    return equity, traded
+
+
+# every metric of every curve against one pandas statistic at a time, computed in chunks of curves
+def test_metrics_match_pandas(curves):
+    equity, traded = curves
+    reference = np.array([reference_metrics(equity[:, k], traded[:, k], RISK_FREE) for k in range(equity.shape[1])])
+    assert np.allclose(reference, Metrics.metrics(equity, traded, RISK_FREE, chunk_size=7).to_numpy())
+
+
+# rolling metrics at a date against the metrics of the trailing window ending there
+def test_rolling_metrics_match_trailing_windows(curves):
+    equity, traded = curves
+    window = 63
+    rolling = Metrics.rolling_metrics(equity, window, traded, RISK_FREE, max_elements=10**5)
+    for t in (window, 150, len(equity) - 1):
+        trailing = Metrics.metrics(equity[t - window:t + 1], traded[t - window + 1:t + 1], RISK_FREE)
+        # turnover differs by design: the rolling mean value is over the window's trading days only
+        for name in Metrics.METRICS:
+            assert np.allclose(rolling[name][t], trailing[name].to_numpy()), name
+    for values in rolling.values():
+        assert np.isnan(values[:window]).all()
+
+
+@pytest.mark.parametrize("window", [252, 300])
+def test_rolling_metrics_longer_than_history(curves, window):
+    equity, traded = curves
+    rolling = Metrics.rolling_metrics(equity, window, traded)
+    assert set(rolling) == set(Metrics.METRICS + ['turnover'])
+    for values in rolling.values():
+        assert values.shape == equity.shape and np.isnan(values).all()
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+import ParameterSweep
+from DataProviders import SyntheticProvider
+from baseline import reference_multi_mean_reversion
+
+GRID = (range(10, 31, 10), range(3, 8, 2), [0.05, 0.1])
+
+
+@pytest.fixture(scope="module")
+def prices():
+    return SyntheticProvider(n_tickers=3, years=2).close_panel().to_numpy()
+
+
+def test_sweep_matches_loop(prices):
+    results = ParameterSweep.sweep(prices, *GRID, chunk_size=5, max_workers=2)
+    assert list(results['config']) == list(range(len(results)))
+    for _, config in results.iterrows():
+        history = reference_multi_mean_reversion(prices, int(config['ma_long_interval']),
+                                                 int(config['ma_short_interval']), config['trade_factor'])
+        value = history.sum(axis=1)
+        assert np.isclose(config['final_return'], value[-1]/value[0]*100)
+
+
+# a sweep resumed from a checkpoint whose last line was cut short runs that configuration again
+def test_sweep_resumes_from_cut_checkpoint(prices, tmp_path):
+    checkpoint = str(tmp_path/"sweep.csv")
+    full = ParameterSweep.sweep(prices, *GRID, checkpoint=checkpoint, chunk_size=5, max_workers=1)
+    with open(checkpoint) as file:
+        text = file.read()
+    with open(checkpoint, "w") as file:
+        file.write(text[:-3])    # the last number loses its last digits
+    resumed = ParameterSweep.sweep(prices, *GRID, checkpoint=checkpoint, chunk_size=5, max_workers=1)
+    assert np.allclose(full.to_numpy(), resumed.to_numpy())
+    saved = pd.read_csv(checkpoint).sort_values('config').reset_index(drop=True)
+    assert np.allclose(full.to_numpy(), saved.to_numpy())
+
+
+def test_checkpoint_of_another_grid_is_rejected(prices, tmp_path):
+    checkpoint = str(tmp_path/"sweep.csv")
+    ParameterSweep.sweep(prices, *GRID, checkpoint=checkpoint, max_workers=1)
+    with pytest.raises(ValueError):
+        ParameterSweep.sweep(prices, range(15, 31, 10), *GRID[1:], checkpoint=checkpoint, max_workers=1)
+
+
+def test_empty_grid_is_rejected(prices):
+    with pytest.raises(ValueError, match="no configurations"):
+        ParameterSweep.sweep(prices, *GRID[:2], [], max_workers=1)
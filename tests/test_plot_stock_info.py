@@ -0,0 +1,64 @@
+import runpy
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+import MetricRegistry
+import PlotStockInfo
+from helpers import LatencyFetch, reference_lttb
+
+
+@pytest.mark.parametrize("n, n_out", [(10**4, 500), (1001, 3), (1000, 999)])
+def test_lttb_matches_loop(n, n_out):
+    rng = np.random.default_rng(0)
+    x = np.arange(n, dtype=float)
+    y = np.cumsum(rng.normal(0, 1, n))
+    assert np.array_equal(PlotStockInfo.lttb(x, y, n_out), reference_lttb(x.tolist(), y.tolist(), n_out))
+
+
+# the metric registry, which downloads each ticker once and shares intermediates, against one download per
+# (metric, ticker) pair
+def test_registry_matches_per_pair_downloads():
+    tickers = [f"T{i}" for i in range(4)]
+    metrics_list = list(PlotStockInfo.METRICS)
+    start, end = "2018-01-01", "2020-01-01"
+    derived = {'DailyReturn%': lambda history: PlotStockInfo.get_return_percent(history['Open'], history['Close']),
+               'WeekVolatility': lambda history: PlotStockInfo.get_week_volatility(history['Close']),
+               'MonthVolatility': lambda history: PlotStockInfo.get_month_volatility(history['Close'])}
+    fetch = LatencyFetch(0.0)
+    data = PlotStockInfo.evaluate_metrics(metrics_list, tickers, start, end, fetch=fetch)
+    assert fetch.calls == len(tickers)
+    for metric in metrics_list:
+        for tick in tickers:
+            history = fetch(tick, start, end, "1d")
+            expected = derived[metric](history) if metric in derived else history[metric]
+            assert np.allclose(expected.to_numpy(dtype=float), data[metric][tick].to_numpy(dtype=float))
+
+
+# charts are rendered on the process pool with the Agg backend, one file per metric and ticker
+def test_render_charts_writes_files(tmp_path):
+    paths = PlotStockInfo.render_charts(['Close', 'DailyReturn%'], ['T0'], "2019-01-01", "2020-01-01", tmp_path,
+                                        max_points=100, max_workers=2, fetch=LatencyFetch(0.0))
+    assert sorted(paths) == sorted(str(tmp_path/name) for name in ["Close_T0.png", "DailyReturn__T0.png"])
+    for path in paths:
+        with open(path, "rb") as file:
+            assert file.read(8) == b"\x89PNG\r\n\x1a\n"
+
+
+# a plugin's metrics reach the registry the script uses when PlotStockInfo runs as __main__
+def test_plugin_registers_when_run_as_script(synthetic_market, tmp_path, monkeypatch):
+    tick = synthetic_market(1).tickers[0]
+    (tmp_path/"range_plugin.py").write_text(
+        "from MetricRegistry import register_metric\n"
+        "register_metric('Range', ['High', 'Low'], lambda high, low: high - low)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "range_plugin", raising=False)
+    monkeypatch.setattr(MetricRegistry, "METRICS", dict(MetricRegistry.METRICS))
+    start = str((pd.Timestamp.today() - pd.DateOffset(years=1)).date())
+    end = str(pd.Timestamp.today().date())
+    monkeypatch.setattr(sys, "argv", ["PlotStockInfo.py", "--plugins", "range_plugin", "--metrics", "Range",
+                                      "--tickers", tick, "--start", start, "--end", end,
+                                      "--out", str(tmp_path/"charts"), "--workers", "1"])
+    runpy.run_path(PlotStockInfo.__file__, run_name="__main__")
+    assert 'Range' in MetricRegistry.METRICS
+    assert (tmp_path/"charts"/f"Range_{tick}.png").exists()
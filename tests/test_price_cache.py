@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from PriceCache import PriceCache
+
+
+# daily bars of a price that rises by one a day, adjusted for the splits in the splits Series (date -> ratio)
+# the way Yahoo adjusts history: prices before a split are divided by its ratio
+class AdjustedFetch:
+
+    def __init__(self, dates):
+        self.dates = dates
+        self.splits = pd.Series(0.0, index=dates)
+        self.calls = 0
+
+    def __call__(self, tick, start, end, interval):
+        self.calls += 1
+        close = pd.Series(np.arange(1.0, len(self.dates) + 1), index=self.dates)
+        for date, ratio in self.splits[self.splits != 0].items():
+            close[self.dates < date] /= ratio
+        frame = pd.DataFrame({'Close': close, 'Dividends': 0.0, 'Stock Splits': self.splits})
+        return frame[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))]
+
+
+def test_only_missing_spans_are_downloaded(tmp_path):
+    fetch = AdjustedFetch(pd.bdate_range("2020-01-01", "2020-12-31"))
+    cache = PriceCache(tmp_path, fetch=fetch)
+    cache.history("X", "2020-01-01", "2020-03-01")
+    cache.history("X", "2020-06-01", "2020-09-01")
+    history = cache.history("X", "2020-01-01", "2021-01-01")
+    assert cache.stats()['downloads'] == 4    # two spans, then the gap between them and the rest of the year
+    assert history.equals(fetch("X", "2020-01-01", "2021-01-01", "1d"))
+    cache.history("X", "2020-02-01", "2020-10-01")
+    assert cache.stats()['hits'] == 1 and cache.stats()['downloads'] == 4
+
+
+# a split after the cached bars changes the adjustment of every earlier price, so they are downloaded again
+def test_new_split_refreshes_cached_bars(tmp_path):
+    fetch = AdjustedFetch(pd.bdate_range("2020-01-01", "2020-12-31"))
+    cache = PriceCache(tmp_path, fetch=fetch)
+    cache.history("X", "2020-01-01", "2020-06-01")
+    fetch.splits[pd.Timestamp("2020-08-03")] = 2.0
+    history = cache.history("X", "2020-01-01", "2021-01-01")
+    assert np.allclose(history['Close'], fetch("X", "2020-01-01", "2021-01-01", "1d")['Close'])
+
+
+# periods end at the last completed day, so repeating a period request is answered from disk
+def test_repeated_period_requests_hit(tmp_path):
+    def fetch(tick, start, end, interval):
+        dates = pd.bdate_range(start, end, inclusive='left')
+        return pd.DataFrame({'Close': np.arange(len(dates), dtype=float)}, index=dates)
+    cache = PriceCache(tmp_path, fetch=fetch)
+    for _ in range(3):
+        cache.history("X", period="1y")
+    assert cache.stats()['misses'] == 1 and cache.stats()['hits'] == 2
+
+
+# a span that comes back empty is more likely a failed download than a gap in the history, so it isn't
+# recorded as covered and the next request downloads it again
+def test_empty_download_is_retried(tmp_path):
+    fetch = AdjustedFetch(pd.bdate_range("2020-01-01", "2020-12-31"))
+    failing = iter([True])
+    def flaky(tick, start, end, interval):
+        frame = fetch(tick, start, end, interval)
+        return frame.iloc[:0] if next(failing, False) else frame
+    cache = PriceCache(tmp_path, fetch=flaky)
+    assert not len(cache.history("X", "2020-01-01", "2020-03-01"))
+    history = cache.history("X", "2020-01-01", "2020-03-01")
+    assert history.equals(fetch("X", "2020-01-01", "2020-03-01", "1d"))
+    cache.history("X", "2020-01-01", "2020-03-01")
+    assert cache.stats()['downloads'] == 2 and cache.stats()['hits'] == 1
+
+
+# weekends and the years before the first bar (the listing) are real gaps, so they are still cached
+def test_closed_market_spans_are_cached(tmp_path):
+    fetch = AdjustedFetch(pd.bdate_range("2020-01-01", "2020-12-31"))
+    cache = PriceCache(tmp_path, fetch=fetch)
+    cache.history("X", "2020-01-01", "2020-03-01")
+    cache.history("X", "2020-03-01", "2020-03-02")      # a Sunday
+    cache.history("X", "2010-01-01", "2020-03-01")
+    cache.history("X", "2010-01-01", "2020-03-02")
+    assert cache.stats()['downloads'] == 3 and cache.stats()['hits'] == 1
@@ -0,0 +1,26 @@
+import warnings
+import numpy as np
+import pandas as pd
+from PricePanel import PricePanel
+from helpers import reference_wide_portfolio
+
+
+# portfolio value from a price panel against the original wide DataFrame of one column per ticker and field
+def test_portfolio_value_matches_wide_frame():
+    rng = np.random.default_rng(0)
+    n_tickers = 30
+    dates = pd.bdate_range("2010-01-01", periods=300)
+    tickers = [f"T{k}.JO" if k % 2 else f"T{k}" for k in range(n_tickers)]
+    prices = 100*np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), n_tickers)), axis=0))
+    usd_zar = 15 + np.cumsum(rng.normal(0, 0.05, len(dates)))
+    shares = np.cumsum(rng.exponential(1, (len(dates), n_tickers))*(rng.random((len(dates), n_tickers)) < 0.05), 0)
+
+    panel = PricePanel(dates, tickers, fields=('price', 'shares', 'zar'))
+    panel['price'] = prices
+    panel['shares'] = shares
+    rand_cents = np.array(["JO" in ticker for ticker in tickers])
+    panel['zar'] = panel['price']*np.where(rand_cents[None, :], 1/100, usd_zar[:, None])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', pd.errors.PerformanceWarning)
+        data, _ = reference_wide_portfolio(dates, tickers, prices, shares, usd_zar)
+    assert np.allclose(data["Portfolio"].to_numpy(), (panel['shares']*panel['zar']).sum(axis=1))
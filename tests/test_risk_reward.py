@@ -0,0 +1,47 @@
+from itertools import islice
+import numpy as np
+import RiskReward
+
+
+# batched evaluation of every weighting against the per-weighting Stock loop
+def test_frontier_chunks_match_loop(synthetic_market, monkeypatch):
+    ticks = synthetic_market(4).tickers
+    resolution = 20
+    monkeypatch.setattr(RiskReward, "resolution_scale", 1/resolution)
+    portfolio = {i: RiskReward.Stock(tick, RiskReward.getMean(tick), RiskReward.getsDev(tick), 0)
+                 for i, tick in enumerate(ticks)}
+    expected = []
+    for weighting in RiskReward.weights(len(ticks), resolution):
+        for i in range(len(ticks)):
+            portfolio[i].weight = weighting[i]
+        expected.append((RiskReward.portfolio_risk(portfolio, "5y"), RiskReward.portfolio_return(portfolio)))
+    batched = [np.column_stack((risk, ret)) for wt, risk, ret in
+               RiskReward.frontier_chunks(ticks, "5y", resolution, chunk_size=500)]
+    assert np.allclose(np.array(expected), np.concatenate(batched))
+
+
+def test_weight_chunks_match_weights():
+    expected = np.array(list(islice(RiskReward.weights(5, 12), 10**6)))
+    assert np.array_equal(expected, np.concatenate(list(RiskReward.weight_chunks(5, 12, chunk_size=77))))
+
+
+# no weighting of the grid beats the exact minimum variance or maximum Sharpe of the critical line frontier
+def test_critical_line_bounds_grid(synthetic_market):
+    ticks = synthetic_market(4).tickers
+    risk_free = 6.5/252
+    cla = RiskReward.efficient_frontier(ticks, "5y")
+    _, min_risk, _ = cla.min_variance()
+    _, sharpe_risk, sharpe_ret = cla.max_sharpe(risk_free)
+    for wt, risk, ret in RiskReward.frontier_chunks(ticks, "5y", 30):
+        assert risk.min() >= min_risk - 1e-12
+        assert ((ret - risk_free)/risk).max() <= (sharpe_ret - risk_free)/sharpe_risk + 1e-12
+
+
+# the sampled frontier doesn't depend on the number of processes, and lies on or below the critical line
+def test_sample_frontier(synthetic_market):
+    ticks = synthetic_market(5).tickers
+    serial = RiskReward.sample_frontier(ticks, "5y", 200000, task_size=50000, max_workers=1)
+    pooled = RiskReward.sample_frontier(ticks, "5y", 200000, task_size=50000, max_workers=2)
+    assert np.array_equal(serial.weights, pooled.weights) and pooled.count == 200000
+    _, risk, ret = RiskReward.efficient_frontier(ticks, "5y").frontier(500)
+    assert (pooled.ret <= np.interp(pooled.risk, risk[::-1], ret[::-1]) + 1e-9).all()
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+import StockGetFunctions
+import Ledger
+from Baskets import Basket
+from Currency import fx_rates
+from DataProviders import SyntheticProvider
+from PriceCache import PriceCache
+from Valuation import Valuation
+
+STOCKS = ["AAA", "BBB.JO"]
+BASKETS = [Basket("BSK", {"C1-USD": 0.5, "C2-USD": 0.5})]     # constituents that aren't held themselves
+START, SNAPSHOT_END, END = "2020-01-01", "2020-06-01", "2020-07-01"
+TRADES = [("2020-01-15", "AAA", "buy", 10), ("2020-02-03", "BBB.JO", "buy", 500), ("2020-03-02", "BSK", "buy", 3),
+          ("2020-04-01", "AAA", "sell", 4), ("2020-06-10", "BBB.JO", "buy", 100)]
+
+
+# synthetic market whose closes can be revised after they were first downloaded
+class RevisedMarket:
+
+    def __init__(self):
+        self.provider = SyntheticProvider(origin="2019-10-01", years=1)
+        self.revisions = {}     # (ticker, date) -> factor applied to the close
+
+    def __call__(self, tick, start, end, interval):
+        frame = self.provider(tick, start, end, interval).copy()
+        for (revised, date), factor in self.revisions.items():
+            if revised == tick and date in frame.index:
+                frame.loc[date, 'Close'] *= factor
+        return frame
+
+
+def use_market(monkeypatch, market, cache_dir):
+    monkeypatch.setattr(StockGetFunctions, "market_data", PriceCache(str(cache_dir), fetch=market))
+    fx_rates.clear()
+
+
+@pytest.fixture
+def market(monkeypatch, tmp_path):
+    market = RevisedMarket()
+    use_market(monkeypatch, market, tmp_path/"cache")
+    yield market
+    fx_rates.clear()
+
+
+def value(trades, end, snapshot_dir=None):
+    events = Ledger.ledger_events(*zip(*trades))
+    return Valuation(STOCKS, BASKETS, events, START, end).value(snapshot_dir, "key")
+
+
+# the portfolio valued from scratch, with a fresh cache of the market as it is now
+def full_rebuild(monkeypatch, market, cache_dir, trades):
+    use_market(monkeypatch, market, cache_dir)
+    return value(trades, END)
+
+
+def assert_same(result, expected):
+    (panel, capital), (expected_panel, expected_capital) = result, expected
+    assert panel.dates.equals(expected_panel.dates) and panel.columns == expected_panel.columns
+    for field in ('price', 'shares', 'home'):
+        assert np.allclose(panel[field], expected_panel[field], equal_nan=True)
+    assert np.allclose(capital, expected_capital)
+
+
+def test_incremental_matches_full_rebuild(market, monkeypatch, tmp_path, capsys):
+    value(TRADES, SNAPSHOT_END, tmp_path/"snapshot")
+    result = value(TRADES, END, tmp_path/"snapshot")
+    assert "rebuilding" not in capsys.readouterr().out
+    assert_same(result, full_rebuild(monkeypatch, market, tmp_path/"fresh", TRADES))
+
+
+def test_back_dated_trade_rebuilds(market, monkeypatch, tmp_path, capsys):
+    value(TRADES, SNAPSHOT_END, tmp_path/"snapshot")
+    trades = TRADES + [("2020-03-10", "AAA", "buy", 5)]
+    result = value(trades, END, tmp_path/"snapshot")
+    assert "rebuilding" in capsys.readouterr().out
+    assert_same(result, full_rebuild(monkeypatch, market, tmp_path/"fresh", trades))
+
+
+# a revised close of a held stock, of a basket constituent or of the FX rate, on one of the snapshot's last days
+@pytest.mark.parametrize("tick", ["AAA", "C1-USD", "ZAR=X"])
+def test_revised_price_rebuilds(market, monkeypatch, tmp_path, capsys, tick):
+    panel, _ = value(TRADES, SNAPSHOT_END, tmp_path/"snapshot")
+    market.revisions[(tick, panel.dates[-2])] = 1.05
+    result = value(TRADES, END, tmp_path/"snapshot")
+    assert "rebuilding" in capsys.readouterr().out
+    expected = full_rebuild(monkeypatch, market, tmp_path/"fresh", TRADES)
+    assert_same(result, expected)
+    row = expected[0].dates.get_loc(panel.dates[-2])
+    assert not np.allclose(expected[0]['home'][row], panel['home'][-2])
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import TopStockInfo
+import SimpleMeanReversion
+import MultiMeanReversion
+import WalkForward
+from DataProviders import SyntheticProvider
+
+
+# each fold's out-of-sample result against a direct run on the fold's days with freshly computed MAs
+@pytest.mark.parametrize("name", list(WalkForward.STRATEGIES))
+def test_folds_match_direct_runs(name):
+    prices = SyntheticProvider(n_tickers=3, years=4).close_panel()
+    in_sample, out_of_sample = 252, 126
+    folds, equity = WalkForward.walk_forward(name, prices, WalkForward.grids[name], in_sample, out_of_sample)
+    for k, (a, b, c) in enumerate(WalkForward.fold_ranges(len(prices), in_sample, out_of_sample)):
+        fold = folds.iloc[k]
+        if name == "simple":
+            close = prices.iloc[:, 0].to_numpy()
+            windows = np.unique([int(fold['ma_short']), int(fold['ma_long'])])
+            ma = np.column_stack([TopStockInfo.simple_moving_average(close, w) for w in windows])[b:c]
+            cash, holdings = SimpleMeanReversion.mean_reversion_backtest(
+                close[b:c], fold['ma_short'], fold['ma_long'], fold['amt'], ma_table=(windows, ma),
+                previous_close=close[b - 1])
+            value = (cash + holdings)[-1, 0]/1000.0
+        else:
+            ma_long = MultiMeanReversion.ma_panel(prices, int(fold['ma_long_interval']))[b:c]
+            ma_short = MultiMeanReversion.ma_panel(prices, int(fold['ma_short_interval']))[b:c]
+            cash, holdings, _ = MultiMeanReversion.mean_reversion_backtest(prices.to_numpy()[b:c], ma_long,
+                                                                           ma_short, fold['trade_factor'])
+            value = (cash + holdings)[-1, 0]/10000.0
+        assert np.isclose(fold['out_of_sample_return'], value*100)
+
+
+# a history no longer than the in-sample window has no folds to trade
+def test_short_history_is_rejected():
+    prices = SyntheticProvider(n_tickers=3, years=1).close_panel()
+    with pytest.raises(ValueError, match="in_sample"):
+        WalkForward.walk_forward("multi", prices, WalkForward.grids["multi"], len(prices), 126)
+    with pytest.raises(ValueError, match="no configurations"):
+        WalkForward.walk_forward("multi", prices, {**WalkForward.grids["multi"], 'trade_factor': []}, 126, 63)